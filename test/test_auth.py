@@ -0,0 +1,96 @@
+# Copyright © 2022-2024 by the xcube development team and contributors
+# Permissions are hereby granted under the terms of the MIT License:
+# https://opensource.org/licenses/MIT.
+
+import pickle
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from xcube_sh.auth import TokenManager
+
+
+class TokenFetcher:
+    def __init__(self, expires_in: float = 3600, delay: float = 0.0):
+        self.expires_in = expires_in
+        self.delay = delay
+        self.num_fetches = 0
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        time.sleep(self.delay)
+        with self._lock:
+            self.num_fetches += 1
+        return dict(access_token="x", expires_at=time.time() + self.expires_in)
+
+
+def fetch_token():
+    return dict(access_token="x", expires_at=time.time() + 3600)
+
+
+class TokenManagerTest(unittest.TestCase):
+    def test_refresh(self):
+        fetch_token = TokenFetcher()
+        token_manager = TokenManager(fetch_token)
+        self.assertEqual(0, token_manager.generation)
+        self.assertIsNone(token_manager.expires_at)
+        self.assertFalse(token_manager.is_stale())
+
+        self.assertEqual(1, token_manager.refresh())
+        self.assertEqual(1, fetch_token.num_fetches)
+        self.assertAlmostEqual(time.time() + 3600, token_manager.expires_at, delta=5)
+        self.assertFalse(token_manager.is_stale())
+
+        # Token of generation 0 has already been replaced
+        self.assertEqual(1, token_manager.refresh(0))
+        self.assertEqual(1, fetch_token.num_fetches)
+        self.assertEqual(2, token_manager.refresh(1))
+        self.assertEqual(2, fetch_token.num_fetches)
+
+    def test_ensure_valid_refreshes_stale_token(self):
+        fetch_token = TokenFetcher(expires_in=30)
+        token_manager = TokenManager(fetch_token, refresh_margin=60)
+        token_manager.refresh()
+        self.assertTrue(token_manager.is_stale())
+        self.assertEqual(2, token_manager.ensure_valid())
+        self.assertEqual(2, fetch_token.num_fetches)
+
+        token_manager = TokenManager(fetch_token, refresh_margin=10)
+        token_manager.refresh()
+        self.assertFalse(token_manager.is_stale())
+        self.assertEqual(1, token_manager.ensure_valid())
+
+    def test_concurrent_refreshes(self):
+        fetch_token = TokenFetcher(delay=0.1)
+        token_manager = TokenManager(fetch_token)
+        generation = token_manager.refresh()
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            generations = list(
+                executor.map(lambda _: token_manager.refresh(generation), range(8))
+            )
+        self.assertEqual([2] * 8, generations)
+        self.assertEqual(2, fetch_token.num_fetches)
+
+    def test_refresh_in_background(self):
+        fetch_token = TokenFetcher(expires_in=1.1)
+        token_manager = TokenManager(
+            fetch_token, refresh_margin=1.0, refresh_in_background=True
+        )
+        token_manager.refresh()
+        time.sleep(0.35)
+        self.assertGreaterEqual(token_manager.generation, 3)
+        token_manager.close()
+        generation = token_manager.generation
+        time.sleep(0.25)
+        self.assertEqual(generation, token_manager.generation)
+
+    def test_pickle(self):
+        token_manager = TokenManager(
+            fetch_token, refresh_margin=10, refresh_in_background=True
+        )
+        token_manager.refresh()
+        token_manager = pickle.loads(pickle.dumps(token_manager))
+        self.assertEqual(0, token_manager.generation)
+        self.assertEqual(1, token_manager.refresh())
+        token_manager.close()
@@ -0,0 +1,147 @@
+# Copyright © 2022-2024 by the xcube development team and contributors
+# Permissions are hereby granted under the terms of the MIT License:
+# https://opensource.org/licenses/MIT.
+
+import io
+import json
+import re
+import time
+import unittest
+import zlib
+from unittest import mock
+
+import numpy as np
+
+from test.test_chunkstore import MockResponse
+from test.test_chunkstore import SentinelHubMock
+from xcube_sh.autotune import tune_tile_size
+from xcube_sh.config import CubeConfig
+
+
+class LatencySentinelHubMock(SentinelHubMock):
+    """
+    Responds after a fixed latency plus a time
+    proportional to the number of requested pixels.
+    """
+
+    def __init__(self, config: CubeConfig, ok: bool = True):
+        super().__init__(config)
+        self._ok = ok
+
+    def get_data(self, request, mime_type=None):
+        if isinstance(request, bytes):
+            request = json.loads(request)
+        width = request["output"]["width"]
+        height = request["output"]["height"]
+        time.sleep(0.1 + width * height * 1e-8)
+        if not self._ok:
+            return MockResponse(ok=False, status_code=500, headers={}, content=b"")
+        num_bands = int(
+            re.search(r"output: \[\s*{bands: (\d+)", request["evalscript"]).group(1)
+        )
+        array = np.zeros((height, width, num_bands), dtype=np.float32)
+        content = zlib.compress(bytes(array))
+        return MockResponse(ok=True, status_code=200, headers={}, content=content)
+
+
+class TuneTileSizeTest(unittest.TestCase):
+    @staticmethod
+    def new_cube_config(size: int, time_period: str = "1D") -> CubeConfig:
+        spatial_res = 0.1 / 4000
+        return CubeConfig(
+            dataset_name="S2L1C",
+            band_names=["B01", "B08"],
+            bbox=(10.2, 53.5, 10.2 + size * spatial_res, 53.5 + size * spatial_res),
+            spatial_res=spatial_res,
+            time_range=("2017-08-01", "2017-08-03"),
+            time_period=time_period,
+        )
+
+    def test_fastest_tile_size(self):
+        cube_config = self.new_cube_config(4000)
+        # noinspection PyTypeChecker
+        tuning = tune_tile_size(
+            cube_config,
+            tile_sizes=[500, 1000, 2000],
+            num_probes=2,
+            sentinel_hub=LatencySentinelHubMock(cube_config),
+        )
+        self.assertEqual(3, len(tuning.probes))
+        self.assertEqual(
+            [(500, 500), (1000, 1000), (2000, 2000)],
+            [probe.tile_size for probe in tuning.probes],
+        )
+        probe = tuning.probes[1]
+        self.assertEqual(2 * 3 * 4 * 4, probe.num_chunks)
+        self.assertEqual(2 * 2, probe.num_probes)
+        self.assertEqual(0, probe.num_failures)
+        self.assertEqual(1.0, probe.pixel_efficiency)
+        self.assertGreater(probe.bytes_per_second, 0)
+        self.assertAlmostEqual(
+            2 * 3 * 4000 * 4000 / 512**2 * 2 / 3, probe.processing_units
+        )
+
+        self.assertEqual((2000, 2000), tuning.tile_size)
+        self.assertEqual((2000, 2000), tuning.cube_config.tile_size)
+
+        fp = io.StringIO()
+        tuning.dump(fp)
+        self.assertIn("2000x2000", fp.getvalue())
+        self.assertIn(" *\n", fp.getvalue())
+
+    def test_most_efficient_tile_size(self):
+        cube_config = self.new_cube_config(3000)
+        # noinspection PyTypeChecker
+        tuning = tune_tile_size(
+            cube_config,
+            tile_sizes=[1000, 2000],
+            num_probes=1,
+            objective="processing_units",
+            sentinel_hub=LatencySentinelHubMock(cube_config),
+        )
+        # Tiles of 2000 pixels need a padded cube of 4000 pixels
+        self.assertEqual((4000, 4000), tuning.probes[1].cube_config.size)
+        self.assertAlmostEqual(9 / 16, tuning.probes[1].pixel_efficiency)
+        self.assertEqual((1000, 1000), tuning.tile_size)
+
+    def test_catalog_is_queried_once(self):
+        cube_config = self.new_cube_config(4000, time_period=None)
+        sentinel_hub = LatencySentinelHubMock(cube_config)
+        with mock.patch.object(
+            sentinel_hub, "get_features", wraps=sentinel_hub.get_features
+        ) as get_features:
+            # noinspection PyTypeChecker
+            tuning = tune_tile_size(
+                cube_config,
+                tile_sizes=[1000, 2000],
+                num_probes=1,
+                sentinel_hub=sentinel_hub,
+            )
+        get_features.assert_called_once()
+        self.assertEqual(2, len(tuning.probes))
+        # Both probes use the time ranges found in the catalog
+        self.assertEqual(2 * 1 * 4 * 4, tuning.probes[0].num_chunks)
+        self.assertEqual(2 * 1 * 2 * 2, tuning.probes[1].num_chunks)
+
+    def test_failed_probes(self):
+        cube_config = self.new_cube_config(4000)
+        # noinspection PyTypeChecker
+        tuning = tune_tile_size(
+            cube_config,
+            tile_sizes=[1000],
+            num_probes=1,
+            sentinel_hub=LatencySentinelHubMock(cube_config, ok=False),
+        )
+        self.assertEqual(2, tuning.probes[0].num_failures)
+        self.assertIsNone(tuning.best)
+        self.assertIsNone(tuning.cube_config)
+
+    def test_invalid_objective(self):
+        cube_config = self.new_cube_config(4000)
+        with self.assertRaises(ValueError):
+            # noinspection PyTypeChecker
+            tune_tile_size(
+                cube_config,
+                objective="speed",
+                sentinel_hub=LatencySentinelHubMock(cube_config),
+            )
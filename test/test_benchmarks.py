@@ -0,0 +1,222 @@
+# Copyright © 2022-2024 by the xcube development team and contributors
+# Permissions are hereby granted under the terms of the MIT License:
+# https://opensource.org/licenses/MIT.
+
+# Benchmarks of the chunk store's hot paths against the local
+# SentinelHub API emulator. They are skipped, unless the environment
+# variable XCUBE_SH_BENCHMARKS is set. Using pytest-benchmark:
+#
+#   $ XCUBE_SH_BENCHMARKS=1 pytest test/test_benchmarks.py --benchmark-autosave
+#   $ XCUBE_SH_BENCHMARKS=1 pytest test/test_benchmarks.py --benchmark-compare
+#
+# If pytest-benchmark is not installed, every benchmark runs once
+# on smaller cubes as a smoke test, and its duration is printed.
+
+import os
+import time
+from typing import Any, Callable, Dict, Sequence
+
+import pandas as pd
+import pytest
+import xarray as xr
+import zarr
+
+from xcube_sh.chunkstore import SentinelHubChunkStore
+from xcube_sh.config import CubeConfig
+from xcube_sh.emulator import SentinelHubEmulator
+from xcube_sh.sentinelhub import SentinelHub
+
+pytestmark = pytest.mark.skipif(
+    not os.environ.get("XCUBE_SH_BENCHMARKS"),
+    reason="benchmarks require XCUBE_SH_BENCHMARKS to be set",
+)
+
+try:
+    import pytest_benchmark  # noqa: F401
+
+    SMOKE_TEST = False
+except ImportError:
+    SMOKE_TEST = True
+
+    class _SmokeBenchmark:
+        """Runs the benchmarked function once."""
+
+        def __init__(self, name: str):
+            self._name = name
+
+        def __call__(self, function: Callable, *args, **kwargs) -> Any:
+            start_time = time.perf_counter()
+            result = function(*args, **kwargs)
+            print(f"{self._name}: {time.perf_counter() - start_time:.3f} seconds")
+            return result
+
+        def pedantic(
+            self,
+            function: Callable,
+            args: Sequence[Any] = (),
+            kwargs: Dict[str, Any] = None,
+            **_options,
+        ) -> Any:
+            return self(function, *args, **(kwargs or {}))
+
+    @pytest.fixture
+    def benchmark(request):
+        return _SmokeBenchmark(request.node.name)
+
+
+# The emulator does not use HTTPS
+os.environ.setdefault("OAUTHLIB_INSECURE_TRANSPORT", "1")
+
+SPATIAL_RES = 0.1 / 4000
+
+CUBE_CONFIGS = {
+    # 2 x 2 tiles, 10 time steps
+    "small": dict(
+        bbox=(10.2, 53.5, 10.2 + 1024 * SPATIAL_RES, 53.5 + 1024 * SPATIAL_RES),
+        tile_size=(512, 512),
+        time_range=("2017-08-01", "2017-08-10"),
+    ),
+    # 100 x 100 tiles, 366 time steps
+    "large": dict(
+        bbox=(0.0, 50.0, 100000 * SPATIAL_RES, 50.0 + 100000 * SPATIAL_RES),
+        tile_size=(1000, 1000),
+        time_range=("2020-01-01", "2020-12-31"),
+    ),
+}
+
+if SMOKE_TEST:
+    CUBE_CONFIGS = {
+        # 1 x 1 tiles, 2 time steps
+        "small": dict(
+            bbox=(10.2, 53.5, 10.2 + 256 * SPATIAL_RES, 53.5 + 256 * SPATIAL_RES),
+            tile_size=(256, 256),
+            time_range=("2017-08-01", "2017-08-02"),
+        ),
+        # 10 x 10 tiles, 91 time steps
+        "large": dict(
+            bbox=(0.0, 50.0, 10000 * SPATIAL_RES, 50.0 + 10000 * SPATIAL_RES),
+            tile_size=(1000, 1000),
+            time_range=("2020-01-01", "2020-03-31"),
+        ),
+    }
+
+NUM_SMALL_TIME_STEPS = len(pd.date_range(*CUBE_CONFIGS["small"]["time_range"]))
+
+
+def new_cube_config(size: str, four_d: bool = False, **kwargs) -> CubeConfig:
+    return CubeConfig(
+        dataset_name="S2L2A",
+        band_names=["B02", "B03", "B04"],
+        spatial_res=SPATIAL_RES,
+        time_period="1D",
+        four_d=four_d,
+        **CUBE_CONFIGS[size],
+        **kwargs,
+    )
+
+
+@pytest.fixture(scope="module")
+def server():
+    with SentinelHubEmulator() as server:
+        yield server
+
+
+@pytest.fixture
+def sentinel_hub(server):
+    server.latency = 0.0
+    server.error_rate = 0.0
+    server.throttle_rate = 0.0
+    sentinel_hub = server.new_sentinel_hub()
+    yield sentinel_hub
+    sentinel_hub.close()
+
+
+@pytest.mark.parametrize("size", ["small", "large"])
+@pytest.mark.parametrize("four_d", [False, True], ids=["3d", "4d"])
+def test_store_construction(benchmark, sentinel_hub, size, four_d):
+    cube_config = new_cube_config(size, four_d=four_d)
+    store = benchmark(SentinelHubChunkStore, sentinel_hub, cube_config)
+    assert ".zmetadata" in store
+
+
+def test_store_construction_with_catalog(benchmark, sentinel_hub):
+    cube_config = CubeConfig(
+        dataset_name="S2L2A",
+        band_names=["B02", "B03", "B04"],
+        spatial_res=SPATIAL_RES,
+        **CUBE_CONFIGS["large"],
+    )
+    store = benchmark(SentinelHubChunkStore, sentinel_hub, cube_config)
+    assert len(store.time_ranges) > 10
+
+
+@pytest.mark.parametrize("size", ["small", "large"])
+def test_listdir(benchmark, sentinel_hub, size):
+    store = SentinelHubChunkStore(sentinel_hub, new_cube_config(size))
+    names = benchmark(store.listdir, "B02")
+    assert ".zarray" in names
+
+
+def test_new_data_request(benchmark):
+    request = benchmark(
+        SentinelHub.new_data_request,
+        "S2L2A",
+        ["B02", "B03", "B04"],
+        (1000, 1000),
+        bbox=(10.2, 53.5, 10.3, 53.6),
+        time_range=("2017-08-01T00:00:00Z", "2017-08-02T00:00:00Z"),
+    )
+    assert "evalscript" in request
+
+
+def test_data_request_template(benchmark):
+    template = SentinelHub.new_data_request_template(
+        "S2L2A", ["B02", "B03", "B04"], (1000, 1000)
+    )
+    request = benchmark(
+        template.new_request,
+        (10.2, 53.5, 10.3, 53.6),
+        ("2017-08-01T00:00:00Z", "2017-08-02T00:00:00Z"),
+    )
+    assert b"evalscript" in request
+
+
+@pytest.mark.parametrize("four_d", [False, True], ids=["3d", "4d"])
+@pytest.mark.parametrize("cached", [False, True], ids=["uncached", "cached"])
+def test_open_and_compute(benchmark, sentinel_hub, four_d, cached):
+    cube_config = new_cube_config("small", four_d=four_d)
+
+    def open_and_compute():
+        store = SentinelHubChunkStore(sentinel_hub, cube_config)
+        if cached:
+            store = zarr.LRUStoreCache(store, max_size=2**30)
+        cube = xr.open_zarr(store)
+        # Read everything twice, the second pass benefits from the cache
+        cube.compute()
+        return cube.compute()
+
+    cube = benchmark.pedantic(open_and_compute, rounds=3)
+    assert cube.sizes["time"] == NUM_SMALL_TIME_STEPS
+
+
+@pytest.mark.parametrize("latency", [0.01, 0.05])
+def test_compute_with_latency(benchmark, server, sentinel_hub, latency):
+    server.latency = latency
+    store = SentinelHubChunkStore(sentinel_hub, new_cube_config("small"))
+    cube = xr.open_zarr(store)
+    result = benchmark.pedantic(cube.compute, rounds=3)
+    assert result.sizes["time"] == NUM_SMALL_TIME_STEPS
+
+
+@pytest.mark.parametrize(
+    "error_rate, throttle_rate", [(0.1, 0.0), (0.0, 0.2)], ids=["errors", "throttled"]
+)
+def test_compute_with_errors(
+    benchmark, server, sentinel_hub, error_rate, throttle_rate
+):
+    server.error_rate = error_rate
+    server.throttle_rate = throttle_rate
+    store = SentinelHubChunkStore(sentinel_hub, new_cube_config("small"))
+    cube = xr.open_zarr(store)
+    result = benchmark.pedantic(cube.compute, rounds=3)
+    assert result.sizes["time"] == NUM_SMALL_TIME_STEPS
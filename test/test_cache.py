@@ -0,0 +1,343 @@
+# Copyright © 2022-2024 by the xcube development team and contributors
+# Permissions are hereby granted under the terms of the MIT License:
+# https://opensource.org/licenses/MIT.
+
+import os
+import pickle
+import shutil
+import tempfile
+import time
+import unittest
+
+import pandas as pd
+import zarr
+import shapely.geometry
+
+from xcube_sh.cache import CatalogCache
+from xcube_sh.cache import ConcurrentLRUStoreCache
+from xcube_sh.cache import CubeManifestCache
+from xcube_sh.cache import DiskChunkCache
+from xcube_sh.config import CubeConfig
+from xcube_sh.manifest import CubeManifest
+
+
+class DiskChunkCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.cache_dir = tempfile.mkdtemp(prefix="xcube-sh-cache-")
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def test_get_put(self):
+        cache = DiskChunkCache(self.cache_dir)
+        self.assertIsNone(cache.get("ab01"))
+        cache.put("ab01", b"0123456789")
+        self.assertEqual(b"0123456789", cache.get("ab01"))
+        self.assertEqual(10, cache.size)
+        self.assertTrue(
+            os.path.isfile(os.path.join(self.cache_dir, "ab", "ab01.chunk"))
+        )
+
+    def test_persistent(self):
+        DiskChunkCache(self.cache_dir).put("ab01", b"0123456789")
+        cache = DiskChunkCache(self.cache_dir)
+        self.assertEqual(10, cache.size)
+        self.assertEqual(b"0123456789", cache.get("ab01"))
+
+    def test_lru_eviction(self):
+        cache = DiskChunkCache(self.cache_dir, max_size=25)
+        cache.put("ab01", 10 * b"1")
+        self._set_mtime("ab01", time.time() - 30)
+        cache.put("ab02", 10 * b"2")
+        self._set_mtime("ab02", time.time() - 20)
+        # Access makes "ab01" the most recently used chunk
+        self.assertIsNotNone(cache.get("ab01"))
+        cache.put("cd03", 10 * b"3")
+        self.assertEqual(20, cache.size)
+        self.assertIsNone(cache.get("ab02"))
+        self.assertEqual(10 * b"1", cache.get("ab01"))
+        self.assertEqual(10 * b"3", cache.get("cd03"))
+
+    def test_overwrite(self):
+        cache = DiskChunkCache(self.cache_dir, max_size=30)
+        cache.put("ab01", 10 * b"1")
+        cache.put("ab02", 10 * b"2")
+        cache.put("ab02", 5 * b"3")
+        self.assertEqual(15, cache.size)
+        cache.put("ab02", 10 * b"4")
+        cache.put("ab02", 20 * b"5")
+        self.assertEqual(30, cache.size)
+        # Nothing is evicted
+        self.assertEqual(10 * b"1", cache.get("ab01"))
+        self.assertEqual(20 * b"5", cache.get("ab02"))
+
+    def test_clear(self):
+        cache = DiskChunkCache(self.cache_dir)
+        cache.put("ab01", b"0123456789")
+        cache.clear()
+        self.assertEqual(0, cache.size)
+        self.assertIsNone(cache.get("ab01"))
+
+    def test_no_temporary_files_left(self):
+        cache = DiskChunkCache(self.cache_dir)
+        cache.put("ab01", b"0123456789")
+        self.assertEqual(["ab01.chunk"], os.listdir(os.path.join(self.cache_dir, "ab")))
+
+    def test_pickle(self):
+        cache = DiskChunkCache(self.cache_dir, max_size=100)
+        cache.put("ab01", b"0123456789")
+        cache = pickle.loads(pickle.dumps(cache))
+        self.assertEqual(100, cache.max_size)
+        self.assertEqual(b"0123456789", cache.get("ab01"))
+
+    def _set_mtime(self, fingerprint: str, mtime: float):
+        path = os.path.join(self.cache_dir, fingerprint[:2], fingerprint + ".chunk")
+        os.utime(path, (mtime, mtime))
+
+
+CATALOG_URL = "https://services.sentinel-hub.com/api/v1/catalog/1.0.0"
+
+
+def new_feature(datetime: str, bbox):
+    x1, y1, x2, y2 = bbox
+    return dict(
+        id=f"{datetime}-{bbox}",
+        geometry=dict(
+            type="Polygon",
+            coordinates=[[[x1, y1], [x2, y1], [x2, y2], [x1, y2], [x1, y1]]],
+        ),
+        properties=dict(datetime=datetime),
+    )
+
+
+class GetItemsRecordingStore(zarr.storage.KVStore):
+    def __init__(self, mapping):
+        super().__init__(mapping)
+        self.getitems_calls = []
+
+    def getitems(self, keys, *, contexts):
+        self.getitems_calls.append(list(keys))
+        return super().getitems(keys, contexts=contexts)
+
+
+class ConcurrentLRUStoreCacheTest(unittest.TestCase):
+    def test_getitems(self):
+        store = GetItemsRecordingStore({"a": b"1", "b": b"2", "c": b"3"})
+        cache = ConcurrentLRUStoreCache(store, max_size=2**20)
+        self.assertEqual(b"1", cache["a"])
+
+        items = cache.getitems(["a", "b", "c", "d"], contexts={})
+
+        self.assertEqual({"a": b"1", "b": b"2", "c": b"3"}, items)
+        # Misses are read in a single batch, missing items are omitted
+        self.assertEqual([["b", "c", "d"]], store.getitems_calls)
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(4, cache.misses)
+        self.assertEqual(
+            {"a": b"1", "b": b"2"}, cache.getitems(["a", "b"], contexts={})
+        )
+        self.assertEqual(1, len(store.getitems_calls))
+
+
+class CatalogCacheTest(unittest.TestCase):
+    features = [
+        new_feature("2020-01-01T10:00:00Z", [10.0, 50.0, 11.0, 51.0]),
+        new_feature("2020-01-01T10:00:00Z", [11.0, 50.0, 12.0, 51.0]),
+        new_feature("2020-01-03T10:00:00Z", [10.0, 50.0, 11.0, 51.0]),
+        new_feature("2020-01-05T10:00:00Z", [11.0, 50.0, 12.0, 51.0]),
+    ]
+    time_range = (pd.Timestamp("2020-01-01", tz="UTC"), pd.Timestamp("2020-01-06"))
+
+    def setUp(self) -> None:
+        self.cache_dir = tempfile.mkdtemp(prefix="xcube-sh-cache-")
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def new_cache(self, **kwargs) -> CatalogCache:
+        cache = CatalogCache(**kwargs)
+        cache.put(
+            CATALOG_URL,
+            "sentinel-2-l2a",
+            (10, 50, 12, 51),
+            self.time_range,
+            self.features,
+        )
+        return cache
+
+    def test_same_query(self):
+        cache = self.new_cache()
+        self.assertEqual(
+            self.features,
+            cache.get(CATALOG_URL, "sentinel-2-l2a", (10, 50, 12, 51), self.time_range),
+        )
+        self.assertIsNone(
+            cache.get(CATALOG_URL, "sentinel-2-l1c", (10, 50, 12, 51), self.time_range)
+        )
+
+    def test_contained_query(self):
+        cache = self.new_cache()
+        self.assertEqual(
+            [self.features[1], self.features[3]],
+            cache.get(
+                CATALOG_URL, "sentinel-2-l2a", (11.5, 50.5, 12, 51), self.time_range
+            ),
+        )
+        self.assertEqual(
+            [self.features[2]],
+            cache.get(
+                CATALOG_URL,
+                "sentinel-2-l2a",
+                (10, 50, 10.5, 51),
+                ("2020-01-02", "2020-01-04"),
+            ),
+        )
+
+    def test_not_contained_query(self):
+        cache = self.new_cache()
+        for bbox, time_range in [
+            ((9, 50, 12, 51), self.time_range),
+            (None, self.time_range),
+            ((10, 50, 12, 51), ("2019-12-31", "2020-01-06")),
+            ((10, 50, 12, 51), ("2020-01-01", None)),
+        ]:
+            self.assertIsNone(
+                cache.get(CATALOG_URL, "sentinel-2-l2a", bbox, time_range)
+            )
+
+    def test_contained_query_filters_geometries(self):
+        # The bbox of the triangle, but not the triangle,
+        # intersects the upper left corner
+        triangle = shapely.geometry.Polygon([(10, 50), (12, 50), (12, 51)])
+        features = [
+            dict(
+                id="triangle",
+                geometry=shapely.geometry.mapping(triangle),
+                properties=dict(datetime="2020-01-01T10:00:00Z"),
+            )
+        ]
+        cache = CatalogCache()
+        cache.put(
+            CATALOG_URL, "sentinel-2-l2a", (10, 50, 12, 51), self.time_range, features
+        )
+        self.assertEqual(
+            [],
+            cache.get(
+                CATALOG_URL, "sentinel-2-l2a", (10, 50.8, 10.2, 51), self.time_range
+            ),
+        )
+        self.assertEqual(
+            features,
+            cache.get(
+                CATALOG_URL, "sentinel-2-l2a", (11.8, 50, 12, 50.2), self.time_range
+            ),
+        )
+
+    def test_cannot_filter_without_feature_geometry(self):
+        cache = CatalogCache()
+        features = [dict(properties=dict(datetime="2020-01-01T10:00:00Z"))]
+        cache.put(CATALOG_URL, "byoc", (10, 50, 12, 51), self.time_range, features)
+        self.assertIsNone(
+            cache.get(CATALOG_URL, "byoc", (10, 50, 11, 51), self.time_range)
+        )
+        self.assertEqual(
+            features,
+            cache.get(
+                CATALOG_URL, "byoc", (10, 50, 12, 51), ("2020-01-01", "2020-01-02")
+            ),
+        )
+
+    def test_ttl(self):
+        cache = self.new_cache(ttl=0.1)
+        self.assertIsNotNone(
+            cache.get(CATALOG_URL, "sentinel-2-l2a", (10, 50, 12, 51), self.time_range)
+        )
+        time.sleep(0.2)
+        self.assertIsNone(
+            cache.get(CATALOG_URL, "sentinel-2-l2a", (10, 50, 12, 51), self.time_range)
+        )
+
+    def test_persistence(self):
+        self.new_cache(cache_dir=self.cache_dir)
+        self.assertEqual(1, len(os.listdir(self.cache_dir)))
+        cache = CatalogCache(cache_dir=self.cache_dir)
+        self.assertEqual(
+            [self.features[0], self.features[2]],
+            cache.get(
+                CATALOG_URL, "sentinel-2-l2a", (10, 50, 10.5, 51), self.time_range
+            ),
+        )
+        cache = pickle.loads(pickle.dumps(cache))
+        self.assertEqual(self.cache_dir, cache.cache_dir)
+        self.assertIsNotNone(
+            cache.get(CATALOG_URL, "sentinel-2-l2a", (10, 50, 12, 51), self.time_range)
+        )
+        cache.clear()
+        self.assertEqual([], os.listdir(self.cache_dir))
+
+    def test_expired_files_are_removed(self):
+        self.new_cache(cache_dir=self.cache_dir)
+        time.sleep(0.2)
+        cache = CatalogCache(ttl=0.1, cache_dir=self.cache_dir)
+        self.assertIsNone(
+            cache.get(CATALOG_URL, "sentinel-2-l2a", (10, 50, 12, 51), self.time_range)
+        )
+        self.assertEqual([], os.listdir(self.cache_dir))
+
+
+class CubeManifestCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.cache_dir = tempfile.mkdtemp(prefix="xcube-sh-manifests-")
+        cube_config = CubeConfig(
+            dataset_name="S2L2A",
+            band_names=["B04"],
+            bbox=(10.2, 53.5, 10.3, 53.6),
+            spatial_res=0.1 / 4000,
+            time_range=("2017-08-01", "2017-08-02"),
+        )
+        self.manifest = CubeManifest(
+            CubeManifest.new_key(cube_config),
+            cube_config,
+            1,
+            [
+                (
+                    pd.Timestamp("2017-08-01T10:00:00Z"),
+                    pd.Timestamp("2017-08-01T10:00:00Z"),
+                )
+            ],
+            {"B04": (1, 4, 4)},
+            {"zarr_consolidated_format": 1, "metadata": {}},
+            {"lon/0": b"\x00\x01\x02"},
+        )
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def test_get_put(self):
+        cache = CubeManifestCache(self.cache_dir)
+        self.assertIsNone(cache.get(self.manifest.key))
+        cache.put(self.manifest)
+        manifest = CubeManifestCache(self.cache_dir).get(self.manifest.key)
+        self.assertIsNotNone(manifest)
+        self.assertEqual(self.manifest.to_dict(), manifest.to_dict())
+        self.assertEqual(self.manifest.time_ranges, manifest.time_ranges)
+        self.assertEqual({"lon/0": b"\x00\x01\x02"}, manifest.static_chunks)
+
+    def test_ttl(self):
+        cache = CubeManifestCache(self.cache_dir, ttl=60)
+        self.manifest.created = time.time() - 120
+        cache.put(self.manifest)
+        self.assertIsNone(cache.get(self.manifest.key))
+        self.assertEqual([], os.listdir(self.cache_dir))
+
+    def test_invalid_manifest(self):
+        cache = CubeManifestCache(self.cache_dir)
+        with open(os.path.join(self.cache_dir, "abc.manifest"), "w") as fp:
+            fp.write('{"manifest_version": 0}')
+        self.assertIsNone(cache.get("abc"))
+
+    def test_clear(self):
+        cache = CubeManifestCache(self.cache_dir)
+        cache.put(self.manifest)
+        cache.clear()
+        self.assertIsNone(cache.get(self.manifest.key))
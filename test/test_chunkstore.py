@@ -2,12 +2,17 @@
 # Permissions are hereby granted under the terms of the MIT License:
 # https://opensource.org/licenses/MIT.
 
+import json
+import re
+import shutil
+import tempfile
 import unittest
 import zlib
 from abc import ABCMeta
 from abc import abstractmethod
 from collections import namedtuple
 from typing import Tuple, List, Dict, Any
+from unittest.mock import patch
 
 import numpy as np
 import pandas as pd
@@ -15,8 +20,10 @@ import pyproj
 import xarray as xr
 import zarr
 
+from xcube_sh.cache import DiskChunkCache
 from xcube_sh.chunkstore import SentinelHubChunkStore
 from xcube_sh.config import CubeConfig
+from xcube_sh.manifest import CubeManifest
 from xcube_sh.metadata import S2_BAND_NAMES
 from xcube_sh.metadata import SentinelHubMetadata
 
@@ -100,6 +107,106 @@ class SentinelHubStore3DTest(SentinelHubStoreTest):
         cube = xr.open_zarr(store_cache)
         self.assert_3d_cube_is_valid(cube)
 
+    def test_chunk_keys_are_virtual(self):
+        num_chunks = 3 * 31 * 4 * 4
+        self.assertLess(len(self.store._vfs), 30)
+        self.assertEqual(len(self.store._vfs) + num_chunks, len(self.store))
+        keys = set(self.store.keys())
+        self.assertEqual(len(self.store), len(keys))
+        self.assertIn("B01/.zarray", keys)
+        self.assertIn("B12/30.3.3", keys)
+
+    def test_consolidated_metadata(self):
+        consolidated = json.loads(self.store[".zmetadata"])
+        metadata = consolidated["metadata"]
+        self.assertEqual(1, consolidated["zarr_consolidated_format"])
+        self.assertEqual(
+            {".zgroup", ".zattrs", "B01/.zarray", "B01/.zattrs", "lon/.zarray"},
+            {".zgroup", ".zattrs", "B01/.zarray", "B01/.zattrs", "lon/.zarray"}
+            & set(metadata),
+        )
+        # Only groups and arrays, but no chunks
+        self.assertEqual(2 + 2 * 7, len(metadata))
+        for key, value in metadata.items():
+            self.assertEqual(value, json.loads(self.store[key]), msg=key)
+
+    def test_invalid_chunk_keys(self):
+        for key in (
+            "B01/31.0.0",
+            "B01/0.4.0",
+            "B01/0.0",
+            "B01/0.0.0.0",
+            "B01/00.0.0",
+            "B01/-1.0.0",
+            "B01/x.0.0",
+            "B02/0.0.0",
+            "0.0.0",
+        ):
+            self.assertNotIn(key, self.store)
+            with self.assertRaises(KeyError):
+                # noinspection PyStatementEffect
+                self.store[key]
+        self.assertEqual({}, self.store.getitems(["B01/31.0.0"], contexts={}))
+        self.assertEqual({}, self.observed_kwargs)
+
+    def test_listdir(self):
+        self.assertIn("B01", self.store.listdir(""))
+        self.assertIn(".zmetadata", self.store.listdir(""))
+        names = self.store.listdir("B01")
+        self.assertIn(".zarray", names)
+        self.assertIn(".zattrs", names)
+        self.assertIn("30.3.3", names)
+        self.assertEqual(2 + 31 * 4 * 4, len(names))
+        self.assertEqual([".zarray", ".zattrs", "0"], self.store.listdir("time"))
+        self.assertEqual([], self.store.listdir("B02"))
+        self.assertEqual([], self.store.listdir("B01/.zarray"))
+        self.assertEqual(
+            [".zgroup", ".zattrs", "lon", "lat", "time", "time_bnds"],
+            self.store.listdir("")[:6],
+        )
+
+    def test_getitems(self):
+        keys = ["B01/.zarray", *(f"B01/{i}.1.3" for i in range(31))]
+        items = self.store.getitems(keys, contexts={})
+        self.assertEqual(set(keys), set(items.keys()))
+        self.assertIsInstance(items["B01/.zarray"], bytes)
+        self.assertEqual(31, len(self.observed_kwargs))
+
+    def test_getitems_used_by_zarr(self):
+        group = zarr.open_group(self.store, mode="r")
+        values = group["B12"][:, 1500, 3500]
+        self.assertEqual((31,), values.shape)
+        self.assertEqual(31, len(self.observed_kwargs))
+
+    def test_getitems_fetches_bands_of_same_tile_at_once(self):
+        sentinel_hub = self.store._sentinel_hub
+        keys = ["B01/2.1.3", "B08/2.1.3", "B12/2.1.3", "B01/3.1.3"]
+        items = self.store.getitems(keys, contexts={})
+        self.assertEqual(set(keys), set(items.keys()))
+        self.assertEqual(4, len(self.observed_kwargs))
+        self.assertEqual(2, len(sentinel_hub.requests))
+        self.assertEqual(
+            ["return [sample.B01, sample.B08, sample.B12];", "return [sample.B01];"],
+            sorted(
+                re.search(r"return \[.*];", request["evalscript"]).group(0)
+                for request in sentinel_hub.requests
+            ),
+        )
+        for band_index, band_name in enumerate(("B01", "B08", "B12")):
+            values = np.frombuffer(
+                zlib.decompress(items[f"{band_name}/2.1.3"]), dtype=np.float32
+            )
+            self.assertEqual((1000 * 1000,), values.shape)
+            self.assertEqual(band_index, values.min())
+            self.assertEqual(band_index, values.max())
+
+    def test_request_templates_are_reused(self):
+        self.store.getitems([f"B01/{i}.1.3" for i in range(4)], contexts={})
+        self.store.getitems([f"B08/{i}.0.0" for i in range(4)], contexts={})
+        self.assertEqual(
+            {("B01",), ("B08",)}, set(self.store._request_templates.keys())
+        )
+
     def assert_3d_cube_is_valid(self, cube):
         cube_config = self.cube_config
 
@@ -207,6 +314,236 @@ class SentinelHubStore3DTest(SentinelHubStoreTest):
         )
 
 
+class SentinelHubStore3DTestWithCoalescedBands(SentinelHubStoreTest):
+    def setUp(self) -> None:
+        self.observed_kwargs = dict()
+        self.cube_config = self.get_cube_config()
+        self.sentinel_hub = SentinelHubMock(self.cube_config)
+        # noinspection PyTypeChecker
+        self.store = SentinelHubChunkStore(
+            self.sentinel_hub,
+            self.cube_config,
+            observer=self.observe_store,
+            coalesce_bands=True,
+        )
+
+    def get_cube_config(self):
+        return CubeConfig(
+            dataset_name="S2L1C",
+            band_names=["B01", "B08", "B12"],
+            bbox=(10.2, 53.5, 10.3, 53.6),
+            spatial_res=0.1 / 4000,
+            time_range=("2017-08-01", "2017-08-31"),
+            time_period="1D",
+            four_d=False,
+        )
+
+    def test_bands_are_fetched_once_per_tile(self):
+        cube = xr.open_zarr(self.store)
+        values = cube[["B01", "B08", "B12"]].isel(time=2).compute()
+        for band_index, band_name in enumerate(("B01", "B08", "B12")):
+            self.assertEqual((4000, 4000), values[band_name].shape)
+            self.assertEqual(band_index, int(values[band_name].fillna(0).min()))
+            self.assertEqual(band_index, int(values[band_name].fillna(0).max()))
+
+        self.assertEqual(3 * 16, len(self.observed_kwargs))
+        self.assertEqual(16, len(self.sentinel_hub.requests))
+        for request in self.sentinel_hub.requests:
+            self.assertIn(
+                "return [sample.B01, sample.B08, sample.B12];",
+                request["evalscript"],
+            )
+
+    def test_chunk_is_refetched_once_served(self):
+        chunk_1 = self.store["B08/2.1.3"]
+        chunk_2 = self.store["B08/2.1.3"]
+        self.assertEqual(chunk_1, chunk_2)
+        self.assertEqual(2, len(self.sentinel_hub.requests))
+        self.store["B01/2.1.3"]
+        self.store["B12/2.1.3"]
+        self.assertEqual(2, len(self.sentinel_hub.requests))
+
+    def test_single_band_is_not_coalesced(self):
+        cube_config = CubeConfig.from_dict(
+            {**self.cube_config.to_dict(), "band_names": ["B01"]}
+        )
+        sentinel_hub = SentinelHubMock(cube_config)
+        # noinspection PyTypeChecker
+        store = SentinelHubChunkStore(sentinel_hub, cube_config, coalesce_bands=True)
+        store["B01/2.1.3"]
+        self.assertEqual(1, len(sentinel_hub.requests))
+        self.assertIn("return [sample.B01];", sentinel_hub.requests[0]["evalscript"])
+
+
+class SentinelHubStore3DTestWithTimeChunks(SentinelHubStoreTest):
+    def setUp(self) -> None:
+        self.observed_kwargs = dict()
+        self.cube_config = self.get_cube_config()
+        self.sentinel_hub = SentinelHubMock(self.cube_config)
+        # noinspection PyTypeChecker
+        self.store = SentinelHubChunkStore(
+            self.sentinel_hub,
+            self.cube_config,
+            observer=self.observe_store,
+            time_chunk_size=5,
+        )
+
+    def get_cube_config(self):
+        return CubeConfig(
+            dataset_name="S2L1C",
+            band_names=["B01", "B08", "B12"],
+            bbox=(10.2, 53.5, 10.3, 53.6),
+            spatial_res=0.1 / 4000,
+            time_range=("2017-08-01", "2017-08-31"),
+            time_period="1D",
+            four_d=False,
+        )
+
+    def test_time_steps_are_fetched_once_per_chunk(self):
+        cube = xr.open_zarr(self.store)
+        self.assertEqual(((5,) * 6 + (1,), (1000,) * 4, (1000,) * 4), cube.B01.chunks)
+        values = zarr.open_group(self.store, mode="r")["B01"][:, 1500, 3500]
+        self.assertEqual((31,), values.shape)
+        # Each time step's values are its index within the request
+        np.testing.assert_equal(values, [*range(5)] * 6 + [0])
+
+        self.assertEqual(7, len(self.observed_kwargs))
+        self.assertEqual(7, len(self.sentinel_hub.requests))
+        for request in self.sentinel_hub.requests:
+            self.assertIn("mosaicking: 'TILE'", request["evalscript"])
+        time_range = self.sentinel_hub.requests[0]["input"]["data"][0]["dataFilter"][
+            "timeRange"
+        ]
+        self.assertEqual(
+            {"from": "2017-08-01T00:00:00+00:00", "to": "2017-08-06T00:00:00+00:00"},
+            time_range,
+        )
+
+    def test_bands_of_time_chunk_are_fetched_at_once(self):
+        items = self.store.getitems(["B01/6.1.3", "B08/6.1.3"], contexts={})
+        self.assertEqual(1, len(self.sentinel_hub.requests))
+        for band_index, band_name in enumerate(("B01", "B08")):
+            values = np.frombuffer(
+                zlib.decompress(items[f"{band_name}/6.1.3"]), dtype=np.float32
+            ).reshape((5, 1000, 1000))
+            self.assertEqual(band_index, values[0].min())
+            self.assertEqual(band_index, values[0].max())
+            # Time steps beyond the cube's end are filled
+            fill_value = self.store.get_band_encoding(band_name)["fill_value"]
+            np.testing.assert_equal(values[1:5, 0, 0], [fill_value] * 4)
+
+    def test_invalid_time_chunk_size(self):
+        with self.assertRaises(ValueError):
+            # noinspection PyTypeChecker
+            SentinelHubChunkStore(
+                self.sentinel_hub, self.cube_config, time_chunk_size=0
+            )
+
+
+class SentinelHubStore3DTestWithDiskCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.cache_dir = tempfile.mkdtemp(prefix="xcube-sh-cache-")
+        self.cube_config = CubeConfig(
+            dataset_name="S2L1C",
+            band_names=["B01", "B08", "B12"],
+            bbox=(10.2, 53.5, 10.3, 53.6),
+            spatial_res=0.1 / 4000,
+            time_range=("2017-08-01", "2017-08-31"),
+            time_period="1D",
+        )
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def new_store(self):
+        sentinel_hub = SentinelHubMock(self.cube_config)
+        # noinspection PyTypeChecker
+        store = SentinelHubChunkStore(
+            sentinel_hub,
+            self.cube_config,
+            chunk_cache=DiskChunkCache(self.cache_dir),
+        )
+        return store, sentinel_hub
+
+    def test_chunks_are_reused(self):
+        store, sentinel_hub = self.new_store()
+        chunk = store["B01/2.1.3"]
+        store["B08/2.1.3"]
+        self.assertEqual(2, len(sentinel_hub.requests))
+
+        store, sentinel_hub = self.new_store()
+        self.assertEqual(chunk, store["B01/2.1.3"])
+        store["B08/2.1.3"]
+        self.assertEqual(0, len(sentinel_hub.requests))
+        store["B12/2.1.3"]
+        store["B01/3.1.3"]
+        self.assertEqual(2, len(sentinel_hub.requests))
+
+
+class SentinelHubStore3DTestWithManifest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.cube_config = CubeConfig(
+            dataset_name="S2L1C",
+            band_names=None,
+            bbox=(10.2, 53.5, 10.3, 53.6),
+            spatial_res=0.1 / 4000,
+            time_range=("2017-08-01", "2017-08-31"),
+            time_period=None,
+        )
+
+    def new_store(self, **kwargs):
+        sentinel_hub = SentinelHubMock(self.cube_config)
+        # noinspection PyTypeChecker
+        return SentinelHubChunkStore(sentinel_hub, self.cube_config, **kwargs)
+
+    def test_reopen(self):
+        store = self.new_store()
+        manifest = store.get_manifest()
+        self.assertEqual(CubeManifest.new_key(self.cube_config), manifest.key)
+        self.assertEqual(S2_BAND_NAMES, list(manifest.cube_config.band_names))
+
+        # Must be JSON-serializable
+        manifest = CubeManifest.from_dict(json.loads(json.dumps(manifest.to_dict())))
+
+        with patch.object(
+            SentinelHubMock, "get_features"
+        ) as get_features, patch.object(SentinelHubMock, "bands") as bands:
+            reopened_store = self.new_store(manifest=manifest)
+            get_features.assert_not_called()
+            bands.assert_not_called()
+
+        self.assertEqual(
+            store.cube_config.to_dict(), reopened_store.cube_config.to_dict()
+        )
+        self.assertEqual(store.time_ranges, reopened_store.time_ranges)
+        self.assertEqual(sorted(store.keys()), sorted(reopened_store.keys()))
+        self.assertEqual(store.listdir(), reopened_store.listdir())
+        self.assertEqual(store.listdir("B01"), reopened_store.listdir("B01"))
+        for key in store.keys():
+            if not key.startswith(tuple(S2_BAND_NAMES)) or key.endswith(
+                (".zarray", ".zattrs")
+            ):
+                self.assertEqual(store[key], reopened_store[key], msg=key)
+
+        cube = xr.open_zarr(store)
+        reopened_cube = xr.open_zarr(reopened_store)
+        xr.testing.assert_identical(cube.time, reopened_cube.time)
+        xr.testing.assert_identical(
+            cube.B01.isel(time=2, lat=slice(0, 4), lon=slice(0, 4)),
+            reopened_cube.B01.isel(time=2, lat=slice(0, 4), lon=slice(0, 4)),
+        )
+
+    def test_manifest_must_match(self):
+        manifest = self.new_store().get_manifest()
+        with self.assertRaises(ValueError):
+            self.new_store(manifest=manifest, time_chunk_size=2)
+        self.cube_config = CubeConfig.from_dict(
+            {**self.cube_config.to_dict(), "tile_size": (500, 500)}
+        )
+        with self.assertRaises(ValueError):
+            self.new_store(manifest=manifest)
+
+
 class SentinelHubStore3DTestWithAllBands(SentinelHubStoreTest):
     def get_cube_config(self):
         return CubeConfig(
@@ -560,10 +897,17 @@ MockResponse = namedtuple("Response", ["ok", "status_code", "headers", "content"
 class SentinelHubMock:
     METADATA = SentinelHubMetadata()
 
+    max_concurrent_requests = 4
+    process_url = "https://services.sentinel-hub.com/api/v1/process"
+
     def __init__(self, config: CubeConfig):
         self._config = config
         self._requests = []
 
+    @property
+    def requests(self) -> List[Dict[str, Any]]:
+        return self._requests
+
     def band_names(self, dataset_name: str, collection_id=None):
         return S2_BAND_NAMES
 
@@ -597,20 +941,27 @@ class SentinelHubMock:
     # noinspection PyUnusedLocal
     def get_data(self, request, mime_type=None):
         """
-        Return zlib (level 8) compressed float32 zeros.
+        Return zlib (level 8) compressed float32 band indexes.
         """
+        if isinstance(request, bytes):
+            request = json.loads(request)
         self._requests.append(request)
 
         chunk_width, chunk_height = self._config.tile_size
-        num_bands = len(self._config.band_names)
+        num_bands = int(
+            re.search(r"output: \[\s*{bands: (\d+)", request["evalscript"]).group(1)
+        )
 
-        if self._config.four_d:
+        if self._config.four_d or num_bands > 1:
             chunk_shape = chunk_height, chunk_width, num_bands
         else:
             chunk_shape = chunk_height, chunk_width
 
-        zero_chunk_array = np.zeros(chunk_shape, dtype=np.float32)
-        content = zlib.compress(bytes(zero_chunk_array), level=8)
+        # Each band's values are the band's index within the request
+        chunk_array = np.zeros(chunk_shape, dtype=np.float32)
+        if len(chunk_shape) == 3:
+            chunk_array[...] = np.arange(num_bands, dtype=np.float32)
+        content = zlib.compress(bytes(chunk_array), level=8)
 
         headers = {
             "SH-Width": chunk_width,
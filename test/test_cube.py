@@ -3,16 +3,28 @@
 # https://opensource.org/licenses/MIT.
 
 import collections.abc
+import os
+import shutil
+import tempfile
+import threading
+import time
 import unittest
+from unittest import mock
 
 import numpy as np
 import xarray as xr
+import zarr
 
+from test.test_chunkstore import SentinelHubMock
 from test.test_sentinelhub import HAS_SH_CREDENTIALS
 from test.test_sentinelhub import REQUIRE_SH_CREDENTIALS
 from xcube_sh.config import CubeConfig
+from xcube_sh.chunkstore import SentinelHubChunkStore
+from xcube_sh.cube import append_cube
 from xcube_sh.cube import open_cube
+from xcube_sh.emulator import SentinelHubEmulator
 from xcube_sh.sentinelhub import SentinelHub
+from xcube_sh.zarrwriter import ZarrWriter
 
 cube_config = CubeConfig(
     dataset_name="S2L1C",
@@ -232,3 +244,176 @@ class CubeWithCredentialsTest(unittest.TestCase):
     #     self.assertEqual({'lat', 'lon', 'time', 'time_bnds'}, set(cube_wgs84.coords))
     #     self.assertEqual({'x', 'y', 'time', 'time_bnds'}, set(cube.coords))
     #     self.assertEqual({'B03', 'B08', 'CLM', 'crs'}, set(cube.data_vars))
+
+
+class ConcurrencyCountingSentinelHubMock(SentinelHubMock):
+    def __init__(self, config: CubeConfig):
+        super().__init__(config)
+        self._lock = threading.Lock()
+        self._num_active = 0
+        self.max_num_active = 0
+
+    def get_data(self, request, mime_type=None):
+        with self._lock:
+            self._num_active += 1
+            self.max_num_active = max(self.max_num_active, self._num_active)
+        try:
+            time.sleep(0.02)
+            with self._lock:
+                return super().get_data(request, mime_type=mime_type)
+        finally:
+            with self._lock:
+                self._num_active -= 1
+
+
+class OpenCubeConcurrencyTest(unittest.TestCase):
+    def test_chunks_are_fetched_concurrently(self):
+        cube_config = CubeConfig(
+            dataset_name="S2L1C",
+            band_names=["B01"],
+            bbox=(10.2, 53.5, 10.3, 53.6),
+            spatial_res=0.1 / 4000,
+            tile_size=(1000, 1000),
+            time_range=("2017-08-01", "2017-08-08"),
+            time_period="1D",
+        )
+        sentinel_hub = ConcurrencyCountingSentinelHubMock(cube_config)
+        with mock.patch("xcube_sh.cube.xr.open_zarr", wraps=xr.open_zarr) as open_zarr:
+            # noinspection PyTypeChecker
+            open_cube(cube_config, sentinel_hub=sentinel_hub)
+        # The store, by default wrapped in an LRU cache
+        store, *_ = open_zarr.call_args.args
+        values = zarr.open_group(store, mode="r")["B01"][:, 1500, 3500]
+        self.assertEqual((8,), values.shape)
+        self.assertEqual(8, len(sentinel_hub.requests))
+        self.assertEqual(
+            sentinel_hub.max_concurrent_requests, sentinel_hub.max_num_active
+        )
+
+
+class AppendCubeTest(unittest.TestCase):
+    def setUp(self) -> None:
+        # The emulator does not use HTTPS
+        patcher = mock.patch.dict(os.environ, {"OAUTHLIB_INSECURE_TRANSPORT": "1"})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.emulator = SentinelHubEmulator(seed=0).start()
+        self.addCleanup(self.emulator.stop)
+        self.sentinel_hub = self.emulator.new_sentinel_hub()
+        self.addCleanup(self.sentinel_hub.close)
+        self.temp_dir = tempfile.mkdtemp(prefix="xcube-sh-append-")
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+
+    def write_cube(
+        self, name: str, time_range, time_chunk_size: int = 1, **kwargs
+    ) -> str:
+        path = os.path.join(self.temp_dir, name)
+        cube_config = CubeConfig(
+            dataset_name="S2L2A",
+            band_names=["B04"],
+            bbox=(10.2, 53.5, 10.21, 53.51),
+            spatial_res=0.1 / 4000,
+            tile_size=(200, 200),
+            time_range=time_range,
+            **kwargs,
+        )
+        store = SentinelHubChunkStore(
+            self.sentinel_hub, cube_config, time_chunk_size=time_chunk_size
+        )
+        ZarrWriter(path).copy_store(store)
+        return path
+
+    def assert_cubes_equal(self, expected_path: str, actual_path: str):
+        expected_cube = xr.open_zarr(expected_path)
+        actual_cube = xr.open_zarr(actual_path)
+        xr.testing.assert_equal(expected_cube, actual_cube)
+        self.assertEqual(
+            expected_cube.attrs["time_coverage_end"],
+            actual_cube.attrs["time_coverage_end"],
+        )
+
+    def test_append_catalog_time_stamps(self):
+        path = self.write_cube("cube.zarr", ("2017-08-01", "2017-08-10"))
+        self.assertEqual(5, xr.open_zarr(path).sizes["time"])
+        num_fetched = self.emulator.stats["process"]
+
+        num_appended = append_cube(
+            path, time_end="2017-08-20", sentinel_hub=self.sentinel_hub
+        )
+        self.assertEqual(5, num_appended)
+        # Only the new time slices are fetched, 2 x 2 tiles each
+        self.assertEqual(5 * 2 * 2, self.emulator.stats["process"] - num_fetched)
+        np.testing.assert_equal(
+            np.arange(1, 20, 2),
+            xr.open_zarr(path).time.dt.day.values,
+        )
+        expected_path = self.write_cube("expected.zarr", ("2017-08-01", "2017-08-20"))
+        self.assert_cubes_equal(expected_path, path)
+
+    def test_append_time_period_to_incomplete_time_chunk(self):
+        path = self.write_cube(
+            "cube.zarr",
+            ("2017-08-01", "2017-08-03"),
+            time_chunk_size=2,
+            time_period="1D",
+        )
+        self.assertEqual(3, xr.open_zarr(path).sizes["time"])
+
+        num_appended = append_cube(
+            path, time_end="2017-08-06", sentinel_hub=self.sentinel_hub
+        )
+        self.assertEqual(3, num_appended)
+        self.assertEqual((6, 400, 400), zarr.open_array(f"{path}/B04").shape)
+        expected_path = self.write_cube(
+            "expected.zarr",
+            ("2017-08-01", "2017-08-06"),
+            time_chunk_size=2,
+            time_period="1D",
+        )
+        self.assert_cubes_equal(expected_path, path)
+
+    def test_append_fractional_second_time_stamps(self):
+        get_features = self.sentinel_hub.get_features
+
+        def get_fractional_second_features(*args, **kwargs):
+            features = get_features(*args, **kwargs)
+            for feature in features:
+                properties = feature["properties"]
+                properties["datetime"] = properties["datetime"][:-1] + ".345Z"
+            return features
+
+        with mock.patch.object(
+            self.sentinel_hub,
+            "get_features",
+            side_effect=get_fractional_second_features,
+        ):
+            path = self.write_cube("cube.zarr", ("2017-08-01", "2017-08-10"))
+            num_appended = append_cube(
+                path, time_end="2017-08-14", sentinel_hub=self.sentinel_hub
+            )
+        self.assertEqual(2, num_appended)
+        np.testing.assert_equal(
+            np.arange(1, 14, 2), xr.open_zarr(path).time.dt.day.values
+        )
+
+    def test_append_nothing(self):
+        path = self.write_cube("cube.zarr", ("2017-08-01", "2017-08-10"))
+        num_fetched = self.emulator.stats["process"]
+
+        num_appended = append_cube(
+            path, time_end="2017-08-10", sentinel_hub=self.sentinel_hub
+        )
+        self.assertEqual(0, num_appended)
+        self.assertEqual(num_fetched, self.emulator.stats["process"])
+        self.assertEqual(5, xr.open_zarr(path).sizes["time"])
+
+    def test_append_requires_pass_through_cube(self):
+        path = self.write_cube("cube.zarr", ("2017-08-01", "2017-08-10"))
+        other_path = os.path.join(self.temp_dir, "other.zarr")
+        xr.open_zarr(path).to_zarr(other_path, encoding={"B04": {"compressor": None}})
+
+        with self.assertRaises(ValueError) as cm:
+            append_cube(
+                other_path, time_end="2017-08-20", sentinel_hub=self.sentinel_hub
+            )
+        self.assertIn("cannot append to array 'B04'", f"{cm.exception}")
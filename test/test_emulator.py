@@ -0,0 +1,143 @@
+# Copyright © 2022-2024 by the xcube development team and contributors
+# Permissions are hereby granted under the terms of the MIT License:
+# https://opensource.org/licenses/MIT.
+
+import os
+import unittest
+import zlib
+from unittest import mock
+
+import numpy as np
+
+from xcube_sh.config import CubeConfig
+from xcube_sh.cube import open_cube
+from xcube_sh.emulator import SentinelHubEmulator
+from xcube_sh.emulator import _main
+from xcube_sh.sentinelhub import SentinelHub
+
+SPATIAL_RES = 0.1 / 4000
+
+
+class SentinelHubEmulatorTest(unittest.TestCase):
+    def setUp(self) -> None:
+        # The emulator does not use HTTPS
+        patcher = mock.patch.dict(os.environ, {"OAUTHLIB_INSECURE_TRANSPORT": "1"})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.emulator = SentinelHubEmulator(seed=0).start()
+        self.sentinel_hub = self.emulator.new_sentinel_hub()
+
+    def tearDown(self) -> None:
+        self.sentinel_hub.close()
+        self.emulator.stop()
+
+    def test_configuration(self):
+        self.assertIn("S2L2A", self.sentinel_hub.dataset_names)
+        self.assertIn("B04", self.sentinel_hub.band_names("S2L2A"))
+        collection_ids = [c["id"] for c in self.sentinel_hub.collections()]
+        self.assertIn("sentinel-2-l2a", collection_ids)
+
+    def test_get_features(self):
+        features = self.sentinel_hub.get_features(
+            "sentinel-2-l2a",
+            bbox=(10.2, 53.5, 10.3, 53.6),
+            time_range=("2017-08-01T00:00:00Z", "2017-08-10T00:00:00Z"),
+        )
+        self.assertEqual(
+            [
+                "2017-08-01T10:00:00Z",
+                "2017-08-03T10:00:00Z",
+                "2017-08-05T10:00:00Z",
+                "2017-08-07T10:00:00Z",
+                "2017-08-09T10:00:00Z",
+            ],
+            [f["properties"]["datetime"] for f in features],
+        )
+
+    def test_get_data(self):
+        request = SentinelHub.new_data_request(
+            "S2L2A",
+            ["B04", "B08"],
+            (4, 3),
+            bbox=(10.2, 53.5, 10.3, 53.6),
+            time_range=("2017-08-01T00:00:00Z", "2017-08-02T00:00:00Z"),
+            band_sample_types="UINT16",
+        )
+        response = self.sentinel_hub.get_data(
+            request, mime_type="application/octet-stream"
+        )
+        self.assertTrue(response.ok)
+        array = np.frombuffer(zlib.decompress(response.content), dtype=np.uint16)
+        array = array.reshape((3, 4, 2))
+        np.testing.assert_equal(
+            array[:, :, 0], [[0, 1, 2, 3], [1, 2, 3, 4], [2, 3, 4, 5]]
+        )
+        np.testing.assert_equal(array[:, :, 1], array[:, :, 0] + 100)
+        self.assertEqual(1, self.emulator.stats["process"])
+
+    def test_open_cube(self):
+        cube_config = CubeConfig(
+            dataset_name="S2L2A",
+            band_names=["B04", "B08"],
+            bbox=(10.2, 53.5, 10.2 + 512 * SPATIAL_RES, 53.5 + 512 * SPATIAL_RES),
+            spatial_res=SPATIAL_RES,
+            tile_size=(256, 256),
+            time_range=("2017-08-01", "2017-08-04"),
+        )
+        cube = open_cube(cube_config, sentinel_hub=self.sentinel_hub)
+        self.assertEqual({"time": 2, "lat": 512, "lon": 512, "bnds": 2}, cube.sizes)
+        values = cube.B04.isel(time=1, lat=slice(0, 3), lon=slice(0, 3)).values
+        # Zero equals the fill value
+        np.testing.assert_equal(
+            values, [[np.nan, 1.0, 2.0], [1.0, 2.0, 3.0], [2.0, 3.0, 4.0]]
+        )
+        self.assertEqual(1, self.emulator.stats["process"])
+
+    def test_failures_are_retried(self):
+        self.emulator.error_rate = 0.2
+        self.emulator.throttle_rate = 0.2
+        request = SentinelHub.new_data_request(
+            "S2L2A",
+            ["B04"],
+            (16, 16),
+            bbox=(10.2, 53.5, 10.3, 53.6),
+            time_range=("2017-08-01T00:00:00Z", "2017-08-02T00:00:00Z"),
+        )
+        for _ in range(10):
+            response = self.sentinel_hub.get_data(request)
+            self.assertTrue(response.ok)
+        stats = self.emulator.stats
+        self.assertEqual(10, stats["process"])
+        self.assertGreater(stats.get("error", 0) + stats.get("throttled", 0), 0)
+
+    def test_expired_tokens_are_refreshed(self):
+        request = SentinelHub.new_data_request(
+            "S2L2A",
+            ["B04"],
+            (16, 16),
+            bbox=(10.2, 53.5, 10.3, 53.6),
+            time_range=("2017-08-01T00:00:00Z", "2017-08-02T00:00:00Z"),
+        )
+        self.assertTrue(self.sentinel_hub.get_data(request).ok)
+        num_tokens = self.emulator.stats["token"]
+        self.emulator.expire_tokens()
+        self.assertTrue(self.sentinel_hub.get_data(request).ok)
+        stats = self.emulator.stats
+        self.assertEqual(1, stats["unauthorized"])
+        self.assertEqual(num_tokens + 1, stats["token"])
+
+    def test_not_found(self):
+        response = self.sentinel_hub.session.get(f"{self.emulator.url}/api/v2/foo")
+        self.assertEqual(404, response.status_code)
+
+
+class EmulatorMainTest(unittest.TestCase):
+    @mock.patch("xcube_sh.emulator.SentinelHubEmulator")
+    def test_main(self, emulator_class):
+        _main(["--port", "0", "--throttle-rate", "0.5", "--retry-after", "2"])
+        _, kwargs = emulator_class.call_args
+        self.assertEqual(0, kwargs["port"])
+        self.assertEqual(0.5, kwargs["throttle_rate"])
+        self.assertEqual(2, kwargs["retry_after"])
+        emulator_class.return_value.serve_forever.assert_called_once()
+        emulator_class.return_value.stop.assert_called_once()
@@ -2,9 +2,202 @@
 # Permissions are hereby granted under the terms of the MIT License:
 # https://opensource.org/licenses/MIT.
 
+import datetime
+import json
+import os
+import shutil
+import tempfile
 import unittest
+from unittest import mock
+
+import numpy as np
+import xarray as xr
+from click.testing import CliRunner
+
+from xcube_sh.emulator import SentinelHubEmulator
+from xcube_sh.main import gen
+from xcube_sh.sentinelhub import SentinelHubError
 
 
 class MainTest(unittest.TestCase):
     def test_gen(self):
         pass
+
+
+class GenPassThroughTest(unittest.TestCase):
+    def setUp(self) -> None:
+        # The emulator does not use HTTPS
+        patcher = mock.patch.dict(os.environ, {"OAUTHLIB_INSECURE_TRANSPORT": "1"})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.emulator = SentinelHubEmulator(seed=0).start()
+        self.addCleanup(self.emulator.stop)
+        self.temp_dir = tempfile.mkdtemp(prefix="xcube-sh-gen-")
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+        self.request_path = os.path.join(self.temp_dir, "request.json")
+        self.output_path = os.path.join(self.temp_dir, "out.zarr")
+        self.write_request()
+
+    def write_request(self, error_policy: str = "fail", **cube_config_updates):
+        cube_config = dict(
+            dataset_name="S2L2A",
+            band_names=["B04", "B08"],
+            bbox=[10.2, 53.5, 10.21, 53.51],
+            spatial_res=0.1 / 4000,
+            tile_size=[200, 200],
+            time_range=["2017-08-01", "2017-08-03"],
+            time_period="1D",
+        )
+        cube_config.update(cube_config_updates)
+        with open(self.request_path, "w") as fp:
+            json.dump(
+                dict(
+                    input_config=dict(
+                        client_id="xcube-sh",
+                        client_secret="xcube-sh",
+                        instance_url=self.emulator.url,
+                        oauth2_url=f"{self.emulator.url}/oauth",
+                        num_retries=1,
+                        retry_backoff_max=1,
+                        error_policy=error_policy,
+                    ),
+                    cube_config=cube_config,
+                ),
+                fp,
+            )
+
+    def test_pass_through(self):
+        result = CliRunner().invoke(
+            gen, [self.request_path, "-o", self.output_path, "--pass-through"]
+        )
+        self.assertEqual(0, result.exit_code, msg=result.output)
+        # 3 time steps, 2 x 2 tiles, both bands fetched at once
+        self.assertEqual(3 * 2 * 2, self.emulator.stats["process"])
+        cube = xr.open_zarr(self.output_path)
+        self.assertEqual({"time": 3, "lat": 400, "lon": 400, "bnds": 2}, cube.sizes)
+        # Zero equals the fill value
+        np.testing.assert_equal(
+            cube.B04.isel(time=0, lat=slice(0, 2), lon=slice(0, 2)).values,
+            [[np.nan, 1.0], [1.0, 2.0]],
+        )
+
+    def test_pass_through_requires_local_path(self):
+        result = CliRunner().invoke(
+            gen, [self.request_path, "-o", "s3://bucket/out.zarr", "--pass-through"]
+        )
+        self.assertEqual(1, result.exit_code)
+        self.assertIn("require a local output path", result.output)
+
+    def test_resume(self):
+        checkpoint_path = os.path.join(self.output_path, ".xcube-sh-checkpoint")
+        self.emulator.error_rate = 0.5
+        result = CliRunner().invoke(
+            gen, [self.request_path, "-o", self.output_path, "--resume"]
+        )
+        self.assertEqual(1, result.exit_code, msg=result.output)
+        self.assertIsInstance(result.exception, SentinelHubError)
+        self.assertTrue(os.path.isfile(checkpoint_path))
+        num_written = self.count_written_chunks("B04")
+        self.assertEqual(num_written, self.count_written_chunks("B08"))
+        self.assertLess(num_written, 3 * 2 * 2)
+
+        # Only the missing chunks are fetched
+        num_fetched = self.emulator.stats.get("process", 0)
+        self.emulator.error_rate = 0.0
+        result = CliRunner().invoke(
+            gen, [self.request_path, "-o", self.output_path, "--resume"]
+        )
+        self.assertEqual(0, result.exit_code, msg=result.output)
+        self.assertIn("Resuming", result.output)
+        self.assertEqual(
+            3 * 2 * 2 - num_written, self.emulator.stats["process"] - num_fetched
+        )
+        self.assertFalse(os.path.exists(checkpoint_path))
+        self.assert_cube_is_complete()
+
+    def test_resume_after_failed_chunks(self):
+        self.write_request(error_policy="warn")
+        self.emulator.error_rate = 0.5
+        result = CliRunner().invoke(
+            gen, [self.request_path, "-o", self.output_path, "--resume"]
+        )
+        self.assertEqual(1, result.exit_code, msg=result.output)
+        self.assertIn("Run the command again", result.output)
+        num_errors = self.emulator.stats["error"]
+        self.assertEqual(3 * 2 * 2 - num_errors, self.count_written_chunks("B04"))
+
+        self.emulator.error_rate = 0.0
+        result = CliRunner().invoke(
+            gen, [self.request_path, "-o", self.output_path, "--resume"]
+        )
+        self.assertEqual(0, result.exit_code, msg=result.output)
+        self.assertEqual(3 * 2 * 2, self.emulator.stats["process"])
+        self.assert_cube_is_complete()
+
+    def count_written_chunks(self, band_name: str) -> int:
+        if not os.path.isdir(os.path.join(self.output_path, band_name)):
+            return 0
+        return len(
+            [
+                name
+                for name in os.listdir(os.path.join(self.output_path, band_name))
+                if not name.startswith(".")
+            ]
+        )
+
+    def assert_cube_is_complete(self):
+        cube = xr.open_zarr(self.output_path)
+        self.assertEqual({"time": 3, "lat": 400, "lon": 400, "bnds": 2}, cube.sizes)
+        # All chunks are present, only zeros equal the fill value
+        tile = np.add.outer(np.arange(200), np.arange(200)) % 100
+        self.assertEqual(
+            3 * 2 * 2 * np.count_nonzero(tile == 0),
+            np.count_nonzero(np.isnan(cube.B04.values)),
+        )
+
+    def test_resume_requires_same_config(self):
+        self.emulator.error_rate = 1.0
+        result = CliRunner().invoke(
+            gen, [self.request_path, "-o", self.output_path, "--resume"]
+        )
+        self.assertEqual(1, result.exit_code, msg=result.output)
+        self.write_request(time_tolerance="20min")
+        result = CliRunner().invoke(
+            gen, [self.request_path, "-o", self.output_path, "--resume"]
+        )
+        self.assertEqual(1, result.exit_code, msg=repr(result.exception))
+        self.assertIn("manifest does not match", result.output)
+
+    def test_resume_open_time_range_on_next_day(self):
+        self.write_request(time_range=["2017-08-01", None])
+        self.emulator.error_rate = 0.5
+        with mock.patch("xcube_sh.config.datetime") as mock_datetime:
+            mock_datetime.now.return_value = datetime.datetime(2017, 8, 3, 23, 0)
+            result = CliRunner().invoke(
+                gen, [self.request_path, "-o", self.output_path, "--resume"]
+            )
+        self.assertEqual(1, result.exit_code, msg=result.output)
+        num_written = self.count_written_chunks("B04")
+
+        num_fetched = self.emulator.stats.get("process", 0)
+        self.emulator.error_rate = 0.0
+        with mock.patch("xcube_sh.config.datetime") as mock_datetime:
+            mock_datetime.now.return_value = datetime.datetime(2017, 8, 4, 1, 0)
+            result = CliRunner().invoke(
+                gen, [self.request_path, "-o", self.output_path, "--resume"]
+            )
+        self.assertEqual(0, result.exit_code, msg=result.output)
+        self.assertIn("Resuming", result.output)
+        # The open end is the one of the interrupted generation
+        self.assertEqual(
+            3 * 2 * 2 - num_written, self.emulator.stats["process"] - num_fetched
+        )
+        self.assert_cube_is_complete()
+
+    def test_resume_requires_checkpoint(self):
+        os.mkdir(self.output_path)
+        result = CliRunner().invoke(
+            gen, [self.request_path, "-o", self.output_path, "--resume"]
+        )
+        self.assertEqual(1, result.exit_code, msg=result.output)
+        self.assertIn("already exists", result.output)
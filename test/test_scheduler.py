@@ -0,0 +1,141 @@
+import pickle
+import threading
+import time
+import unittest
+
+from concurrent.futures import ThreadPoolExecutor
+
+from xcube_sh.scheduler import RequestScheduler
+from xcube_sh.scheduler import SingleFlight
+
+
+class RequestSchedulerTest(unittest.TestCase):
+    def test_invalid_args(self):
+        with self.assertRaises(ValueError):
+            RequestScheduler(0)
+        with self.assertRaises(ValueError):
+            RequestScheduler(2, min_concurrency=3)
+
+    def test_decrease_and_increase(self):
+        scheduler = RequestScheduler(8)
+        self.assertEqual(8, scheduler.concurrency_limit)
+
+        scheduler.acquire()
+        scheduler.release(status_code=429)
+        self.assertEqual(4, scheduler.concurrency_limit)
+
+        # A second overload signal within the decrease
+        # interval does not decrease the limit again
+        scheduler.acquire()
+        scheduler.release(status_code=503)
+        self.assertEqual(4, scheduler.concurrency_limit)
+
+        # Errors that do not signal an overload are neutral
+        for status_code in (None, 400, 401):
+            scheduler.acquire()
+            scheduler.release(status_code=status_code)
+        self.assertEqual(4, scheduler.concurrency_limit)
+
+        # Roughly one per limit's worth of successful requests
+        for _ in range(5):
+            scheduler.acquire()
+            scheduler.release(status_code=200)
+        self.assertEqual(5, scheduler.concurrency_limit)
+
+        for _ in range(100):
+            scheduler.acquire()
+            scheduler.release(status_code=200)
+        self.assertEqual(8, scheduler.concurrency_limit)
+        self.assertEqual(0, scheduler.num_active)
+
+    def test_min_concurrency(self):
+        scheduler = RequestScheduler(4, min_concurrency=2)
+        scheduler._decrease_limit()
+        scheduler._last_decrease = -1000
+        scheduler._decrease_limit()
+        self.assertEqual(2, scheduler.concurrency_limit)
+
+    def test_retry_after_pauses_all_requests(self):
+        scheduler = RequestScheduler(4)
+        scheduler.acquire()
+        scheduler.release(status_code=429, retry_after=0.2)
+        start_time = time.monotonic()
+        scheduler.acquire()
+        self.assertGreaterEqual(time.monotonic() - start_time, 0.15)
+        scheduler.release(status_code=200)
+
+    def test_fifo_order(self):
+        scheduler = RequestScheduler(1)
+        scheduler.acquire()
+
+        order = []
+
+        def request(i):
+            scheduler.acquire()
+            order.append(i)
+            scheduler.release(status_code=200)
+
+        threads = []
+        for i in range(5):
+            thread = threading.Thread(target=request, args=(i,))
+            thread.start()
+            threads.append(thread)
+            # Make sure thread i is queued before thread i + 1
+            while len(scheduler._queue) < i + 1:
+                time.sleep(0.001)
+
+        scheduler.release(status_code=200)
+        for thread in threads:
+            thread.join()
+        self.assertEqual([0, 1, 2, 3, 4], order)
+
+    def test_pickle(self):
+        scheduler = RequestScheduler(8, min_concurrency=2)
+        scheduler.acquire()
+        scheduler.release(status_code=429)
+        scheduler = pickle.loads(pickle.dumps(scheduler))
+        self.assertEqual(8, scheduler.max_concurrency)
+        self.assertEqual(2, scheduler.min_concurrency)
+        self.assertEqual(8, scheduler.concurrency_limit)
+        self.assertEqual(0, scheduler.num_active)
+
+
+class SingleFlightTest(unittest.TestCase):
+    def test_concurrent_calls_are_shared(self):
+        single_flight = SingleFlight()
+        num_calls = [0]
+
+        def func():
+            num_calls[0] += 1
+            time.sleep(0.2)
+            return "result"
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(
+                executor.map(lambda _: single_flight.call("key", func), range(4))
+            )
+        self.assertEqual(["result"] * 4, results)
+        self.assertEqual(1, num_calls[0])
+        self.assertEqual(0, single_flight.num_in_flight)
+
+    def test_errors_are_shared(self):
+        single_flight = SingleFlight()
+
+        def func():
+            time.sleep(0.2)
+            raise ValueError("failed")
+
+        def call(_):
+            try:
+                single_flight.call("key", func)
+            except ValueError as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            errors = list(executor.map(call, range(4)))
+        self.assertTrue(all(isinstance(e, ValueError) for e in errors))
+        self.assertEqual(0, single_flight.num_in_flight)
+
+    def test_pickle(self):
+        single_flight = pickle.loads(pickle.dumps(SingleFlight()))
+        self.assertEqual(42, single_flight.call("key", lambda: 42))
@@ -2,17 +2,25 @@
 # Permissions are hereby granted under the terms of the MIT License:
 # https://opensource.org/licenses/MIT.
 
+import gc
 import json
 import os
 import os.path
 import pickle
 import shutil
 import time
+import threading
 import unittest
+import warnings
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Sequence, Dict
+from unittest.mock import call
+from unittest.mock import patch
 
 import numpy as np
 import oauthlib.oauth2
+import pandas as pd
 import pytest
 import zarr
 
@@ -21,6 +29,8 @@ from xcube_sh.sentinelhub import DEFAULT_SH_INSTANCE_URL
 from xcube_sh.sentinelhub import SentinelHub
 from xcube_sh.sentinelhub import SentinelHubError
 from xcube_sh.sentinelhub import SerializableOAuth2Session
+from xcube_sh.sentinelhub import _SHARED_SENTINEL_HUBS
+from xcube_sh.sentinelhub import _to_epoch_millis
 
 HAS_SH_CREDENTIALS = "SH_CLIENT_ID" in os.environ and "SH_CLIENT_SECRET" in os.environ
 REQUIRE_SH_CREDENTIALS = "requires SH credentials"
@@ -152,6 +162,49 @@ class SentinelHubCatalogFeaturesTest(unittest.TestCase):
             [(tr[0].isoformat(), tr[1].isoformat()) for tr in time_ranges],
         )
 
+    def test_features_to_time_range_arrays(self):
+        properties = [
+            {"datetime": "2019-09-20T10:45:43Z"},
+            {"datetime": "2019-09-17T10:35:46.5Z"},
+            {"datetime": "2019-09-17T10:35:42Z"},
+            {"datetime": "2019-09-20T10:45:35Z"},
+            {"datetime": "2019-09-17T10:35:42Z"},
+            {"datetime": "2019-09-17T12:00:00+02:00"},
+            {"datetime": None},
+            {},
+        ]
+        features = [dict(properties=p) for p in properties] + [dict()]
+        start_times, end_times = SentinelHub.features_to_time_range_arrays(features)
+        self.assertEqual(np.dtype("datetime64[ns]"), start_times.dtype)
+        self.assertEqual(np.dtype("datetime64[ns]"), end_times.dtype)
+        np.testing.assert_equal(
+            np.array(
+                ["2019-09-17T10:00:00", "2019-09-20T10:45:35"],
+                dtype="datetime64[ns]",
+            ),
+            start_times,
+        )
+        np.testing.assert_equal(
+            np.array(
+                ["2019-09-17T10:35:46.5", "2019-09-20T10:45:43"],
+                dtype="datetime64[ns]",
+            ),
+            end_times,
+        )
+
+    def test_features_to_time_ranges_invalid(self):
+        features = [
+            dict(properties={"datetime": "2019-09-17T10:35:42Z"}),
+            dict(properties={"datetime": "no date"}),
+        ]
+        with self.assertWarns(UserWarning):
+            time_ranges = SentinelHub.features_to_time_ranges(features)
+        self.assertEqual(
+            [(pd.Timestamp("2019-09-17T10:35:42Z"),) * 2],
+            time_ranges,
+        )
+        self.assertEqual([], SentinelHub.features_to_time_ranges([]))
+
 
 @unittest.skipUnless(HAS_SH_CREDENTIALS, REQUIRE_SH_CREDENTIALS)
 class SentinelHubGetDataTest(unittest.TestCase):
@@ -490,6 +543,112 @@ class SentinelHubCatalogueTest(unittest.TestCase):
         sentinel_hub.close()
 
 
+class SentinelHubFeatureSearchTest(unittest.TestCase):
+    def setUp(self) -> None:
+        # Two features per day, hence at least one page per 50 days
+        datetimes = pd.date_range("2019-01-01T10:00:00Z", "2019-12-31T10:00:00Z")
+        self.features = [
+            dict(id=f"{dt.isoformat()}-{i}", properties=dict(datetime=dt.isoformat()))
+            for dt in datetimes
+            for i in range(2)
+        ]
+        self.session = CatalogSessionMock(self.features)
+        self.sentinel_hub = SentinelHub(session=self.session)
+
+    def tearDown(self) -> None:
+        self.sentinel_hub.close()
+
+    def test_get_features_split(self):
+        features = self.sentinel_hub.get_features(
+            collection_name="sentinel-2-l2a",
+            bbox=(12, 53, 13, 54),
+            time_range=("2019-01-01", "2019-12-31T23:59:59"),
+        )
+        self.assertEqual(730, len(features))
+        self.assertEqual(
+            sorted(f["id"] for f in self.features), sorted(f["id"] for f in features)
+        )
+        datetimes = [r["datetime"] for r in self.session.requests]
+        self.assertIn("2019-01-01T00:00:00Z/2019-01-31T00:00:00Z", datetimes)
+        self.assertIn("2019-12-27T00:00:00Z/2019-12-31T23:59:59Z", datetimes)
+        self.assertEqual(13, len(set(datetimes)))
+        self.assertEqual(13, len(self.session.requests))
+
+    def test_get_features_no_split(self):
+        features = self.sentinel_hub.get_features(
+            collection_name="sentinel-2-l2a",
+            time_range=("2019-01-01", "2019-12-31T23:59:59"),
+            time_split="365D",
+        )
+        self.assertEqual(730, len(features))
+        self.assertEqual(8, len(self.session.requests))
+
+    def test_get_features_open_time_range(self):
+        features = self.sentinel_hub.get_features(
+            collection_name="sentinel-2-l2a", time_range=("2019-12-01", None)
+        )
+        self.assertEqual(62, len(features))
+        self.assertEqual(
+            ["2019-12-01T00:00:00Z/.."],
+            list(set(r["datetime"] for r in self.session.requests)),
+        )
+
+    def test_get_features_throttled(self):
+        session = CatalogSessionMock(
+            self.features,
+            throttled_datetimes=["2019-01-31T00:00:00Z/2019-03-02T00:00:00Z"],
+        )
+        sentinel_hub = SentinelHub(
+            session=session, max_concurrent_requests=4, enable_warnings=False
+        )
+        scheduler = sentinel_hub.scheduler
+        with patch.object(scheduler, "release", wraps=scheduler.release) as release:
+            features = sentinel_hub.get_features(
+                collection_name="sentinel-2-l2a",
+                bbox=(12, 53, 13, 54),
+                time_range=("2019-01-01", "2019-12-31T23:59:59"),
+            )
+        self.assertEqual(730, len(features))
+        # The throttled period has been searched again
+        self.assertEqual(14, len(session.requests))
+        # Catalog searches are subject to the request scheduler
+        self.assertEqual(14, release.call_count)
+        self.assertIn(call(status_code=429, retry_after=0.01), release.call_args_list)
+        sentinel_hub.close()
+
+    def test_get_features_cached(self):
+        sentinel_hub = SentinelHub(session=self.session, catalog_cache_ttl=60)
+        features = sentinel_hub.get_features(
+            collection_name="sentinel-2-l2a",
+            bbox=(12, 53, 13, 54),
+            time_range=("2019-01-01", "2019-01-31"),
+        )
+        self.assertEqual(60, len(features))
+        self.assertEqual(1, len(self.session.requests))
+        self.assertIn("geometry", self.session.requests[0]["fields"]["include"])
+        features = sentinel_hub.get_features(
+            collection_name="sentinel-2-l2a",
+            bbox=(12, 53, 13, 54),
+            time_range=("2019-01-10", "2019-01-11"),
+        )
+        self.assertEqual(2, len(features))
+        self.assertEqual(1, len(self.session.requests))
+        sentinel_hub.get_features(
+            collection_name="sentinel-2-l2a",
+            bbox=(12, 53, 13, 54),
+            time_range=("2019-01-10", "2019-02-11"),
+        )
+        self.assertEqual(3, len(self.session.requests))
+
+    def test_iter_features(self):
+        features = self.sentinel_hub.iter_features(
+            collection_name="sentinel-2-l2a",
+            time_range=("2019-01-01", "2019-12-31T23:59:59"),
+        )
+        self.assertIsInstance(next(features), dict)
+        features.close()
+
+
 class SentinelHubTokenInfoTest(unittest.TestCase):
     def test_token_info(self):
         expected_token_info = {
@@ -557,6 +716,220 @@ class SentinelHubAuthTest(unittest.TestCase):
         sentinel_hub.close()
 
 
+class SentinelHubConcurrencyTest(unittest.TestCase):
+    def test_max_concurrent_requests(self):
+        session = ConcurrencyCountingSessionMock()
+        sentinel_hub = SentinelHub(session=session, max_concurrent_requests=3)
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            responses = list(
+                executor.map(
+                    lambda i: sentinel_hub.get_data(
+                        {"id": i}, mime_type="application/octet-stream"
+                    ),
+                    range(20),
+                )
+            )
+        self.assertTrue(all(response.ok for response in responses))
+        self.assertEqual(20, session.num_requests)
+        self.assertEqual(3, session.max_num_concurrent_requests)
+        sentinel_hub.close()
+
+    def test_pickle(self):
+        session = SessionMock(
+            {"post": {"https://services.sentinel-hub.com/api/v1/process": bytes()}}
+        )
+        sentinel_hub = SentinelHub(session=session, max_concurrent_requests=3)
+        sentinel_hub = pickle.loads(pickle.dumps(sentinel_hub))
+        self.assertEqual(3, sentinel_hub.max_concurrent_requests)
+        response = sentinel_hub.get_data({}, mime_type="application/octet-stream")
+        self.assertTrue(response.ok)
+
+    def test_throttled_requests(self):
+        session = ThrottlingSessionMock(num_throttled=2)
+        sentinel_hub = SentinelHub(
+            session=session, max_concurrent_requests=4, enable_warnings=False
+        )
+        response = sentinel_hub.get_data({}, mime_type="application/octet-stream")
+        self.assertTrue(response.ok)
+        self.assertEqual(3, session.num_requests)
+        # Two throttled responses within the decrease interval
+        # count as a single overload event
+        self.assertEqual(2, sentinel_hub.scheduler.concurrency_limit)
+        sentinel_hub.close()
+
+
+class SentinelHubPickleTest(unittest.TestCase):
+    @patch.object(SentinelHub, "_fetch_token")
+    def test_pickle_as_shared_instance(self, fetch_token):
+        sentinel_hub = SentinelHub(
+            client_id="pickle-test-id",
+            client_secret="pickle-test-secret",
+            instance_url="https://test.sentinel-hub.com",
+            max_concurrent_requests=3,
+        )
+        self.assertEqual(1, fetch_token.call_count)
+        data = pickle.dumps(sentinel_hub)
+        # Neither session nor token are pickled
+        self.assertNotIn(b"adapters", data)
+        self.assertNotIn(b"SerializableOAuth2Session", data)
+
+        sentinel_hub_1 = pickle.loads(data)
+        sentinel_hub_2 = pickle.loads(pickle.dumps(sentinel_hub))
+        self.assertIsNot(sentinel_hub, sentinel_hub_1)
+        self.assertIs(sentinel_hub_1, sentinel_hub_2)
+        self.assertIs(sentinel_hub_1, pickle.loads(pickle.dumps(sentinel_hub_1)))
+        # A new token is fetched once for the shared instance
+        self.assertEqual(2, fetch_token.call_count)
+
+        self.assertEqual("pickle-test-id", sentinel_hub_1.client_id)
+        self.assertEqual(3, sentinel_hub_1.max_concurrent_requests)
+        self.assertEqual(
+            "https://test.sentinel-hub.com/api/v1/process",
+            sentinel_hub_1.process_url,
+        )
+
+        other_sentinel_hub = SentinelHub(
+            client_id="pickle-test-id",
+            client_secret="pickle-test-secret",
+            instance_url="https://test.sentinel-hub.com",
+            max_concurrent_requests=4,
+        )
+        self.assertIsNot(sentinel_hub_1, pickle.loads(pickle.dumps(other_sentinel_hub)))
+
+    @patch.object(SentinelHub, "_fetch_token")
+    def test_shared_instance_is_not_closed(self, fetch_token):
+        sentinel_hub = SentinelHub(
+            client_id="pickle-test-id",
+            client_secret="pickle-test-secret",
+            instance_url="https://test.sentinel-hub.com",
+            max_concurrent_requests=5,
+        )
+        shared_sentinel_hub = pickle.loads(pickle.dumps(sentinel_hub))
+        with patch.object(shared_sentinel_hub.session, "close") as close_session:
+            shared_sentinel_hub.close()
+            close_session.assert_not_called()
+        self.assertIs(shared_sentinel_hub, pickle.loads(pickle.dumps(sentinel_hub)))
+        with patch.object(sentinel_hub.session, "close") as close_session:
+            sentinel_hub.close()
+            close_session.assert_called_once()
+
+    @patch.object(SentinelHub, "_fetch_token")
+    def test_unused_shared_instances_are_closed(self, fetch_token):
+        def new_shared_sentinel_hub(max_concurrent_requests: int) -> SentinelHub:
+            sentinel_hub = SentinelHub(
+                client_id="pickle-test-id",
+                client_secret="pickle-test-secret",
+                instance_url="https://test.sentinel-hub.com",
+                max_concurrent_requests=max_concurrent_requests,
+            )
+            shared_sentinel_hub = pickle.loads(pickle.dumps(sentinel_hub))
+            sentinel_hub.close()
+            return shared_sentinel_hub
+
+        shared_sentinel_hub = new_shared_sentinel_hub(6)
+        # Secrets are not used as keys
+        for key in _SHARED_SENTINEL_HUBS.keys():
+            self.assertNotIn("pickle-test-secret", key)
+        shared_session = shared_sentinel_hub.session
+        shared_sentinel_hub_ref = weakref.ref(shared_sentinel_hub)
+        del shared_sentinel_hub
+        with patch.object(shared_session, "close") as close_session:
+            # Still among the most recently used instances
+            gc.collect()
+            self.assertIsNotNone(shared_sentinel_hub_ref())
+            close_session.assert_not_called()
+            with patch("xcube_sh.sentinelhub._MAX_RECENT_SHARED_SENTINEL_HUBS", 1):
+                new_shared_sentinel_hub(7)
+            gc.collect()
+            self.assertIsNone(shared_sentinel_hub_ref())
+            close_session.assert_called_once()
+
+
+class SentinelHubCloseTest(unittest.TestCase):
+    def test_close_after_failed_init(self):
+        with patch(
+            "xcube_sh.sentinelhub.TokenManager", side_effect=ValueError("failed")
+        ):
+            with self.assertRaises(ValueError):
+                SentinelHub(client_id="test-id", client_secret="test-secret")
+        sentinel_hub = SentinelHub.__new__(SentinelHub)
+        # Must not raise
+        sentinel_hub.close()
+        sentinel_hub.__del__()
+
+
+class SentinelHubTokenRefreshTest(unittest.TestCase):
+    def test_concurrent_unauthorized_requests_refresh_token_once(self):
+        session = UnauthorizedSessionMock()
+        sentinel_hub = SentinelHub(
+            session=session,
+            client_id="some-id",
+            client_secret="some-secret",
+            enable_warnings=False,
+        )
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            responses = list(
+                executor.map(
+                    lambda i: sentinel_hub.get_data(
+                        {"id": i}, mime_type="application/octet-stream"
+                    ),
+                    range(8),
+                )
+            )
+        self.assertTrue(all(response.ok for response in responses))
+        self.assertEqual(1, session.num_token_fetches)
+        sentinel_hub.close()
+
+
+class SentinelHubSingleFlightTest(unittest.TestCase):
+    def test_identical_requests_share_response(self):
+        session = ConcurrencyCountingSessionMock(delay=0.2)
+        sentinel_hub = SentinelHub(session=session)
+        request = {"input": {"bounds": {"bbox": [0, 0, 1, 1]}}}
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            responses = list(
+                executor.map(
+                    lambda _: sentinel_hub.get_data(
+                        request, mime_type="application/octet-stream"
+                    ),
+                    range(8),
+                )
+            )
+        self.assertEqual(1, session.num_requests)
+        self.assertTrue(all(response is responses[0] for response in responses))
+        sentinel_hub.close()
+
+    def test_different_requests_are_not_shared(self):
+        session = ConcurrencyCountingSessionMock(delay=0.2)
+        sentinel_hub = SentinelHub(session=session)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(
+                executor.map(
+                    lambda i: sentinel_hub.get_data(
+                        {"input": {"bounds": {"bbox": [i, 0, i + 1, 1]}}},
+                        mime_type="application/octet-stream",
+                    ),
+                    range(4),
+                )
+            )
+            list(
+                executor.map(
+                    lambda mime_type: sentinel_hub.get_data({}, mime_type=mime_type),
+                    ["application/octet-stream", "image/tiff"],
+                )
+            )
+        self.assertEqual(6, session.num_requests)
+        sentinel_hub.close()
+
+    def test_subsequent_requests_are_not_shared(self):
+        session = ConcurrencyCountingSessionMock()
+        sentinel_hub = SentinelHub(session=session)
+        sentinel_hub.get_data({}, mime_type="application/octet-stream")
+        sentinel_hub.get_data({}, mime_type="application/octet-stream")
+        self.assertEqual(2, session.num_requests)
+        sentinel_hub.close()
+
+
 class SentinelHubNewRequestTest(unittest.TestCase):
     def test_new_data_request_single(self):
         request = SentinelHub.new_data_request(
@@ -645,6 +1018,109 @@ class SentinelHubNewRequestTest(unittest.TestCase):
         self.assertEqual(expected_request, request)
 
 
+class SentinelHubRequestFingerprintTest(unittest.TestCase):
+    def test_request_fingerprint(self):
+        request_1 = SentinelHub.new_data_request(
+            "S2L1C",
+            ["B02"],
+            (512, 512),
+            time_range=("2018-10-01T00:00:00.000Z", "2018-10-10T00:00:00.000Z"),
+            bbox=(13.822, 45.850, 14.559, 46.291),
+        )
+        request_2 = json.loads(json.dumps(request_1))
+        request_2["input"] = dict(reversed(request_2["input"].items()))
+        request_3 = SentinelHub.new_data_request(
+            "S2L1C",
+            ["B03"],
+            (512, 512),
+            time_range=("2018-10-01T00:00:00.000Z", "2018-10-10T00:00:00.000Z"),
+            bbox=(13.822, 45.850, 14.559, 46.291),
+        )
+        fingerprint = SentinelHub.get_request_fingerprint(request_1)
+        self.assertRegex(fingerprint, "^[0-9a-f]{64}$")
+        self.assertEqual(fingerprint, SentinelHub.get_request_fingerprint(request_2))
+        self.assertNotEqual(fingerprint, SentinelHub.get_request_fingerprint(request_3))
+        self.assertNotEqual(
+            fingerprint,
+            SentinelHub.get_request_fingerprint(request_1, process_url="https://x"),
+        )
+
+
+class SentinelHubDataRequestTemplateTest(unittest.TestCase):
+    kwargs = dict(
+        band_units="DN",
+        band_sample_types="UINT16",
+        crs=CRS_ID_TO_URI["EPSG:4326"],
+        mosaicking_order="leastCC",
+        collection_id="1a3ab057-3c51-447c-9f85-27d4b633b3f5",
+    )
+
+    def test_new_request(self):
+        template = SentinelHub.new_data_request_template(
+            "S2L2A", ["B02", "B03"], (512, 512), **self.kwargs
+        )
+        for bbox, time_range in [
+            (
+                (13.822, 45.850, 14.559, 46.291),
+                ("2018-10-01T00:00:00.000Z", "2018-10-10T00:00:00.000Z"),
+            ),
+            (
+                (-10, 50, -9.5, 50.5),
+                (pd.Timestamp("2019-01-01"), pd.Timestamp("2019-01-02T12:00")),
+            ),
+        ]:
+            request = template.new_request(bbox, time_range)
+            self.assertIsInstance(request, bytes)
+            expected_request = SentinelHub.new_data_request(
+                "S2L2A",
+                ["B02", "B03"],
+                (512, 512),
+                bbox=bbox,
+                time_range=time_range,
+                **self.kwargs,
+            )
+            self.assertEqual(expected_request, json.loads(request))
+            self.assertEqual(
+                SentinelHub.get_request_fingerprint(
+                    expected_request, process_url="https://x", mime_type="y"
+                ),
+                SentinelHub.get_request_fingerprint(
+                    request, process_url="https://x", mime_type="y"
+                ),
+            )
+
+    def test_pickle(self):
+        template = SentinelHub.new_data_request_template(
+            "S2L2A", ["B02"], (512, 512), **self.kwargs
+        )
+        args = (13.822, 45.850, 14.559, 46.291), ("2018-10-01", "2018-10-10")
+        self.assertEqual(
+            template.new_request(*args),
+            pickle.loads(pickle.dumps(template)).new_request(*args),
+        )
+
+    def test_get_data_with_encoded_request(self):
+        session = SessionMock(
+            {"post": {"https://services.sentinel-hub.com/api/v1/process": bytes()}}
+        )
+        sentinel_hub = SentinelHub(session=session)
+        template = SentinelHub.new_data_request_template(
+            "S2L2A", ["B02"], (512, 512), **self.kwargs
+        )
+        request = template.new_request(
+            (13.822, 45.850, 14.559, 46.291), ("2018-10-01", "2018-10-10")
+        )
+        with self.assertRaises(ValueError):
+            sentinel_hub.get_data(request)
+        response = sentinel_hub.get_data(request, mime_type="application/octet-stream")
+        self.assertTrue(response.ok)
+        self.assertEqual(request, session.last_post_kwargs["data"])
+        self.assertEqual(
+            "application/json", session.last_post_kwargs["headers"]["Content-Type"]
+        )
+        sentinel_hub.close()
+
+
 class SentinelHubRequestHeaderTest(unittest.TestCase):
     def test_request_headers(self):
         headers = SentinelHub._get_request_headers("application/json")
@@ -665,9 +1141,8 @@ class SerializableOAuth2SessionTest(unittest.TestCase):
 
         actual = pickle.loads(pickle.dumps(session))
 
-        valid_test_attrs = SerializableOAuth2Session._SERIALIZED_ATTRS
+        valid_test_attrs = list(SerializableOAuth2Session._SERIALIZED_ATTRS)
         valid_test_attrs.remove("_client")
-        valid_test_attrs.remove("adapters")
 
         actual = actual.__dict__
         actual = dict((k, actual[k]) for k in valid_test_attrs if k in actual)
@@ -677,6 +1152,25 @@ class SerializableOAuth2SessionTest(unittest.TestCase):
 
         self.assertEqual(expected, actual)
 
+    def test_connection_pools(self):
+        from oauthlib.oauth2 import BackendApplicationClient
+
+        client = BackendApplicationClient(client_id="sdfvdsv")
+        session = SerializableOAuth2Session(
+            client=client, pool_connections=4, pool_maxsize=32
+        )
+        adapter = session.get_adapter("https://services.sentinel-hub.com")
+        self.assertEqual(4, adapter._pool_connections)
+        self.assertEqual(32, adapter._pool_maxsize)
+        self.assertEqual(False, adapter._pool_block)
+
+        actual = pickle.loads(pickle.dumps(session))
+        actual_adapter = actual.get_adapter("https://services.sentinel-hub.com")
+        self.assertIsNot(adapter, actual_adapter)
+        self.assertEqual(4, actual_adapter._pool_connections)
+        self.assertEqual(32, actual_adapter._pool_maxsize)
+        self.assertEqual({"https://", "http://"}, set(actual.adapters.keys()))
+
 
 def _write_zarr_array(
     dir_path: str,
@@ -716,6 +1210,7 @@ class SessionMock:
     def __init__(self, mapping: Dict):
         self.mapping = mapping
         self.token_refreshed = False
+        self.last_post_kwargs = None
 
     # noinspection PyUnusedLocal
     def fetch_token(self, token_url: str, client_id: str, client_secret: str):
@@ -727,6 +1222,7 @@ class SessionMock:
 
     # noinspection PyUnusedLocal
     def post(self, url, **kwargs):
+        self.last_post_kwargs = kwargs
         return self._invoke(url, "post")
 
     def _invoke(self, url: str, method: str):
@@ -766,3 +1262,113 @@ class SessionResponseMock:
 
     def raise_for_status(self):
         pass
+
+
+class ConcurrencyCountingSessionMock(SessionMock):
+    def __init__(self, delay: float = 0.01):
+        super().__init__({"post": {}})
+        self.delay = delay
+        self.num_requests = 0
+        self.num_concurrent_requests = 0
+        self.max_num_concurrent_requests = 0
+        self._lock = threading.Lock()
+
+    # noinspection PyUnusedLocal
+    def post(self, url, **kwargs):
+        with self._lock:
+            self.num_requests += 1
+            self.num_concurrent_requests += 1
+            self.max_num_concurrent_requests = max(
+                self.max_num_concurrent_requests, self.num_concurrent_requests
+            )
+        time.sleep(self.delay)
+        with self._lock:
+            self.num_concurrent_requests -= 1
+        return self._response(bytes(), 200)
+
+
+class ThrottlingSessionMock(SessionMock):
+    def __init__(self, num_throttled: int):
+        super().__init__({"post": {}})
+        self.num_throttled = num_throttled
+        self.num_requests = 0
+
+    # noinspection PyUnusedLocal
+    def post(self, url, **kwargs):
+        self.num_requests += 1
+        if self.num_requests <= self.num_throttled:
+            response = self._response(bytes(), 429)
+            response.headers["Retry-After"] = "10"
+            return response
+        return self._response(bytes(), 200)
+
+
+class CatalogSessionMock(SessionMock):
+    def __init__(self, features, throttled_datetimes=()):
+        super().__init__({"post": {}})
+        self.features = features
+        self.throttled_datetimes = set(throttled_datetimes)
+        self.requests = []
+        self._lock = threading.Lock()
+
+    # noinspection PyUnusedLocal
+    def post(self, url, json=None, **kwargs):
+        with self._lock:
+            self.requests.append(json)
+            # Throttle the first request for the given periods
+            if json.get("datetime") in self.throttled_datetimes:
+                self.throttled_datetimes.remove(json["datetime"])
+                response = self._response(bytes(), 429)
+                response.headers["Retry-After"] = "10"
+                return response
+        features = self.features
+        if "datetime" in json:
+            t1, t2 = [
+                pd.Timestamp(t) if t != ".." else None
+                for t in json["datetime"].split("/")
+            ]
+            features = [
+                f
+                for f in features
+                if (t1 is None or t1 <= pd.Timestamp(f["properties"]["datetime"]))
+                and (t2 is None or pd.Timestamp(f["properties"]["datetime"]) <= t2)
+            ]
+        offset = json.get("next", 0)
+        features = features[offset : offset + json["limit"]]
+        return self._response(dict(type="FeatureCollection", features=features), 200)
+
+
+class UnauthorizedSessionMock(SessionMock):
+    """Rejects all requests until a token has been fetched."""
+
+    def __init__(self):
+        super().__init__({"post": {}})
+        self.num_token_fetches = 0
+        self._barrier = threading.Barrier(8, timeout=5)
+
+    # noinspection PyUnusedLocal
+    def fetch_token(self, token_url: str, client_id: str, client_secret: str):
+        self.num_token_fetches += 1
+        self.token_refreshed = True
+
+    # noinspection PyUnusedLocal
+    def post(self, url, **kwargs):
+        if not self.token_refreshed:
+            # Make sure all requests are rejected with the same token
+            self._barrier.wait()
+            return self._response(bytes(), 401)
+        return self._response(bytes(), 200)
+
+
+class ToEpochMillisTest(unittest.TestCase):
+    def test_to_epoch_millis(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            self.assertEqual(1577836800000, _to_epoch_millis("2020-01-01"))
+            self.assertEqual(
+                1577836800123, _to_epoch_millis("2020-01-01T00:00:00.123Z")
+            )
+            self.assertEqual(
+                1577836800000,
+                _to_epoch_millis(pd.Timestamp("2020-01-01T01:00:00+01:00")),
+            )
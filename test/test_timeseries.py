@@ -0,0 +1,218 @@
+# Copyright © 2022-2024 by the xcube development team and contributors
+# Permissions are hereby granted under the terms of the MIT License:
+# https://opensource.org/licenses/MIT.
+
+import json
+import re
+import shutil
+import subprocess
+import threading
+import unittest
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from test.test_chunkstore import MockResponse
+from test.test_chunkstore import S2_BAND_NAMES
+from test.test_chunkstore import SentinelHubMock
+from xcube_sh.config import CubeConfig
+from xcube_sh.sentinelhub import SentinelHub
+from xcube_sh.sentinelhub import SentinelHubError
+from xcube_sh.timeseries import open_time_series
+
+
+class TimeSeriesSentinelHubMock(SentinelHubMock):
+    def __init__(self, config: CubeConfig, status_code: int = 200):
+        super().__init__(config)
+        self._status_code = status_code
+        self._lock = threading.Lock()
+
+    def get_data(self, request, mime_type=None):
+        """
+        Return zlib (level 8) compressed float32 output band indexes.
+        """
+        with self._lock:
+            self._requests.append(request)
+        if self._status_code != 200:
+            return MockResponse(
+                ok=False, status_code=self._status_code, headers={}, content=b""
+            )
+        width = request["output"]["width"]
+        height = request["output"]["height"]
+        num_bands = int(
+            re.search(r"output: \[\s*{bands: (\d+)", request["evalscript"]).group(1)
+        )
+        array = np.zeros((height, width, num_bands), dtype=np.float32)
+        array[...] = np.arange(num_bands, dtype=np.float32)
+        # Invalidate all pixels but one of the first time slice
+        array.reshape((height * width, num_bands))[1:, 0] = np.nan
+        content = zlib.compress(bytes(array), level=8)
+        return MockResponse(ok=True, status_code=200, headers={}, content=content)
+
+
+class OpenTimeSeriesTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.cube_config = CubeConfig(
+            dataset_name="S2L1C",
+            band_names=["B04", "B08"],
+            bbox=(10.2, 53.5, 10.3, 53.6),
+            spatial_res=0.1 / 4000,
+            time_range=("2017-08-01", "2017-08-10"),
+            time_period="1D",
+        )
+        self.sentinel_hub = TimeSeriesSentinelHubMock(self.cube_config)
+
+    def test_points(self):
+        # noinspection PyTypeChecker
+        ts = open_time_series(
+            self.cube_config,
+            [(10.21, 53.51), (10.25, 53.55), (10.29, 53.59)],
+            sentinel_hub=self.sentinel_hub,
+            max_time_slices=4,
+        )
+        self.assertEqual({"time": 10, "geometry": 3, "bnds": 2}, ts.sizes)
+        self.assertEqual({"B04", "B08"}, set(ts.data_vars))
+        self.assertEqual(("time", "geometry"), ts.B04.dims)
+        np.testing.assert_almost_equal(ts.lon.values, [10.21, 10.25, 10.29])
+        np.testing.assert_almost_equal(ts.lat.values, [53.51, 53.55, 53.59])
+        self.assertEqual(
+            np.datetime64("2017-08-01T12:00:00"), ts.time.values[0].astype("M8[s]")
+        )
+
+        # 3 batches of at most 4 time slices per point
+        requests = self.sentinel_hub.requests
+        self.assertEqual(3 * 3, len(requests))
+        for request in requests:
+            self.assertEqual(1, request["output"]["width"])
+            self.assertEqual(1, request["output"]["height"])
+            self.assertIn("mosaicking: 'TILE'", request["evalscript"])
+
+        # Values are the output band indexes of the requests
+        np.testing.assert_equal(ts.B04.values[:, 0], [0, 2, 4, 6, 0, 2, 4, 6, 0, 2])
+        np.testing.assert_equal(ts.B08.values[:, 0], [1, 3, 5, 7, 1, 3, 5, 7, 1, 3])
+
+    def test_polygons(self):
+        spatial_res = self.cube_config.spatial_res
+        bbox = (10.25, 53.55, 10.25 + 3 * spatial_res, 53.55 + 2 * spatial_res)
+        # noinspection PyTypeChecker
+        ts = open_time_series(self.cube_config, [bbox], sentinel_hub=self.sentinel_hub)
+        self.assertEqual({"time": 10, "geometry": 1, "bnds": 2}, ts.sizes)
+        request = self.sentinel_hub.requests[0]
+        self.assertEqual(1, len(self.sentinel_hub.requests))
+        self.assertEqual(3, request["output"]["width"])
+        self.assertEqual(2, request["output"]["height"])
+        np.testing.assert_almost_equal(request["input"]["bounds"]["bbox"], bbox)
+        # Polygon values are the means of the valid pixels
+        np.testing.assert_equal(ts.B04.values[:3, 0], [0, 2, 4])
+
+    def test_all_bands(self):
+        cube_config = CubeConfig.from_dict(
+            dict(self.cube_config.to_dict(), band_names=None)
+        )
+        # noinspection PyTypeChecker
+        ts = open_time_series(
+            cube_config, [(10.21, 53.51)], sentinel_hub=self.sentinel_hub
+        )
+        self.assertEqual(set(S2_BAND_NAMES), set(ts.data_vars))
+        self.assertEqual({"time": 10, "geometry": 1, "bnds": 2}, ts.sizes)
+        # Values are the output band indexes, one output band per band and time
+        num_bands = len(S2_BAND_NAMES)
+        np.testing.assert_equal(
+            ts[S2_BAND_NAMES[1]].values[:3, 0], [1, num_bands + 1, 2 * num_bands + 1]
+        )
+
+    def test_too_large_polygon(self):
+        with self.assertRaises(ValueError):
+            # noinspection PyTypeChecker
+            open_time_series(
+                self.cube_config,
+                [self.cube_config.bbox],
+                sentinel_hub=self.sentinel_hub,
+            )
+
+    def test_failed_request(self):
+        sentinel_hub = TimeSeriesSentinelHubMock(self.cube_config, status_code=400)
+        with self.assertRaises(SentinelHubError):
+            # noinspection PyTypeChecker
+            open_time_series(
+                self.cube_config, [(10.21, 53.51)], sentinel_hub=sentinel_hub
+            )
+
+
+class NewTimeSeriesRequestTest(unittest.TestCase):
+    def test_request(self):
+        request = SentinelHub.new_time_series_request(
+            "S2L2A",
+            ["B04", "B08"],
+            (1, 1),
+            [
+                ("2020-01-01T00:00:00Z", "2020-01-02T00:00:00Z"),
+                ("2020-01-03T00:00:00Z", "2020-01-04T00:00:00Z"),
+            ],
+            bbox=(10.0, 50.0, 10.001, 50.001),
+        )
+        self.assertEqual(
+            {"from": "2020-01-01T00:00:00Z", "to": "2020-01-04T00:00:00Z"},
+            request["input"]["data"][0]["dataFilter"]["timeRange"],
+        )
+        evalscript = request["evalscript"]
+        self.assertIn('input: [{"bands": ["B04", "B08", "dataMask"]}],', evalscript)
+        self.assertIn("{bands: 4, sampleType: 'FLOAT32'}", evalscript)
+        self.assertIn(
+            "var timeBounds = [[1577836800000, 1577923200000],"
+            " [1578009600000, 1578096000000]];",
+            evalscript,
+        )
+        self.assertIn("result[j * 2 + 0] = sample.B04;", evalscript)
+        self.assertIn("result[j * 2 + 1] = sample.B08;", evalscript)
+        # Must be valid JSON
+        self.assertEqual(request, json.loads(json.dumps(request)))
+
+    @unittest.skipUnless(shutil.which("node"), "requires Node.js")
+    def test_evalscript_matches_acquisition_times(self):
+        # Time ranges of catalog time stamps +/- a tolerance
+        tolerance = pd.Timedelta("10min")
+        acquisition_times = pd.to_datetime(
+            [
+                "2020-01-01T10:23:45.123Z",
+                "2020-01-03T10:31:02.5Z",
+                "2020-01-05T10:20:00.000Z",
+            ]
+        )
+        request = SentinelHub.new_time_series_request(
+            "S2L2A",
+            ["B04", "B08"],
+            (1, 1),
+            [(t - tolerance, t + tolerance) for t in acquisition_times],
+            bbox=(10.0, 50.0, 10.001, 50.001),
+        )
+        self.assertIn("mosaicking: 'TILE'", request["evalscript"])
+        # Tiles ordered by "mostRecent", the orbits start at 00:00
+        tiles = [
+            ("2020-01-03T10:31:02.500Z", dict(B04=3, B08=4, dataMask=1)),
+            ("2020-01-03T10:31:05.000Z", dict(B04=5, B08=6, dataMask=1)),
+            ("2020-01-02T10:27:00.000Z", dict(B04=7, B08=8, dataMask=1)),
+            ("2020-01-01T10:23:45.123Z", dict(B04=9, B08=9, dataMask=0)),
+            ("2020-01-01T10:23:49.000Z", dict(B04=1, B08=2, dataMask=1)),
+        ]
+        scenes = dict(
+            tiles=[dict(date=date) for date, _ in tiles],
+            orbits=[
+                dict(dateFrom=date[:10] + "T00:00:00Z", dateTo=date[:10] + "T23:59:59Z")
+                for date, _ in tiles
+            ],
+        )
+        script = "\n".join(
+            [
+                request["evalscript"],
+                f"var samples = {json.dumps([sample for _, sample in tiles])};",
+                f"var scenes = {json.dumps(scenes)};",
+                "console.log(JSON.stringify(evaluatePixel(samples, scenes)));",
+            ]
+        )
+        output = subprocess.run(
+            ["node"], input=script, capture_output=True, text=True, check=True
+        ).stdout
+        # No tile was acquired within the last time range
+        self.assertEqual([1, 2, 3, 4, None, None], json.loads(output))
@@ -0,0 +1,113 @@
+# Copyright © 2022-2024 by the xcube development team and contributors
+# Permissions are hereby granted under the terms of the MIT License:
+# https://opensource.org/licenses/MIT.
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import xarray as xr
+
+from test.test_chunkstore import SentinelHubMock
+from xcube_sh.chunkstore import SentinelHubChunkStore
+from xcube_sh.config import CubeConfig
+from xcube_sh.zarrwriter import ZarrCheckpoint
+from xcube_sh.zarrwriter import ZarrWriter
+
+
+class ZarrWriterTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.mkdtemp(prefix="xcube-sh-zarrwriter-")
+        self.output_path = os.path.join(self.temp_dir, "out.zarr")
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_write_item(self):
+        writer = ZarrWriter(self.output_path)
+        writer.write_item(".zgroup", b'{"zarr_format": 2}')
+        writer.write_item("B01/0.1.2", b"\x01\x02")
+        with open(os.path.join(self.output_path, "B01", "0.1.2"), "rb") as fp:
+            self.assertEqual(b"\x01\x02", fp.read())
+
+    def new_store(self):
+        cube_config = CubeConfig(
+            dataset_name="S2L1C",
+            band_names=["B01", "B08"],
+            bbox=(10.2, 53.5, 10.21, 53.51),
+            spatial_res=0.1 / 4000,
+            tile_size=(200, 200),
+            time_range=("2017-08-01", "2017-08-03"),
+            time_period="1D",
+        )
+        sentinel_hub = SentinelHubMock(cube_config)
+        # noinspection PyTypeChecker
+        return SentinelHubChunkStore(sentinel_hub, cube_config), sentinel_hub
+
+    def test_copy_store(self):
+        store, sentinel_hub = self.new_store()
+
+        num_items = ZarrWriter(self.output_path).copy_store(store, batch_size=5)
+
+        # All but the directory entries of the arrays
+        self.assertEqual(len(store) - 6, num_items)
+        # Every chunk is fetched once
+        self.assertEqual(2 * 3 * 2 * 2, len(sentinel_hub.requests))
+        with open(os.path.join(self.output_path, "B08", "2.1.0"), "rb") as fp:
+            self.assertEqual(store["B08/2.1.0"], fp.read())
+        cube = xr.open_zarr(self.output_path)
+        xr.testing.assert_identical(xr.open_zarr(store).load(), cube.load())
+
+    def test_copy_store_with_keys(self):
+        store, sentinel_hub = self.new_store()
+
+        num_items = ZarrWriter(self.output_path).copy_store(
+            store,
+            keys=["B01/0.0.0", "B01/0.1.1"],
+            key_mapping=lambda key: key.replace("B01/0.", "B01/4."),
+        )
+
+        self.assertEqual(2, num_items)
+        self.assertEqual(
+            ["4.0.0", "4.1.1"], sorted(os.listdir(self.output_path + "/B01"))
+        )
+        with open(os.path.join(self.output_path, "B01", "4.1.1"), "rb") as fp:
+            self.assertEqual(store["B01/0.1.1"], fp.read())
+
+    def test_copy_store_with_checkpoint(self):
+        store, sentinel_hub = self.new_store()
+        writer = ZarrWriter(self.output_path)
+        writer.ensure_root_dir()
+        checkpoint = ZarrCheckpoint(os.path.join(self.output_path, ".checkpoint"))
+        checkpoint.create(store.get_manifest())
+        for key in ("B01/.zarray", "B01/0.0.0", "B01/0.0.1"):
+            writer.write_item(key, store[key])
+            checkpoint.add(key)
+        # Recorded, but removed from the output
+        checkpoint.add("B08/1.1.1")
+        checkpoint.close()
+        with open(checkpoint.path, "a") as fp:
+            # Incomplete line of an interrupted process
+            fp.write("B08/1.1")
+
+        checkpoint = ZarrCheckpoint(checkpoint.path)
+        manifest = checkpoint.load()
+        self.assertEqual(store.manifest_key, manifest.key)
+        self.assertEqual(
+            {"B01/.zarray", "B01/0.0.0", "B01/0.0.1", "B08/1.1.1"}, checkpoint.keys
+        )
+        num_requests = len(sentinel_hub.requests)
+        num_items = writer.copy_store(store, checkpoint=checkpoint)
+        checkpoint.close()
+
+        self.assertEqual(len(store) - 6 - 3, num_items)
+        # Every tile still misses a band, bands of a tile are fetched at once
+        self.assertEqual(3 * 2 * 2, len(sentinel_hub.requests) - num_requests)
+        checkpoint = ZarrCheckpoint(checkpoint.path)
+        checkpoint.load()
+        self.assertEqual(len(store) - 6, len(checkpoint.keys))
+        # The mock's values of B08 depend on whether bands are fetched at once
+        xr.testing.assert_identical(
+            xr.open_zarr(store).B01.load(), xr.open_zarr(self.output_path).B01.load()
+        )
@@ -0,0 +1,147 @@
+# Copyright © 2022-2024 by the xcube development team and contributors
+# Permissions are hereby granted under the terms of the MIT License:
+# https://opensource.org/licenses/MIT.
+
+import threading
+import time
+import weakref
+from typing import Any, Callable, Optional
+
+from .constants import DEFAULT_TOKEN_REFRESH_MARGIN
+from .constants import LOG
+
+
+class TokenManager:
+    """
+    Manages the OAuth2 access token of a session.
+
+    The token is refreshed before it expires, either lazily by
+    :meth:`ensure_valid` or, if *refresh_in_background* is set,
+    by a background timer. Concurrent threads wait for a single
+    refresh rather than each fetching a new token.
+
+    :param fetch_token: Function that fetches a new token
+        and returns it. If the returned token is a dictionary
+        that includes "expires_at", the token is refreshed
+        *refresh_margin* seconds before that time.
+    :param refresh_margin: Time in seconds before
+        expiration when a token is refreshed.
+    :param refresh_in_background: Whether to refresh the token
+        using a background timer.
+    """
+
+    def __init__(
+        self,
+        fetch_token: Callable[[], Any],
+        refresh_margin: float = DEFAULT_TOKEN_REFRESH_MARGIN,
+        refresh_in_background: bool = False,
+    ):
+        self._fetch_token = fetch_token
+        self._refresh_margin = refresh_margin
+        self._refresh_in_background = refresh_in_background
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._expires_at: Optional[float] = None
+        self._timer: Optional[threading.Timer] = None
+        self._closed = False
+
+    @property
+    def generation(self) -> int:
+        """The number of times a token has been fetched."""
+        return self._generation
+
+    @property
+    def expires_at(self) -> Optional[float]:
+        """The expiration time of the current token, if known."""
+        return self._expires_at
+
+    def is_stale(self) -> bool:
+        """Whether the current token is about to expire."""
+        expires_at = self._expires_at
+        return (
+            expires_at is not None and time.time() >= expires_at - self._refresh_margin
+        )
+
+    def ensure_valid(self) -> int:
+        """
+        Refresh the token, if it is stale.
+
+        :return: The generation of the valid token,
+            to be passed to :meth:`refresh`, if it is rejected.
+        """
+        generation = self._generation
+        if self.is_stale():
+            return self.refresh(generation)
+        return generation
+
+    def refresh(self, generation: Optional[int] = None) -> int:
+        """
+        Fetch a new token.
+
+        :param generation: The generation of the rejected token.
+            If given and a newer token has been fetched meanwhile,
+            no new token is fetched.
+        :return: The generation of the new token.
+        """
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                # Another thread already refreshed the token
+                return self._generation
+            token = self._fetch_token()
+            self._generation += 1
+            self._expires_at = _get_expires_at(token)
+            self._schedule_refresh()
+            return self._generation
+
+    def close(self):
+        """Stop refreshing the token in the background."""
+        with self._lock:
+            self._closed = True
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    def _schedule_refresh(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._refresh_in_background or self._closed or self._expires_at is None:
+            return
+        delay = max(0.0, self._expires_at - self._refresh_margin - time.time())
+        # Pass a weak reference, so the timer does not keep this object alive
+        self._timer = threading.Timer(
+            delay, _refresh_in_background, args=(weakref.ref(self), self._generation)
+        )
+        self._timer.daemon = True
+        self._timer.start()
+
+    def __getstate__(self):
+        return dict(
+            fetch_token=self._fetch_token,
+            refresh_margin=self._refresh_margin,
+            refresh_in_background=self._refresh_in_background,
+        )
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+
+def _refresh_in_background(
+    token_manager_ref: "weakref.ref[TokenManager]", generation: int
+):
+    token_manager = token_manager_ref()
+    if token_manager is None or token_manager._closed:
+        return
+    try:
+        token_manager.refresh(generation)
+    except Exception as e:
+        # Next request will retry
+        LOG.warning(f"failed to refresh SentinelHub access token: {e}")
+
+
+def _get_expires_at(token: Any) -> Optional[float]:
+    if isinstance(token, dict):
+        expires_at = token.get("expires_at")
+        if isinstance(expires_at, (int, float)):
+            return float(expires_at)
+    return None
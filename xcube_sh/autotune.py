@@ -0,0 +1,311 @@
+# Copyright © 2022-2024 by the xcube development team and contributors
+# Permissions are hereby granted under the terms of the MIT License:
+# https://opensource.org/licenses/MIT.
+
+import sys
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .chunkstore import SentinelHubChunkStore
+from .config import CubeConfig
+from .constants import BAND_DATA_ARRAY_NAME
+from .constants import DEFAULT_TUNING_NUM_PROBES
+from .constants import DEFAULT_TUNING_TILE_SIZES
+from .constants import LOG
+from .sentinelhub import SentinelHub
+
+_OBJECTIVES = "duration", "processing_units"
+
+
+def tune_tile_size(
+    cube_config: CubeConfig,
+    tile_sizes: Sequence[Union[int, Tuple[int, int]]] = DEFAULT_TUNING_TILE_SIZES,
+    num_probes: int = DEFAULT_TUNING_NUM_PROBES,
+    objective: str = "duration",
+    sentinel_hub: SentinelHub = None,
+    **sh_kwargs,
+) -> "TileSizeTuning":
+    """
+    Find the tile size for which the cube given by *cube_config*
+    is fetched most efficiently.
+
+    For every tile size, *num_probes* chunks of every band are fetched
+    from SentinelHub. The observed request durations and data sizes
+    are used to estimate the time and the processing units needed
+    to fetch the entire cube. The catalog is queried only once,
+    as the time ranges of the cube do not depend on the tile size.
+
+    Usage::
+
+        tuning = tune_tile_size(cube_config)
+        tuning.dump()
+        cube = open_cube(tuning.cube_config)
+
+    :param cube_config: The cube configuration.
+    :param tile_sizes: The tile sizes to be probed, either
+        as single integers or as tuples (width, height).
+    :param num_probes: Number of chunks fetched per band and tile size.
+    :param objective: What to minimize, either "duration",
+        the estimated time to fetch the cube, or "processing_units",
+        the estimated processing units charged by SentinelHub.
+    :param sentinel_hub: Optional instance of SentinelHub,
+        the object representing the Sentinel Hub API.
+    :param sh_kwargs: Optional keyword arguments passed to the
+        SentinelHub constructor. Only valid if
+         *sentinel_hub* is not given.
+    :return: The result of the tuning.
+    """
+    if sentinel_hub is None:
+        sentinel_hub = SentinelHub(**sh_kwargs)
+    elif sh_kwargs:
+        raise ValueError(
+            f"unexpected keyword-arguments:" f' {", ".join(sh_kwargs.keys())}'
+        )
+    if objective not in _OBJECTIVES:
+        raise ValueError(f"objective must be one of {_OBJECTIVES!r}")
+    if num_probes < 1:
+        raise ValueError("num_probes must be a positive integer")
+
+    # Resolve band names and time ranges once for all tile sizes
+    store = SentinelHubChunkStore(sentinel_hub, cube_config)
+    time_ranges = store.time_ranges
+    requested_size = cube_config.size
+    cube_config = store.cube_config
+
+    cube_configs: Dict[Tuple[int, int], CubeConfig] = {}
+    for tile_size in tile_sizes:
+        if isinstance(tile_size, int):
+            tile_size = tile_size, tile_size
+        config = CubeConfig.from_dict(
+            {**cube_config.to_dict(), "tile_size": tuple(tile_size)}
+        )
+        # Tile sizes are adjusted to small cubes, so they may coincide
+        cube_configs.setdefault(config.tile_size, config)
+
+    probes = []
+    for config in cube_configs.values():
+        probe = _probe_tile_size(
+            sentinel_hub, config, time_ranges, num_probes, requested_size
+        )
+        LOG.debug(f"probed tile size {probe.tile_size}: {probe}")
+        probes.append(probe)
+    return TileSizeTuning(probes, objective)
+
+
+class TileSizeProbe:
+    """
+    The result of probing a tile size.
+
+    Estimates refer to fetching the entire cube with the
+    probed tile size.
+    """
+
+    def __init__(
+        self,
+        cube_config: CubeConfig,
+        num_chunks: int,
+        chunk_size: int,
+        processing_units: float,
+        pixel_efficiency: float,
+        durations: Sequence[float],
+        data_sizes: Sequence[int],
+        num_failures: int,
+        max_concurrency: int,
+    ):
+        self.cube_config = cube_config
+        self.tile_size = cube_config.tile_size
+        self.num_chunks = num_chunks
+        self.num_probes = len(durations)
+        self.num_failures = num_failures
+        self.pixel_efficiency = pixel_efficiency
+        self.processing_units = processing_units * num_chunks
+        if durations:
+            # Guard against zero durations of very fast services
+            total_duration = max(sum(durations), sys.float_info.epsilon)
+            self.duration_median = float(np.median(durations))
+            self.bytes_per_second = float(sum(data_sizes) / total_duration)
+            self.pixels_per_second = chunk_size * len(durations) / total_duration
+            self.estimated_duration = (
+                num_chunks * self.duration_median / max_concurrency
+            )
+        else:
+            self.duration_median = None
+            self.bytes_per_second = None
+            self.pixels_per_second = None
+            self.estimated_duration = None
+
+    def __repr__(self):
+        return (
+            f"TileSizeProbe(tile_size={self.tile_size!r},"
+            f" estimated_duration={self.estimated_duration!r},"
+            f" processing_units={self.processing_units!r})"
+        )
+
+
+class TileSizeTuning:
+    """
+    The result of :func:`tune_tile_size`.
+
+    :param probes: The results of the probed tile sizes.
+    :param objective: What is minimized, either
+        "duration" or "processing_units".
+    """
+
+    def __init__(self, probes: List[TileSizeProbe], objective: str = "duration"):
+        self.probes = probes
+        self.objective = objective
+
+    @property
+    def best(self) -> Optional[TileSizeProbe]:
+        """
+        The probe of the best tile size, or None,
+        if all probes failed.
+        """
+        probes = [
+            probe for probe in self.probes if probe.estimated_duration is not None
+        ]
+        if not probes:
+            return None
+        if self.objective == "processing_units":
+            return min(probes, key=lambda p: (p.processing_units, p.estimated_duration))
+        return min(probes, key=lambda p: (p.estimated_duration, p.processing_units))
+
+    @property
+    def tile_size(self) -> Optional[Tuple[int, int]]:
+        """The best tile size, or None, if all probes failed."""
+        best = self.best
+        return best.tile_size if best is not None else None
+
+    @property
+    def cube_config(self) -> Optional[CubeConfig]:
+        """
+        The cube configuration using the best tile size,
+        or None, if all probes failed.
+        """
+        best = self.best
+        return best.cube_config if best is not None else None
+
+    def dump(self, fp=None):
+        fp = fp if fp is not None else sys.stdout
+        best = self.best
+        fp.write(
+            f"{'Tile size':>12} {'Requests':>9} {'Median':>10}"
+            f" {'MB/s':>8} {'Est. time':>10} {'PU':>10} {'Pixels':>7}\n"
+        )
+        for probe in self.probes:
+            tile_size = "x".join(map(str, probe.tile_size))
+            if probe.estimated_duration is None:
+                fp.write(f"{tile_size:>12} {'failed':>9}\n")
+                continue
+            fp.write(
+                f"{tile_size:>12}"
+                f" {probe.num_chunks:>9}"
+                f" {probe.duration_median * 1000:>7.1f} ms"
+                f" {probe.bytes_per_second / 2**20:>8.2f}"
+                f" {probe.estimated_duration:>8.1f} s"
+                f" {probe.processing_units:>10.1f}"
+                f" {probe.pixel_efficiency:>6.0%}"
+                f"{' *' if probe is best else ''}\n"
+            )
+
+
+class _ProbeChunkStore(SentinelHubChunkStore):
+    """
+    A chunk store that uses the given time ranges
+    rather than querying the catalog.
+    """
+
+    def __init__(
+        self,
+        sentinel_hub: SentinelHub,
+        cube_config: CubeConfig,
+        time_ranges: List[Tuple[pd.Timestamp, pd.Timestamp]],
+        **kwargs,
+    ):
+        self._probe_time_ranges = time_ranges
+        super().__init__(sentinel_hub, cube_config, **kwargs)
+
+    def get_time_ranges(self) -> List[Tuple[pd.Timestamp, pd.Timestamp]]:
+        return list(self._probe_time_ranges)
+
+
+def _probe_tile_size(
+    sentinel_hub: SentinelHub,
+    cube_config: CubeConfig,
+    time_ranges: List[Tuple[pd.Timestamp, pd.Timestamp]],
+    num_probes: int,
+    requested_size: Tuple[int, int],
+) -> TileSizeProbe:
+    # Only the chunk fetches are observed and hence timed
+    observations = []
+    store = _ProbeChunkStore(
+        sentinel_hub,
+        cube_config,
+        time_ranges,
+        observer=lambda **kwargs: observations.append(kwargs),
+    )
+    cube_config = store.cube_config
+    if cube_config.four_d:
+        array_names = [BAND_DATA_ARRAY_NAME]
+        num_request_bands = len(cube_config.band_names)
+    else:
+        array_names = list(cube_config.band_names)
+        num_request_bands = 1
+
+    num_tiles_x, num_tiles_y = cube_config.num_tiles
+    num_times = len(store.time_ranges)
+    num_chunks = num_tiles_x * num_tiles_y * num_times * len(array_names)
+
+    # Spread probes over time and fetch them from a central tile.
+    # Like Zarr, fetch the chunks of each array concurrently.
+    time_indexes = sorted(
+        set(np.linspace(0, num_times - 1, num=num_probes).round().astype(int))
+    )
+    spatial_index = (num_tiles_y // 2, num_tiles_x // 2)
+    if cube_config.four_d:
+        spatial_index += (0,)
+    for array_name in array_names:
+        keys = [
+            array_name + "/" + ".".join(map(str, (time_index, *spatial_index)))
+            for time_index in time_indexes
+        ]
+        store.getitems(keys, contexts={})
+
+    durations = [o["duration"] for o in observations if o["exception"] is None]
+    data_sizes = [o["data_size"] for o in observations if o["exception"] is None]
+
+    tile_width, tile_height = cube_config.tile_size
+    width, height = cube_config.size
+    requested_width, requested_height = requested_size
+    dtype = np.dtype(store.get_band_encoding(array_names[0])["dtype"])
+    return TileSizeProbe(
+        cube_config,
+        num_chunks=num_chunks,
+        chunk_size=tile_width * tile_height * num_request_bands,
+        processing_units=_get_processing_units(
+            tile_width, tile_height, num_request_bands, dtype
+        ),
+        pixel_efficiency=min(
+            1.0, (requested_width * requested_height) / (width * height)
+        ),
+        durations=durations,
+        data_sizes=data_sizes,
+        num_failures=len(observations) - len(durations),
+        max_concurrency=store.max_concurrent_fetches,
+    )
+
+
+def _get_processing_units(
+    width: int, height: int, num_bands: int, dtype: np.dtype
+) -> float:
+    """
+    Estimate the processing units of a Process API request,
+    see https://docs.sentinel-hub.com/api/latest/api/overview/processing-unit/.
+    """
+    area_factor = max(0.01, width * height / (512 * 512))
+    band_factor = num_bands / 3
+    # 32-bit float outputs count twice
+    output_factor = 2 if dtype.kind == "f" and dtype.itemsize >= 4 else 1
+    return max(0.005, area_factor * band_factor * output_factor)
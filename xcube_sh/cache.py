@@ -0,0 +1,584 @@
+# Copyright © 2022-2024 by the xcube development team and contributors
+# Permissions are hereby granted under the terms of the MIT License:
+# https://opensource.org/licenses/MIT.
+
+import hashlib
+import json
+import os
+import os.path
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+import shapely.geometry
+import zarr
+
+from .constants import DEFAULT_CATALOG_CACHE_TTL
+from .constants import DEFAULT_MAX_DISK_CACHE_SIZE
+from .constants import LOG
+from .manifest import CubeManifest
+
+_CHUNK_FILE_EXT = ".chunk"
+_CATALOG_FILE_EXT = ".json"
+_MANIFEST_FILE_EXT = ".manifest"
+
+BBox = Tuple[float, float, float, float]
+TimeRange = Tuple[Optional[pd.Timestamp], Optional[pd.Timestamp]]
+
+
+class DiskChunkCache:
+    """
+    A persistent, size-bounded cache for chunk data.
+
+    Chunks are stored as individual files named by their fingerprint,
+    e.g., as computed by :meth:`SentinelHub.get_request_fingerprint`.
+    Files are written atomically, so the cache directory may be
+    shared by multiple processes, e.g., dask workers.
+    If the total size of the cached chunks exceeds *max_size*,
+    the least recently used chunks are removed.
+
+    :param cache_dir: The cache directory. Created if it does not exist.
+    :param max_size: Maximum cache size in bytes.
+    """
+
+    def __init__(self, cache_dir: str, max_size: int = DEFAULT_MAX_DISK_CACHE_SIZE):
+        self._cache_dir = os.path.abspath(os.path.expanduser(cache_dir))
+        self._max_size = max_size
+        self._lock = threading.Lock()
+        os.makedirs(self._cache_dir, exist_ok=True)
+        self._size = self._get_total_size()
+
+    @property
+    def cache_dir(self) -> str:
+        return self._cache_dir
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size
+
+    @property
+    def size(self) -> int:
+        """The current cache size in bytes as known to this instance."""
+        return self._size
+
+    def get(self, fingerprint: str) -> Optional[bytes]:
+        """
+        Get the chunk data for given *fingerprint*.
+
+        :param fingerprint: The chunk's fingerprint.
+        :return: The chunk data or None, if it is not cached.
+        """
+        path = self._get_chunk_path(fingerprint)
+        try:
+            with open(path, "rb") as fp:
+                data = fp.read()
+            # Record access time for LRU eviction
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return data
+
+    def put(self, fingerprint: str, data: bytes):
+        """
+        Put the chunk *data* for given *fingerprint* into the cache.
+
+        :param fingerprint: The chunk's fingerprint.
+        :param data: The chunk data.
+        """
+        path = self._get_chunk_path(fingerprint)
+        dir_path = os.path.dirname(path)
+        os.makedirs(dir_path, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=dir_path, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fp:
+                fp.write(data)
+            try:
+                # An overwritten chunk no longer counts
+                replaced_size = os.path.getsize(path)
+            except FileNotFoundError:
+                replaced_size = 0
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        with self._lock:
+            self._size += len(data) - replaced_size
+            if self._size > self._max_size:
+                self._evict()
+
+    def clear(self):
+        """Remove all cached chunks."""
+        with self._lock:
+            for path, _, _ in self._get_chunk_files():
+                self._remove_file(path)
+            self._size = 0
+
+    def _evict(self):
+        # Rescan, because the cache directory may be shared
+        chunk_files = sorted(self._get_chunk_files(), key=lambda f: f[2])
+        size = sum(f[1] for f in chunk_files)
+        for path, file_size, _ in chunk_files:
+            if size <= self._max_size:
+                break
+            if self._remove_file(path):
+                size -= file_size
+        self._size = size
+
+    def _get_total_size(self) -> int:
+        return sum(f[1] for f in self._get_chunk_files())
+
+    def _get_chunk_files(self):
+        for dir_path, _, file_names in os.walk(self._cache_dir):
+            for file_name in file_names:
+                if file_name.endswith(_CHUNK_FILE_EXT):
+                    path = os.path.join(dir_path, file_name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    yield path, stat.st_size, stat.st_mtime
+
+    def _get_chunk_path(self, fingerprint: str) -> str:
+        return os.path.join(
+            self._cache_dir, fingerprint[:2], fingerprint + _CHUNK_FILE_EXT
+        )
+
+    @classmethod
+    def _remove_file(cls, path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            return False
+        except OSError as e:
+            LOG.warning(f"failed to remove cached chunk {path}: {e}")
+            return False
+
+    def __getstate__(self):
+        return dict(cache_dir=self._cache_dir, max_size=self._max_size)
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+
+class ConcurrentLRUStoreCache(zarr.LRUStoreCache):
+    """
+    Same as ``zarr.LRUStoreCache``, but reads the items missing in
+    the cache using a single call to the wrapped store's
+    ``getitems()``, rather than one by one, so that a
+    :class:`xcube_sh.chunkstore.RemoteStore` fetches them
+    concurrently.
+
+    :param store: The store to be wrapped.
+    :param max_size: Maximum cache size in bytes.
+    """
+
+    def getitems(
+        self, keys: Sequence[str], *, contexts: Mapping[str, Any] = None
+    ) -> Dict[str, Any]:
+        items = dict()
+        missing_keys = []
+        with self._mutex:
+            for key in keys:
+                try:
+                    items[key] = self._values_cache[key]
+                except KeyError:
+                    missing_keys.append(key)
+                else:
+                    self.hits += 1
+                    self._values_cache.move_to_end(key)
+        if not missing_keys:
+            return items
+        # Missing items are omitted and filled by Zarr
+        fetched_items = self._store.getitems(missing_keys, contexts=contexts or {})
+        with self._mutex:
+            self.misses += len(missing_keys)
+            for key, value in fetched_items.items():
+                if key not in self._values_cache:
+                    self._cache_value(key, value)
+        items.update(fetched_items)
+        return items
+
+
+class CatalogCache:
+    """
+    A cache for the results of SentinelHub catalog searches
+    that expire after *ttl* seconds.
+
+    Results are also used for searches whose bounding box and
+    time range are contained in the ones of a cached search.
+    The cached features are then filtered locally, which requires
+    them to include the "geometry" and "properties.datetime" fields.
+
+    :param ttl: Time to live of cached results in seconds.
+    :param cache_dir: Optional directory, in which results are
+        persisted. Created if it does not exist.
+        The directory may be shared by multiple processes.
+    """
+
+    def __init__(
+        self, ttl: float = DEFAULT_CATALOG_CACHE_TTL, cache_dir: Optional[str] = None
+    ):
+        self._ttl = ttl
+        self._cache_dir = (
+            os.path.abspath(os.path.expanduser(cache_dir)) if cache_dir else None
+        )
+        self._lock = threading.Lock()
+        self._entries: Dict[str, _CatalogEntry] = {}
+        self._known_files = set()
+        if self._cache_dir:
+            os.makedirs(self._cache_dir, exist_ok=True)
+
+    @property
+    def ttl(self) -> float:
+        return self._ttl
+
+    @property
+    def cache_dir(self) -> Optional[str]:
+        return self._cache_dir
+
+    def get(
+        self,
+        catalog_url: str,
+        collection_name: str,
+        bbox: Optional[BBox],
+        time_range: TimeRange,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Get the features found by a search.
+
+        :param catalog_url: The catalog URL.
+        :param collection_name: The collection name.
+        :param bbox: The bounding box in WGS84 coordinates, or None.
+        :param time_range: The UTC start and end time, each may be None.
+        :return: The features or None, if they are not cached.
+        """
+        query = _CatalogQuery(catalog_url, collection_name, bbox, time_range)
+        with self._lock:
+            self._load_entries()
+            self._remove_expired_entries()
+            entries = list(self._entries.values())
+        # Prefer the most specific entries
+        for entry in sorted(entries, key=lambda e: e.query.size):
+            features = entry.filter_features(query)
+            if features is not None:
+                return features
+        return None
+
+    def put(
+        self,
+        catalog_url: str,
+        collection_name: str,
+        bbox: Optional[BBox],
+        time_range: TimeRange,
+        features: List[Dict[str, Any]],
+    ):
+        """
+        Put the features found by a search into the cache.
+        The parameters are the same as for :meth:`get`.
+
+        :param features: The features.
+        """
+        query = _CatalogQuery(catalog_url, collection_name, bbox, time_range)
+        entry = _CatalogEntry(query, features, time.time())
+        entry_id = query.id
+        with self._lock:
+            self._entries[entry_id] = entry
+            if self._cache_dir:
+                self._write_entry(entry_id, entry)
+
+    def clear(self):
+        """Remove all cached results."""
+        with self._lock:
+            self._entries.clear()
+            if self._cache_dir:
+                for file_name in self._list_files():
+                    _remove_file(os.path.join(self._cache_dir, file_name))
+            self._known_files.clear()
+
+    def _load_entries(self):
+        if not self._cache_dir:
+            return
+        for file_name in self._list_files():
+            if file_name in self._known_files:
+                continue
+            self._known_files.add(file_name)
+            path = os.path.join(self._cache_dir, file_name)
+            try:
+                with open(path) as fp:
+                    entry = _CatalogEntry.from_dict(json.load(fp))
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                LOG.warning(f"failed to read cached catalog results {path}: {e}")
+                continue
+            entry_id = file_name[: -len(_CATALOG_FILE_EXT)]
+            current_entry = self._entries.get(entry_id)
+            if current_entry is None or current_entry.created < entry.created:
+                self._entries[entry_id] = entry
+
+    def _remove_expired_entries(self):
+        min_created = time.time() - self._ttl
+        for entry_id, entry in list(self._entries.items()):
+            if entry.created < min_created:
+                del self._entries[entry_id]
+                if self._cache_dir:
+                    file_name = entry_id + _CATALOG_FILE_EXT
+                    _remove_file(os.path.join(self._cache_dir, file_name))
+                    self._known_files.discard(file_name)
+
+    def _write_entry(self, entry_id: str, entry: "_CatalogEntry"):
+        file_name = entry_id + _CATALOG_FILE_EXT
+        fd, temp_path = tempfile.mkstemp(dir=self._cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as fp:
+                json.dump(entry.to_dict(), fp)
+            os.replace(temp_path, os.path.join(self._cache_dir, file_name))
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self._known_files.add(file_name)
+
+    def _list_files(self) -> List[str]:
+        return [
+            file_name
+            for file_name in os.listdir(self._cache_dir)
+            if file_name.endswith(_CATALOG_FILE_EXT)
+        ]
+
+    def __getstate__(self):
+        return dict(ttl=self._ttl, cache_dir=self._cache_dir)
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+
+class CubeManifestCache:
+    """
+    A persistent cache for cube manifests, keyed by
+    :attr:`CubeManifest.key`.
+
+    Manifests include the time ranges found in the catalog.
+    If a cube's time range is still open, newly acquired
+    scenes are only considered after the manifest expired.
+
+    :param cache_dir: The cache directory. Created if it does not exist.
+        The directory may be shared by multiple processes.
+    :param ttl: Optional time to live of manifests in seconds.
+        If not given, manifests do not expire.
+    """
+
+    def __init__(self, cache_dir: str, ttl: Optional[float] = None):
+        self._cache_dir = os.path.abspath(os.path.expanduser(cache_dir))
+        self._ttl = ttl
+        os.makedirs(self._cache_dir, exist_ok=True)
+
+    @property
+    def cache_dir(self) -> str:
+        return self._cache_dir
+
+    @property
+    def ttl(self) -> Optional[float]:
+        return self._ttl
+
+    def get(self, key: str) -> Optional[CubeManifest]:
+        """
+        Get the manifest for given *key*.
+
+        :param key: The manifest key, see :meth:`CubeManifest.new_key`.
+        :return: The manifest or None, if it is not cached or expired.
+        """
+        path = self._get_manifest_path(key)
+        try:
+            with open(path) as fp:
+                manifest = CubeManifest.from_dict(json.load(fp))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            LOG.warning(f"failed to read cached manifest {path}: {e}")
+            return None
+        if self._ttl is not None and manifest.created < time.time() - self._ttl:
+            _remove_file(path)
+            return None
+        return manifest
+
+    def put(self, manifest: CubeManifest):
+        """
+        Put *manifest* into the cache.
+
+        :param manifest: The manifest.
+        """
+        fd, temp_path = tempfile.mkstemp(dir=self._cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as fp:
+                json.dump(manifest.to_dict(), fp)
+            os.replace(temp_path, self._get_manifest_path(manifest.key))
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def clear(self):
+        """Remove all cached manifests."""
+        for file_name in os.listdir(self._cache_dir):
+            if file_name.endswith(_MANIFEST_FILE_EXT):
+                _remove_file(os.path.join(self._cache_dir, file_name))
+
+    def _get_manifest_path(self, key: str) -> str:
+        return os.path.join(self._cache_dir, key + _MANIFEST_FILE_EXT)
+
+    def __getstate__(self):
+        return dict(cache_dir=self._cache_dir, ttl=self._ttl)
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+
+class _CatalogQuery:
+    def __init__(
+        self,
+        catalog_url: str,
+        collection_name: str,
+        bbox: Optional[BBox],
+        time_range: TimeRange,
+    ):
+        self.catalog_url = catalog_url
+        self.collection_name = collection_name
+        self.bbox = tuple(map(float, bbox)) if bbox else None
+        start_time, end_time = time_range or (None, None)
+        self.time_range = (_to_utc_timestamp(start_time), _to_utc_timestamp(end_time))
+
+    @property
+    def id(self) -> str:
+        return hashlib.sha256(
+            json.dumps(self.to_dict(), sort_keys=True).encode("utf-8")
+        ).hexdigest()
+
+    @property
+    def size(self) -> Tuple[float, float]:
+        if self.bbox is None:
+            area = float("inf")
+        else:
+            x1, y1, x2, y2 = self.bbox
+            area = (x2 - x1) * (y2 - y1)
+        start_time, end_time = self.time_range
+        if start_time is None or end_time is None:
+            duration = float("inf")
+        else:
+            duration = (end_time - start_time).total_seconds()
+        return duration, area
+
+    def contains(self, other: "_CatalogQuery") -> bool:
+        if (
+            self.catalog_url != other.catalog_url
+            or self.collection_name != other.collection_name
+        ):
+            return False
+        if self.bbox is not None:
+            if other.bbox is None:
+                return False
+            x1, y1, x2, y2 = self.bbox
+            ox1, oy1, ox2, oy2 = other.bbox
+            if not (x1 <= ox1 and y1 <= oy1 and ox2 <= x2 and oy2 <= y2):
+                return False
+        start_time, end_time = self.time_range
+        other_start_time, other_end_time = other.time_range
+        if start_time is not None and (
+            other_start_time is None or other_start_time < start_time
+        ):
+            return False
+        if end_time is not None and (
+            other_end_time is None or other_end_time > end_time
+        ):
+            return False
+        return True
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(
+            catalog_url=self.catalog_url,
+            collection_name=self.collection_name,
+            bbox=self.bbox,
+            time_range=[
+                t.isoformat() if t is not None else None for t in self.time_range
+            ],
+        )
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "_CatalogQuery":
+        return _CatalogQuery(
+            d["catalog_url"], d["collection_name"], d["bbox"], d["time_range"]
+        )
+
+
+class _CatalogEntry:
+    def __init__(
+        self, query: _CatalogQuery, features: List[Dict[str, Any]], created: float
+    ):
+        self.query = query
+        self.features = features
+        self.created = created
+
+    def filter_features(self, query: _CatalogQuery) -> Optional[List[Dict[str, Any]]]:
+        """
+        Get the features of this entry that match *query*, or None,
+        if *query* is not contained in the query of this entry.
+        """
+        if not self.query.contains(query):
+            return None
+        filter_bbox = query.bbox != self.query.bbox
+        filter_time = query.time_range != self.query.time_range
+        if not filter_bbox and not filter_time:
+            return list(self.features)
+        start_time, end_time = query.time_range
+        features = []
+        query_box = shapely.geometry.box(*query.bbox) if filter_bbox else None
+        for feature in self.features:
+            if filter_bbox:
+                # The catalog filters by geometry rather than bbox
+                geometry = feature.get("geometry")
+                if not geometry:
+                    # Cannot filter locally
+                    return None
+                if not shapely.geometry.shape(geometry).intersects(query_box):
+                    continue
+            if filter_time:
+                datetime = feature.get("properties", {}).get("datetime")
+                if not datetime:
+                    # Cannot filter locally
+                    return None
+                datetime = pd.to_datetime(datetime, utc=True)
+                if (start_time is not None and datetime < start_time) or (
+                    end_time is not None and datetime > end_time
+                ):
+                    continue
+            features.append(feature)
+        return features
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(
+            query=self.query.to_dict(), features=self.features, created=self.created
+        )
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "_CatalogEntry":
+        return _CatalogEntry(
+            _CatalogQuery.from_dict(d["query"]), d["features"], d["created"]
+        )
+
+
+def _to_utc_timestamp(t: Optional[Union[str, pd.Timestamp]]) -> Optional[pd.Timestamp]:
+    if t is None:
+        return None
+    t = pd.Timestamp(t)
+    return t.tz_localize("UTC") if t.tz is None else t.tz_convert("UTC")
+
+
+def _remove_file(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        LOG.warning(f"failed to remove cached file {path}: {e}")
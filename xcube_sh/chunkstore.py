@@ -2,22 +2,32 @@
 # Permissions are hereby granted under the terms of the MIT License:
 # https://opensource.org/licenses/MIT.
 
+import collections
 import itertools
 import json
 import math
+import threading
 import time
+import zlib
 from abc import abstractmethod, ABCMeta
-from collections.abc import MutableMapping
-from typing import Iterator, Any, List, Dict, Tuple, Callable, Iterable, KeysView
+from concurrent.futures import ThreadPoolExecutor
+from collections.abc import KeysView
+from typing import Iterator, Any, List, Dict, Tuple, Callable, Iterable
+from typing import Optional, Sequence, Union, Mapping, Hashable
 
 import numpy as np
 import pandas as pd
 import pyproj
 from numcodecs import Blosc
+from zarr.storage import BaseStore
 
+from .cache import DiskChunkCache
 from .config import CubeConfig
 from .constants import BAND_DATA_ARRAY_NAME
 from .constants import CRS_ID_TO_URI
+from .constants import DEFAULT_MAX_CONCURRENT_REQUESTS
+from .manifest import CubeManifest
+from .sentinelhub import DataRequestTemplate
 from .sentinelhub import SentinelHub
 from .sentinelhub import SentinelHubError
 
@@ -29,43 +39,79 @@ _STATIC_ARRAY_COMPRESSOR_CONFIG = dict(id="blosc", **_STATIC_ARRAY_COMPRESSOR_PA
 
 _STATIC_ARRAY_COMPRESSOR = Blosc(**_STATIC_ARRAY_COMPRESSOR_PARAMS)
 
+# Maximum number of tiles kept by a _TileBuffer
+_DEFAULT_TILE_BUFFER_SIZE = 64
+
 
 def _dict_to_bytes(d: Dict) -> bytes:
     return _str_to_bytes(json.dumps(d, indent=2))
 
 
-def _bytes_to_dict(b: bytes) -> Dict:
-    return json.loads(_bytes_to_str(b))
-
-
 def _str_to_bytes(s: str):
     return bytes(s, encoding="utf-8")
 
 
-def _bytes_to_str(b: bytes) -> str:
-    return b.decode("utf-8")
+def _to_datetime64_array(timestamps: Sequence[pd.Timestamp]) -> np.ndarray:
+    """
+    Convert timestamps into a ``datetime64[ns]`` array.
+    Timezones are stripped, because numpy datetimes
+    do not support them.
+    """
+    index = pd.DatetimeIndex(timestamps)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.values
 
 
-class RemoteStore(MutableMapping, metaclass=ABCMeta):
+class RemoteStore(BaseStore, metaclass=ABCMeta):
     """
     A remote Zarr Store.
 
+    Multiple chunks requested at once by Zarr using
+    :meth:`getitems` are fetched concurrently.
+
     :param cube_config: Cube configuration.
     :param observer: An optional callback function called when remote
-        requests are mode: observer(**kwargs).
+        requests are mode: observer(**kwargs). The keyword arguments
+        are *band_name*, *chunk_index*, *bbox*, *time_range*,
+        *duration* in seconds, *data_size* of the received chunk
+        in bytes, and *exception*, if the request failed.
     :param trace_store_calls: Whether store calls shall be
         printed (for debugging).
+    :param manifest: Optional manifest of the cube. If given,
+        time ranges and metadata are taken from the manifest.
     """
 
+    _writeable = False
+    _erasable = False
+
     def __init__(
         self,
         cube_config: CubeConfig,
         observer: Callable = None,
         trace_store_calls=False,
+        manifest: CubeManifest = None,
     ):
         self._cube_config = cube_config
         self._observers = [observer] if observer is not None else []
         self._trace_store_calls = trace_store_calls
+
+        # setup Virtual File System (vfs)
+        self._vfs: Dict[str, bytes] = {}
+        # Index of the vfs: directory key -> names of its entries
+        self._vfs_index: Dict[str, List[str]] = {}
+        # Metadata documents of the vfs (.zgroup, .zattrs, .zarray)
+        # kept as dicts, so they can be consolidated without parsing
+        self._metadata: Dict[str, Dict[str, Any]] = {}
+        # Chunk grids of remote arrays, the number of chunks
+        # in each dimension. Chunk keys are resolved on demand.
+        self._chunk_grids: Dict[str, Tuple[int, ...]] = {}
+
+        if manifest is not None:
+            self._time_ranges = list(manifest.time_ranges)
+            self._add_manifest_entries(manifest)
+            return
+
         self._time_ranges = self.get_time_ranges()
 
         if not self._time_ranges:
@@ -83,33 +129,18 @@ class RemoteStore(MutableMapping, metaclass=ABCMeta):
 
         crs = pyproj.CRS.from_string(cube_config.crs)
 
-        def time_stamp_to_str(ts: pd.Timestamp) -> str:
-            """
-            Convert to ISO string and strip timezone.
-            Used to create numpy datetime64 arrays.
-            We cannot create directly from pd.Timestamp because Numpy doesn't
-            like parsing timezones anymore.
-            """
-            ts_str: str = ts.isoformat()
-            if ts_str[-1] == "Z":
-                return ts_str[0:-1]
-            try:
-                i = ts_str.rindex("+")
-                return ts_str[0:i]
-            except ValueError:
-                return ts_str
-
-        t_array = np.array(
-            [time_stamp_to_str(s + 0.5 * (e - s)) for s, e in self._time_ranges],
-            dtype="datetime64[s]",
-        ).astype(np.int64)
-        t_bnds_array = np.array(
-            [
-                [time_stamp_to_str(s), time_stamp_to_str(e)]
-                for s, e in self._time_ranges
-            ],
-            dtype="datetime64[s]",
-        ).astype(np.int64)
+        start_times = _to_datetime64_array([s for s, _ in self._time_ranges])
+        end_times = _to_datetime64_array([e for _, e in self._time_ranges])
+        t_array = (
+            (start_times + (end_times - start_times) / 2)
+            .astype("datetime64[s]")
+            .astype(np.int64)
+        )
+        t_bnds_array = (
+            np.stack([start_times, end_times], axis=1)
+            .astype("datetime64[s]")
+            .astype(np.int64)
+        )
 
         time_coverage_start = self._time_ranges[0][0]
         time_coverage_end = self._time_ranges[-1][1]
@@ -150,11 +181,8 @@ class RemoteStore(MutableMapping, metaclass=ABCMeta):
         if processing_level:
             global_attrs.update(processing_level=processing_level)
 
-        # setup Virtual File System (vfs)
-        self._vfs = {
-            ".zgroup": _dict_to_bytes(dict(zarr_format=2)),
-            ".zattrs": _dict_to_bytes(global_attrs),
-        }
+        self._add_metadata_entry(".zgroup", dict(zarr_format=2))
+        self._add_metadata_entry(".zattrs", global_attrs)
 
         if crs.is_geographic:
             x_name, y_name = "lon", "lat"
@@ -239,7 +267,7 @@ class RemoteStore(MutableMapping, metaclass=ABCMeta):
             self._add_remote_array(
                 BAND_DATA_ARRAY_NAME,
                 [t_array.size, height, width, num_bands],
-                [1, tile_height, tile_width, num_bands],
+                [self.time_chunk_size, tile_height, tile_width, num_bands],
                 band_encoding,
                 {**band_attrs, **crs_var_attrs},
             )
@@ -256,7 +284,7 @@ class RemoteStore(MutableMapping, metaclass=ABCMeta):
                 self._add_remote_array(
                     band_name,
                     [t_array.size, height, width],
-                    [1, tile_height, tile_width],
+                    [self.time_chunk_size, tile_height, tile_width],
                     band_encoding,
                     {**band_attrs, **crs_var_attrs},
                 )
@@ -274,6 +302,21 @@ class RemoteStore(MutableMapping, metaclass=ABCMeta):
             time_now = time_next
         return time_ranges
 
+    @property
+    def max_concurrent_fetches(self) -> int:
+        """
+        The maximum number of chunks fetched concurrently
+        by :meth:`getitems`.
+        """
+        return DEFAULT_MAX_CONCURRENT_REQUESTS
+
+    @property
+    def time_chunk_size(self) -> int:
+        """
+        The number of time steps per chunk.
+        """
+        return 1
+
     def add_observer(self, observer: Callable):
         """
         Add a request observer.
@@ -283,6 +326,36 @@ class RemoteStore(MutableMapping, metaclass=ABCMeta):
         """
         self._observers.append(observer)
 
+    @property
+    def manifest_key(self) -> str:
+        """
+        The key of this store's manifest,
+        see :meth:`CubeManifest.new_key`.
+        """
+        return CubeManifest.new_key(self._cube_config, self.time_chunk_size)
+
+    def get_manifest(self) -> CubeManifest:
+        """
+        Get a manifest of this store, which can be used
+        to open the same cube again without computing
+        its time ranges and metadata.
+        """
+        metadata = self._get_consolidated_metadata()
+        static_chunks = {
+            key: value
+            for key, value in self._vfs.items()
+            if value and key != ".zmetadata" and key not in self._metadata
+        }
+        return CubeManifest(
+            self.manifest_key,
+            self._cube_config,
+            self.time_chunk_size,
+            list(self._time_ranges),
+            dict(self._chunk_grids),
+            metadata,
+            static_chunks,
+        )
+
     @abstractmethod
     def get_band_encoding(self, band_name: str) -> Dict[str, Any]:
         """
@@ -325,6 +398,20 @@ class RemoteStore(MutableMapping, metaclass=ABCMeta):
             end_time += self.cube_config.time_tolerance
         return start_time, end_time
 
+    def _get_time_indexes(self, time_chunk_index: int) -> range:
+        """Get the indexes of the time steps of a time chunk."""
+        time_chunk_size = self.time_chunk_size
+        start = time_chunk_index * time_chunk_size
+        return range(start, min(start + time_chunk_size, len(self._time_ranges)))
+
+    def _request_chunk_time_range(
+        self, time_chunk_index: int
+    ) -> Tuple[pd.Timestamp, pd.Timestamp]:
+        time_indexes = self._get_time_indexes(time_chunk_index)
+        start_time, _ = self.request_time_range(time_indexes[0])
+        _, end_time = self.request_time_range(time_indexes[-1])
+        return start_time, end_time
+
     def _add_static_array(self, name: str, array: np.ndarray, attrs: Dict):
         shape = list(map(int, array.shape))
         dtype = str(array.dtype.str)
@@ -340,11 +427,12 @@ class RemoteStore(MutableMapping, metaclass=ABCMeta):
             "order": order,
         }
         chunk_key = ".".join(["0"] * array.ndim)
-        self._vfs[name] = _str_to_bytes("")
-        self._vfs[name + "/.zarray"] = _dict_to_bytes(array_metadata)
-        self._vfs[name + "/.zattrs"] = _dict_to_bytes(attrs)
-        self._vfs[name + "/" + chunk_key] = _STATIC_ARRAY_COMPRESSOR.encode(
-            array.tobytes(order=order)
+        self._add_vfs_entry(name, _str_to_bytes(""))
+        self._add_metadata_entry(name + "/.zarray", array_metadata)
+        self._add_metadata_entry(name + "/.zattrs", attrs)
+        self._add_vfs_entry(
+            name + "/" + chunk_key,
+            _STATIC_ARRAY_COMPRESSOR.encode(array.tobytes(order=order)),
         )
 
     def _add_remote_array(
@@ -365,20 +453,76 @@ class RemoteStore(MutableMapping, metaclass=ABCMeta):
             order="C",
         )
         array_metadata.update(encoding)
-        self._vfs[name] = _str_to_bytes("")
-        self._vfs[name + "/.zarray"] = _dict_to_bytes(array_metadata)
-        self._vfs[name + "/.zattrs"] = _dict_to_bytes(attrs)
-        nums = np.array(shape) // np.array(chunks)
-        indexes = itertools.product(*tuple(map(range, map(int, nums))))
-        for index in indexes:
-            filename = ".".join(map(str, index))
-            # noinspection PyTypeChecker
-            self._vfs[name + "/" + filename] = name, index
+        self._add_vfs_entry(name, _str_to_bytes(""))
+        self._add_metadata_entry(name + "/.zarray", array_metadata)
+        self._add_metadata_entry(name + "/.zattrs", attrs)
+        # Last chunks may be partial
+        nums = -(-np.array(shape) // np.array(chunks))
+        self._chunk_grids[name] = tuple(map(int, nums))
+
+    def _add_manifest_entries(self, manifest: CubeManifest):
+        if manifest.time_chunk_size != self.time_chunk_size:
+            raise ValueError(
+                f"time_chunk_size {self.time_chunk_size} does not match"
+                f" time chunk size {manifest.time_chunk_size} of manifest"
+            )
+        for key, value in manifest.metadata["metadata"].items():
+            dir_key, _, _ = key.rpartition("/")
+            if dir_key and dir_key not in self._vfs:
+                self._add_vfs_entry(dir_key, _str_to_bytes(""))
+            self._add_metadata_entry(key, value)
+        for key, value in manifest.static_chunks.items():
+            self._add_vfs_entry(key, value)
+        self._chunk_grids.update(manifest.chunk_grids)
+        self._consolidate_metadata()
+
+    def _add_metadata_entry(self, key: str, value: Dict[str, Any]):
+        self._metadata[key] = value
+        self._add_vfs_entry(key, _dict_to_bytes(value))
+
+    def _add_vfs_entry(self, key: str, value: bytes):
+        if key not in self._vfs:
+            dir_key, _, name = key.rpartition("/")
+            self._vfs_index.setdefault(dir_key, []).append(name)
+        self._vfs[key] = value
+
+    def _resolve_chunk_key(self, key: str) -> Optional[Tuple[str, Tuple[int, ...]]]:
+        """
+        Resolve *key* into the name and the chunk index of a
+        remote array. Return None if *key* is not a valid chunk key.
+        """
+        name, sep, filename = key.rpartition("/")
+        nums = self._chunk_grids.get(name) if sep else None
+        if nums is None:
+            return None
+        try:
+            index = tuple(map(int, filename.split(".")))
+        except ValueError:
+            return None
+        if (
+            len(index) != len(nums)
+            or not all(0 <= i < n for i, n in zip(index, nums))
+            or ".".join(map(str, index)) != filename
+        ):
+            return None
+        return name, index
+
+    def _iter_chunk_filenames(self, name: str) -> Iterator[str]:
+        indexes = itertools.product(*map(range, self._chunk_grids[name]))
+        return (".".join(map(str, index)) for index in indexes)
+
+    def _get_num_chunks(self) -> int:
+        return sum(math.prod(nums) for nums in self._chunk_grids.values())
 
     @property
     def cube_config(self) -> CubeConfig:
         return self._cube_config
 
+    @property
+    def time_ranges(self) -> List[Tuple[pd.Timestamp, pd.Timestamp]]:
+        """The time ranges of the cube's time slices."""
+        return list(self._time_ranges)
+
     def _fetch_chunk(
         self, key: str, band_name: str, chunk_index: Tuple[int, ...]
     ) -> bytes:
@@ -388,7 +532,7 @@ class RemoteStore(MutableMapping, metaclass=ABCMeta):
             time_index, y_chunk_index, x_chunk_index = chunk_index
 
         request_bbox = self.request_bbox(x_chunk_index, y_chunk_index)
-        request_time_range = self.request_time_range(time_index)
+        request_time_range = self._request_chunk_time_range(time_index)
 
         t0 = time.perf_counter()
         try:
@@ -412,6 +556,7 @@ class RemoteStore(MutableMapping, metaclass=ABCMeta):
                 bbox=request_bbox,
                 time_range=request_time_range,
                 duration=duration,
+                data_size=len(chunk_data) if chunk_data is not None else None,
                 exception=exception,
             )
 
@@ -436,11 +581,64 @@ class RemoteStore(MutableMapping, metaclass=ABCMeta):
         :param band_name: Band name.
         :param chunk_index: 3D chunk index (time, y, x).
         :param bbox: Requested bounding box in coordinate units of the CRS.
-        :param time_range: Requested time range.
+        :param time_range: Requested time range. If :attr:`time_chunk_size`
+            is greater than one, this is the time range spanning all
+            time steps of the chunk.
         :return: chunk data as raw bytes.
         """
         pass
 
+    def get_chunk_group_key(
+        self, band_name: str, chunk_index: Tuple[int, ...]
+    ) -> Optional[Hashable]:
+        """
+        Get a key for the group of chunks of the same tile that can be
+        fetched at once using :meth:`fetch_chunks`. Chunks of different
+        tiles are never grouped.
+
+        The default implementation returns None, so chunks
+        are not grouped.
+
+        :param band_name: Band name.
+        :param chunk_index: The chunk index.
+        :return: A group key or None, if the chunk
+            cannot be fetched with others.
+        """
+        return None
+
+    def fetch_chunks(
+        self,
+        band_names: Dict[str, str],
+        chunk_index: Tuple[int, ...],
+        bbox: Tuple[float, float, float, float],
+        time_range: Tuple[pd.Timestamp, pd.Timestamp],
+    ) -> Dict[str, bytes]:
+        """
+        Fetch the chunks of multiple bands of the same tile from remote.
+        Called for chunks that have the same group key,
+        see :meth:`get_chunk_group_key`.
+
+        The default implementation calls :meth:`fetch_chunk`
+        for each chunk.
+
+        :param band_names: Mapping from the original chunk keys
+            being retrieved to their band names.
+        :param chunk_index: 3D chunk index (time, y, x) of the tile.
+        :param bbox: Requested bounding box in coordinate units of the CRS.
+        :param time_range: Requested time range.
+        :return: Mapping from chunk keys to chunk data as raw bytes.
+            Chunks that could not be fetched are omitted.
+        """
+        chunk_data = dict()
+        for key, band_name in band_names.items():
+            try:
+                chunk_data[key] = self.fetch_chunk(
+                    key, band_name, chunk_index, bbox=bbox, time_range=time_range
+                )
+            except KeyError:
+                pass
+        return chunk_data
+
     def _consolidate_metadata(self):
         # Consolidate metadata to suppress warning:  (#69)
         #
@@ -448,77 +646,173 @@ class RemoteStore(MutableMapping, metaclass=ABCMeta):
         # metadata, falling back to try reading non-consolidated
         # metadata. ...
         #
-        metadata = dict()
-        for k, v in self._vfs.items():
-            if (
-                k == ".zattrs"
-                or k.endswith("/.zattrs")
-                or k == ".zarray"
-                or k.endswith("/.zarray")
-                or k == ".zgroup"
-                or k.endswith("/.zgroup")
-            ):
-                metadata[k] = _bytes_to_dict(v)
-        self._vfs[".zmetadata"] = _dict_to_bytes(
-            dict(zarr_consolidated_format=1, metadata=metadata)
+        self._add_vfs_entry(
+            ".zmetadata", _dict_to_bytes(self._get_consolidated_metadata())
         )
 
+    def _get_consolidated_metadata(self) -> Dict[str, Any]:
+        # The registry holds one entry per group and array,
+        # so this is linear in the number of arrays
+        return dict(zarr_consolidated_format=1, metadata=dict(self._metadata))
+
     @property
     def _class_name(self):
         return self.__module__ + "." + self.__class__.__name__
 
     ##########################################################################
-    # Zarr Store (MutableMapping) implementation
+    # Zarr Store (BaseStore) implementation
     ##########################################################################
 
     def keys(self) -> KeysView[str]:
         if self._trace_store_calls:
             print(f"{self._class_name}.keys()")
-        return self._vfs.keys()
+        return KeysView(self)
 
-    def listdir(self, key: str) -> Iterable[str]:
+    def listdir(self, key: str = "") -> Iterable[str]:
         if self._trace_store_calls:
             print(f"{self._class_name}.listdir(key={key!r})")
-        if key == "":
-            return list((k for k in self._vfs.keys() if "/" not in k))
-        else:
-            prefix = key + "/"
-            start = len(prefix)
-            return list(
-                (
-                    k
-                    for k in self._vfs.keys()
-                    if k.startswith(prefix) and k.find("/", start) == -1
-                )
-            )
+        names = list(self._vfs_index.get(key, ()))
+        if key in self._chunk_grids:
+            names.extend(self._iter_chunk_filenames(key))
+        return names
 
     def getsize(self, key: str) -> int:
         if self._trace_store_calls:
             print(f"{self._class_name}.getsize(key={key!r})")
-        return len(self._vfs[key])
+        if key in self._vfs:
+            return len(self._vfs[key])
+        if self._resolve_chunk_key(key) is not None:
+            # Size of remote chunks is unknown
+            return -1
+        raise KeyError(key)
 
     def __iter__(self) -> Iterator[str]:
         if self._trace_store_calls:
             print(f"{self._class_name}.__iter__()")
-        return iter(self._vfs.keys())
+        yield from self._vfs.keys()
+        for name in self._chunk_grids.keys():
+            for filename in self._iter_chunk_filenames(name):
+                yield name + "/" + filename
 
     def __len__(self) -> int:
         if self._trace_store_calls:
             print(f"{self._class_name}.__len__()")
-        return len(self._vfs.keys())
+        return len(self._vfs) + self._get_num_chunks()
 
     def __contains__(self, key) -> bool:
         if self._trace_store_calls:
             print(f"{self._class_name}.__contains__(key={key!r})")
-        return key in self._vfs
+        return key in self._vfs or self._resolve_chunk_key(key) is not None
 
     def __getitem__(self, key: str) -> bytes:
         if self._trace_store_calls:
             print(f"{self._class_name}.__getitem__(key={key!r})")
-        value = self._vfs[key]
-        if isinstance(value, tuple):
-            return self._fetch_chunk(key, *value)
-        return value
+        value = self._vfs.get(key)
+        if value is not None:
+            return value
+        chunk = self._resolve_chunk_key(key)
+        if chunk is None:
+            raise KeyError(key)
+        return self._fetch_chunk(key, *chunk)
+
+    def getitems(
+        self, keys: Sequence[str], *, contexts: Mapping[str, Any] = None
+    ) -> Dict[str, bytes]:
+        if self._trace_store_calls:
+            print(f"{self._class_name}.getitems(keys={keys!r})")
+        items = dict()
+        remote_chunks = dict()
+        for key in keys:
+            value = self._vfs.get(key)
+            if value is not None:
+                items[key] = value
+            else:
+                chunk = self._resolve_chunk_key(key)
+                if chunk is not None:
+                    remote_chunks[key] = chunk
+        if not remote_chunks:
+            return items
+        chunk_groups = self._group_chunks(remote_chunks)
+        max_workers = min(len(chunk_groups), self.max_concurrent_fetches)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(self._fetch_chunk_group, chunk_group)
+                for chunk_group in chunk_groups
+            ]
+            for future in futures:
+                try:
+                    items.update(future.result())
+                except KeyError:
+                    # Same as for __getitem__(): missing chunks
+                    # are filled by Zarr using the fill value.
+                    pass
+        return items
+
+    def _group_chunks(
+        self, chunks: Dict[str, Tuple[str, Tuple[int, ...]]]
+    ) -> List[Dict[str, Tuple[str, Tuple[int, ...]]]]:
+        """
+        Group *chunks* by :meth:`get_chunk_group_key`.
+        Groups are ordered by chunk index, so that neighbouring
+        chunks are fetched next to each other.
+        """
+        chunk_groups = collections.defaultdict(dict)
+        for key, (band_name, chunk_index) in chunks.items():
+            group_key = self.get_chunk_group_key(band_name, chunk_index)
+            if group_key is None:
+                # Ungrouped chunks are unique by their key
+                group_key = key
+            chunk_groups[(chunk_index[:3], group_key)][key] = band_name, chunk_index
+        return [
+            chunk_groups[group_key]
+            for group_key in sorted(chunk_groups.keys(), key=lambda k: k[0])
+        ]
+
+    def _fetch_chunk_group(
+        self, chunks: Dict[str, Tuple[str, Tuple[int, ...]]]
+    ) -> Dict[str, bytes]:
+        if len(chunks) == 1:
+            ((key, chunk),) = chunks.items()
+            return {key: self._fetch_chunk(key, *chunk)}
+
+        _, chunk_index = next(iter(chunks.values()))
+        time_index, y_chunk_index, x_chunk_index = chunk_index[:3]
+
+        request_bbox = self.request_bbox(x_chunk_index, y_chunk_index)
+        request_time_range = self._request_chunk_time_range(time_index)
+        band_names = {key: band_name for key, (band_name, _) in chunks.items()}
+
+        t0 = time.perf_counter()
+        try:
+            exception = None
+            chunk_data = self.fetch_chunks(
+                band_names,
+                chunk_index,
+                bbox=request_bbox,
+                time_range=request_time_range,
+            )
+        except Exception as e:
+            exception = e
+            chunk_data = {}
+        duration = time.perf_counter() - t0
+
+        for key, (band_name, chunk_index) in chunks.items():
+            for observer in self._observers:
+                observer(
+                    band_name=band_name,
+                    chunk_index=chunk_index,
+                    bbox=request_bbox,
+                    time_range=request_time_range,
+                    duration=duration,
+                    data_size=len(chunk_data[key]) if key in chunk_data else None,
+                    exception=exception
+                    or (None if key in chunk_data else KeyError(key)),
+                )
+
+        if exception:
+            raise exception
+
+        return chunk_data
 
     def __setitem__(self, key: str, value: bytes) -> None:
         if self._trace_store_calls:
@@ -541,6 +835,20 @@ class SentinelHubChunkStore(RemoteStore):
         remote requests are mode: observer(**kwargs).
     :param trace_store_calls: Whether store calls shall be
         printed (for debugging).
+    :param coalesce_bands: Whether to fetch the chunks of all bands
+        sharing a tile and a sample type in a single request.
+        Only effective for 3D cubes, i.e., if the cube
+        configuration's *four_d* is False.
+    :param chunk_cache: Optional persistent cache for the responses
+        of SentinelHub data requests.
+    :param time_chunk_size: Number of time steps per chunk.
+        If greater than one, the time steps of a chunk are fetched
+        using a single request whose evalscript uses the "TILE"
+        mosaicking, see :meth:`SentinelHub.new_time_series_request`.
+    :param manifest: Optional manifest of the cube, as returned by
+        :meth:`get_manifest` of a store with the same *cube_config*
+        and *time_chunk_size*. If given, neither the catalog nor the
+        band names of the dataset are requested from SentinelHub.
     """
 
     _SAMPLE_TYPE_TO_DTYPE = {
@@ -565,9 +873,26 @@ class SentinelHubChunkStore(RemoteStore):
         cube_config: CubeConfig,
         observer: Callable = None,
         trace_store_calls=False,
+        coalesce_bands=False,
+        chunk_cache: DiskChunkCache = None,
+        time_chunk_size: int = 1,
+        manifest: CubeManifest = None,
     ):
+        if time_chunk_size < 1:
+            raise ValueError("time_chunk_size must be a positive integer")
         self._sentinel_hub = sentinel_hub
-        if cube_config.band_names is None:
+        self._time_chunk_size = time_chunk_size
+        self._tile_buffer = _TileBuffer() if coalesce_bands else None
+        self._chunk_cache = chunk_cache
+        # Computed before band names are resolved
+        self._manifest_key = CubeManifest.new_key(cube_config, time_chunk_size)
+        if manifest is not None:
+            if manifest.key != self._manifest_key:
+                raise ValueError(
+                    "manifest does not match cube configuration" " and time chunk size"
+                )
+            cube_config = manifest.cube_config
+        elif cube_config.band_names is None:
             bands = sentinel_hub.bands(
                 cube_config.dataset_name, collection_id=cube_config.collection_id
             )
@@ -579,8 +904,37 @@ class SentinelHubChunkStore(RemoteStore):
                 d["band_sample_types"] = band_sample_types
             cube_config = CubeConfig.from_dict(d)
         super().__init__(
-            cube_config, observer=observer, trace_store_calls=trace_store_calls
+            cube_config,
+            observer=observer,
+            trace_store_calls=trace_store_calls,
+            manifest=manifest,
         )
+        # Resolve per-band request parameters once, not per chunk
+        self._band_sample_types = {
+            band_name: self._get_band_sample_type(band_name)
+            for band_name in self.cube_config.band_names
+        }
+        self._band_groups = {
+            band_name: tuple(
+                name
+                for name in self.cube_config.band_names
+                if self._band_sample_types[name] == sample_type
+            )
+            for band_name, sample_type in self._band_sample_types.items()
+        }
+        self._request_templates: Dict[Tuple[str, ...], DataRequestTemplate] = {}
+
+    @property
+    def max_concurrent_fetches(self) -> int:
+        return self._sentinel_hub.max_concurrent_requests
+
+    @property
+    def time_chunk_size(self) -> int:
+        return self._time_chunk_size
+
+    @property
+    def manifest_key(self) -> str:
+        return self._manifest_key
 
     def get_time_ranges(self) -> List[Tuple[pd.Timestamp, pd.Timestamp]]:
         time_start, time_end = self._cube_config.time_range
@@ -640,16 +994,7 @@ class SentinelHubChunkStore(RemoteStore):
         return SentinelHub.features_to_time_ranges(features)
 
     def get_band_encoding(self, band_name: str) -> Dict[str, Any]:
-        band_sample_types = self.cube_config.band_sample_types
-        if not band_sample_types:
-            sample_type = self._METADATA.dataset_band_sample_type(
-                self.cube_config.dataset_name, band_name, default="FLOAT32"
-            )
-        elif isinstance(band_sample_types, (tuple, list)):
-            index = self.cube_config.band_names.index(band_name)
-            sample_type = band_sample_types[index]
-        else:  # isinstance(band_sample_types, str)
-            sample_type = band_sample_types
+        sample_type = self._get_band_sample_type(band_name, default="FLOAT32")
         # Convert to sample type name to Zarr dtype value
         dtype = self._SAMPLE_TYPE_TO_DTYPE.get(sample_type)
         if dtype is None:
@@ -703,45 +1048,216 @@ class SentinelHubChunkStore(RemoteStore):
         bbox: Tuple[float, float, float, float],
         time_range: Tuple[pd.Timestamp, pd.Timestamp],
     ) -> bytes:
+        if self._time_chunk_size > 1:
+            return self._fetch_time_chunk(key, band_name, chunk_index, bbox)
+
         start_time, end_time = time_range
         time_range = start_time.isoformat(), end_time.isoformat()
 
-        if band_name == "band_data":
-            band_names = self.cube_config.band_names
+        if band_name == BAND_DATA_ARRAY_NAME:
+            band_names = tuple(self.cube_config.band_names)
+            return self._fetch_data(key, band_name, band_names, bbox, time_range)
+
+        if self._tile_buffer is not None:
+            # Fetch all bands of the same sample type at once
+            # and serve the sibling chunks from the tile buffer
+            band_names = self._band_groups[band_name]
+            if len(band_names) > 1:
+                return self._tile_buffer.get_chunk(
+                    (*chunk_index, self._band_sample_types[band_name]),
+                    band_name,
+                    lambda: self._fetch_tile_chunks(key, band_names, bbox, time_range),
+                )
+
+        return self._fetch_data(key, band_name, (band_name,), bbox, time_range)
+
+    def get_chunk_group_key(
+        self, band_name: str, chunk_index: Tuple[int, ...]
+    ) -> Optional[Hashable]:
+        if band_name == BAND_DATA_ARRAY_NAME:
+            return None
+        # Bands of the same sample type can be fetched together
+        return self._band_sample_types[band_name]
+
+    def fetch_chunks(
+        self,
+        band_names: Dict[str, str],
+        chunk_index: Tuple[int, ...],
+        bbox: Tuple[float, float, float, float],
+        time_range: Tuple[pd.Timestamp, pd.Timestamp],
+    ) -> Dict[str, bytes]:
+        requested_band_names = set(band_names.values())
+        tile_band_names = tuple(
+            name for name in self.cube_config.band_names if name in requested_band_names
+        )
+        if self._time_chunk_size > 1:
+            tile_chunks = self._fetch_time_tile_chunks(
+                next(iter(band_names)), tile_band_names, chunk_index, bbox
+            )
         else:
-            band_names = [band_name]
+            start_time, end_time = time_range
+            time_range = start_time.isoformat(), end_time.isoformat()
+            tile_chunks = self._fetch_tile_chunks(
+                next(iter(band_names)), tile_band_names, bbox, time_range
+            )
+        return {key: tile_chunks[band_name] for key, band_name in band_names.items()}
 
-        band_sample_types = self.cube_config.band_sample_types
-        if not band_sample_types:
-            if band_name == "band_data":
-                band_sample_types = [
-                    SentinelHub.METADATA.dataset_band_sample_type(
-                        self.cube_config.dataset_name, band_name
-                    )
-                    for band_name in band_names
-                ]
-            else:
-                band_sample_types = SentinelHub.METADATA.dataset_band_sample_type(
-                    self.cube_config.dataset_name, band_name
+    def _fetch_time_chunk(
+        self,
+        key: str,
+        band_name: str,
+        chunk_index: Tuple[int, ...],
+        bbox: Tuple[float, float, float, float],
+    ) -> bytes:
+        if band_name == BAND_DATA_ARRAY_NAME:
+            band_names = tuple(self.cube_config.band_names)
+            array = self._fetch_time_chunk_array(key, band_names, chunk_index, bbox)
+            return self._encode_chunk(band_name, array)
+
+        if self._tile_buffer is not None:
+            band_names = self._band_groups[band_name]
+            if len(band_names) > 1:
+                return self._tile_buffer.get_chunk(
+                    (*chunk_index, self._band_sample_types[band_name]),
+                    band_name,
+                    lambda: self._fetch_time_tile_chunks(
+                        key, band_names, chunk_index, bbox
+                    ),
                 )
-        elif isinstance(band_sample_types, tuple) and band_name != "band_data":
-            index = self.cube_config.band_names.index(band_name)
-            band_sample_types = band_sample_types[index]
 
-        request = SentinelHub.new_data_request(
+        array = self._fetch_time_chunk_array(key, (band_name,), chunk_index, bbox)
+        return self._encode_chunk(band_name, array[..., 0])
+
+    def _fetch_time_tile_chunks(
+        self,
+        key: str,
+        band_names: Tuple[str, ...],
+        chunk_index: Tuple[int, ...],
+        bbox: Tuple[float, float, float, float],
+    ) -> Dict[str, bytes]:
+        array = self._fetch_time_chunk_array(key, band_names, chunk_index, bbox)
+        return {
+            band_name: self._encode_chunk(band_name, array[..., index])
+            for index, band_name in enumerate(band_names)
+        }
+
+    def _fetch_time_chunk_array(
+        self,
+        key: str,
+        band_names: Tuple[str, ...],
+        chunk_index: Tuple[int, ...],
+        bbox: Tuple[float, float, float, float],
+    ) -> np.ndarray:
+        """
+        Fetch the time steps of a chunk of the given bands with a
+        single request. Return a FLOAT32 array of shape
+        (time_chunk_size, tile_height, tile_width, len(band_names)),
+        whose missing values and time steps are NaN.
+        """
+        time_ranges = [
+            self.request_time_range(time_index)
+            for time_index in self._get_time_indexes(chunk_index[0])
+        ]
+        request = SentinelHub.new_time_series_request(
             self.cube_config.dataset_name,
             band_names,
             self.cube_config.tile_size,
-            time_range=time_range,
-            bbox=bbox,
-            band_sample_types=band_sample_types,
+            time_ranges,
             crs=CRS_ID_TO_URI[self.cube_config.crs],
+            bbox=bbox,
             upsampling=self.cube_config.upsampling,
             downsampling=self.cube_config.downsampling,
             mosaicking_order=self.cube_config.mosaicking_order,
             collection_id=self.cube_config.collection_id,
-            band_units=self.cube_config.band_units,
+            band_units=self._get_band_units(band_names),
         )
+        time_range = time_ranges[0][0].isoformat(), time_ranges[-1][1].isoformat()
+        data = self._request_data(key, ", ".join(band_names), request, bbox, time_range)
+
+        tile_width, tile_height = self.cube_config.tile_size
+        num_times = len(time_ranges)
+        array = np.full(
+            (self._time_chunk_size, tile_height, tile_width, len(band_names)),
+            np.nan,
+            dtype=np.float32,
+        )
+        array[:num_times] = (
+            np.frombuffer(zlib.decompress(data), dtype=np.float32)
+            .reshape((tile_height, tile_width, num_times, len(band_names)))
+            .transpose((2, 0, 1, 3))
+        )
+        return array
+
+    def _encode_chunk(self, band_name: str, array: np.ndarray) -> bytes:
+        """
+        Encode a FLOAT32 chunk *array* according to the
+        encoding of *band_name*.
+        """
+        encoding = self.get_band_encoding(band_name)
+        dtype = np.dtype(encoding["dtype"])
+        fill_value = encoding["fill_value"]
+        if fill_value is None and dtype.kind != "f":
+            fill_value = 0
+        if fill_value is not None:
+            array = np.where(np.isnan(array), fill_value, array)
+        return zlib.compress(
+            np.ascontiguousarray(array, dtype=dtype).tobytes(), level=8
+        )
+
+    def _fetch_tile_chunks(
+        self,
+        key: str,
+        band_names: Tuple[str, ...],
+        bbox: Tuple[float, float, float, float],
+        time_range: Tuple[str, str],
+    ) -> Dict[str, bytes]:
+        """
+        Fetch the chunks of multiple bands of the same tile
+        with a single request and split the multi-component
+        response into the individual band chunks.
+        """
+        tile_data = self._fetch_data(
+            key, ", ".join(band_names), band_names, bbox, time_range
+        )
+        tile_width, tile_height = self.cube_config.tile_size
+        dtype = self.get_band_encoding(band_names[0])["dtype"]
+        tile_array = np.frombuffer(zlib.decompress(tile_data), dtype=dtype).reshape(
+            (tile_height, tile_width, len(band_names))
+        )
+        return {
+            band_name: zlib.compress(
+                np.ascontiguousarray(tile_array[..., index]).tobytes(), level=8
+            )
+            for index, band_name in enumerate(band_names)
+        }
+
+    def _fetch_data(
+        self,
+        key: str,
+        band_name: str,
+        band_names: Tuple[str, ...],
+        bbox: Tuple[float, float, float, float],
+        time_range: Tuple[str, str],
+    ) -> bytes:
+        request = self._get_request_template(band_names).new_request(bbox, time_range)
+        return self._request_data(key, band_name, request, bbox, time_range)
+
+    def _request_data(
+        self,
+        key: str,
+        band_name: str,
+        request: Union[Dict, bytes],
+        bbox: Tuple[float, float, float, float],
+        time_range: Tuple[str, str],
+    ) -> bytes:
+        fingerprint = None
+        if self._chunk_cache is not None:
+            fingerprint = SentinelHub.get_request_fingerprint(
+                request, process_url=self._sentinel_hub.process_url
+            )
+            data = self._chunk_cache.get(fingerprint)
+            if data is not None:
+                return data
 
         response = self._sentinel_hub.get_data(
             request, mime_type="application/octet-stream"
@@ -757,4 +1273,118 @@ class SentinelHubChunkStore(RemoteStore):
                 message += f": {SentinelHubError(response)}"
             raise KeyError(message)
 
+        if fingerprint is not None:
+            self._chunk_cache.put(fingerprint, response.content)
+
         return response.content
+
+    def _get_request_template(self, band_names: Tuple[str, ...]) -> DataRequestTemplate:
+        template = self._request_templates.get(band_names)
+        if template is None:
+            band_sample_types = [self._band_sample_types[name] for name in band_names]
+            template = SentinelHub.new_data_request_template(
+                self.cube_config.dataset_name,
+                band_names,
+                self.cube_config.tile_size,
+                band_sample_types=band_sample_types if all(band_sample_types) else None,
+                crs=CRS_ID_TO_URI[self.cube_config.crs],
+                upsampling=self.cube_config.upsampling,
+                downsampling=self.cube_config.downsampling,
+                mosaicking_order=self.cube_config.mosaicking_order,
+                collection_id=self.cube_config.collection_id,
+                band_units=self._get_band_units(band_names),
+            )
+            self._request_templates[band_names] = template
+        return template
+
+    def _get_band_sample_type(
+        self, band_name: str, default: str = None
+    ) -> Optional[str]:
+        band_sample_types = self.cube_config.band_sample_types
+        if not band_sample_types:
+            return self._METADATA.dataset_band_sample_type(
+                self.cube_config.dataset_name, band_name, default=default
+            )
+        elif isinstance(band_sample_types, (tuple, list)):
+            index = self.cube_config.band_names.index(band_name)
+            return band_sample_types[index]
+        else:  # isinstance(band_sample_types, str)
+            return band_sample_types
+
+    def _get_band_units(
+        self, band_names: Sequence[str]
+    ) -> Union[None, str, Sequence[str]]:
+        band_units = self.cube_config.band_units
+        if isinstance(band_units, (tuple, list)):
+            return [
+                band_units[self.cube_config.band_names.index(band_name)]
+                for band_name in band_names
+            ]
+        return band_units
+
+
+class _TileBuffer:
+    """
+    A short-lived buffer for the band chunks of tiles that
+    have been fetched by a single request.
+
+    Each band chunk is served once; a tile is dropped
+    after all its band chunks have been served.
+    Concurrent callers asking for chunks of the same tile
+    wait for the first one fetching it.
+
+    :param max_size: Maximum number of buffered tiles.
+    """
+
+    def __init__(self, max_size: int = _DEFAULT_TILE_BUFFER_SIZE):
+        self._max_size = max_size
+        self._lock = threading.Lock()
+        self._tiles: Dict[Tuple, _BufferedTile] = collections.OrderedDict()
+
+    def get_chunk(
+        self,
+        tile_key: Tuple,
+        band_name: str,
+        fetch_tile: Callable[[], Dict[str, bytes]],
+    ) -> bytes:
+        while True:
+            with self._lock:
+                tile = self._tiles.get(tile_key)
+                if tile is None:
+                    tile = _BufferedTile()
+                    self._tiles[tile_key] = tile
+                    while len(self._tiles) > self._max_size:
+                        self._tiles.popitem(last=False)
+            with tile.lock:
+                if tile.chunks is None:
+                    try:
+                        tile.chunks = fetch_tile()
+                    except BaseException:
+                        self._drop_tile(tile_key, tile)
+                        raise
+                chunk = tile.chunks.pop(band_name, None)
+                is_empty = not tile.chunks
+            if chunk is None or is_empty:
+                # Either this tile has been fully served or
+                # the band's chunk has already been served
+                # before, hence it is requested again.
+                self._drop_tile(tile_key, tile)
+            if chunk is not None:
+                return chunk
+
+    def _drop_tile(self, tile_key: Tuple, tile: "_BufferedTile"):
+        with self._lock:
+            if self._tiles.get(tile_key) is tile:
+                del self._tiles[tile_key]
+
+    def __getstate__(self):
+        return dict(max_size=self._max_size)
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+
+class _BufferedTile:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.chunks: Optional[Dict[str, bytes]] = None
@@ -14,10 +14,25 @@ DEFAULT_SH_INSTANCE_URL = "https://services.sentinel-hub.com"
 
 # SH Catalog only allows this number of features to requested.
 SH_CATALOG_FEATURE_LIMIT = 100
+# Time ranges of catalog searches are split into periods
+# of this length, which are searched concurrently.
+DEFAULT_CATALOG_TIME_SPLIT = "30D"
+
+DEFAULT_CATALOG_CACHE_TTL = 3600  # seconds
 
 DEFAULT_RETRY_BACKOFF_MAX = 40  # milliseconds
 DEFAULT_RETRY_BACKOFF_BASE = 1.001
 DEFAULT_NUM_RETRIES = 200
+# Access tokens are refreshed this number of seconds before they expire
+DEFAULT_TOKEN_REFRESH_MARGIN = 60
+DEFAULT_MAX_CONCURRENT_REQUESTS = 16
+# Number of hosts for which connection pools are kept
+DEFAULT_NUM_CONNECTION_POOLS = 10
+
+DEFAULT_MAX_DISK_CACHE_SIZE = 10 * 2**30  # 10 GiB
+
+# Maximum number of time slices fetched by a single time series request
+DEFAULT_MAX_TIME_SERIES_SLICES = 50
 
 WGS84_CRS = "WGS84"
 DEFAULT_CRS = WGS84_CRS
@@ -32,6 +47,10 @@ DEFAULT_MOSAICKING_ORDER = "mostRecent"
 MOSAICKING_ORDERS = "mostRecent", "leastRecent", "leastCC"
 
 DEFAULT_TILE_SIZE = 1000
+# Tile sizes probed when tuning the tile size
+DEFAULT_TUNING_TILE_SIZES = 256, 512, 1000, 1500, 2000, 2500
+# Number of chunks fetched per band and probed tile size
+DEFAULT_TUNING_NUM_PROBES = 4
 
 SH_MAX_IMAGE_SIZE = 2500
 
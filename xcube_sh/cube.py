@@ -3,14 +3,26 @@
 # https://opensource.org/licenses/MIT.
 
 
-from typing import Callable
+import json
+from typing import Callable, List, Tuple
 
+import pandas as pd
 import xarray as xr
 import zarr
 
+from .cache import ConcurrentLRUStoreCache
+from .cache import CubeManifestCache
+from .cache import DiskChunkCache
 from .chunkstore import SentinelHubChunkStore
 from .config import CubeConfig
+from .constants import BAND_DATA_ARRAY_NAME
+from .constants import DEFAULT_MAX_DISK_CACHE_SIZE
+from .manifest import CubeManifest
 from .sentinelhub import SentinelHub
+from .zarrwriter import ZarrWriter
+
+# Array metadata that must equal for appending chunks to an array
+_APPEND_ARRAY_PROPERTIES = ("chunks", "dtype", "compressor", "filters", "fill_value")
 
 
 def open_cube(
@@ -19,6 +31,11 @@ def open_cube(
     trace_store_calls: bool = False,
     max_cache_size: int = 2**30,
     sentinel_hub: SentinelHub = None,
+    coalesce_bands: bool = False,
+    time_chunk_size: int = 1,
+    disk_cache_dir: str = None,
+    max_disk_cache_size: int = DEFAULT_MAX_DISK_CACHE_SIZE,
+    manifest_dir: str = None,
     **sh_kwargs,
 ) -> xr.Dataset:
     """
@@ -36,6 +53,23 @@ def open_cube(
         If zero or None, no caching takes place:
     :param sentinel_hub: Optional instance of SentinelHub,
         the object representing the Sentinel Hub API.
+    :param coalesce_bands: Whether to fetch the chunks of all bands
+        of a tile using a single request to SentinelHub.
+        Only effective for 3D cubes.
+    :param time_chunk_size: Number of time steps per chunk.
+        Each chunk is fetched using a single request to SentinelHub.
+    :param disk_cache_dir: Optional directory of a persistent chunk
+        cache. The directory may be shared by multiple processes.
+        If given, chunks are only requested from SentinelHub
+        if they are not found in the cache.
+    :param max_disk_cache_size: Maximum size of the persistent
+        chunk cache in bytes. Defaults to 10 GiB.
+    :param manifest_dir: Optional directory of cube manifests.
+        If given, the cube's time ranges and metadata are taken
+        from the manifest of a previous open with the same
+        *cube_config* and *time_chunk_size*, if any, so no catalog
+        queries are made. Otherwise, a manifest is written.
+        The directory may be shared by multiple processes.
     :param sh_kwargs: Optional keyword arguments passed to the
         SentinelHub constructor. Only valid if
          *sentinel_hub* is not given.
@@ -47,17 +81,202 @@ def open_cube(
         raise ValueError(
             f"unexpected keyword-arguments:" f' {", ".join(sh_kwargs.keys())}'
         )
+    manifest_cache = CubeManifestCache(manifest_dir) if manifest_dir else None
+    manifest = (
+        manifest_cache.get(CubeManifest.new_key(cube_config, time_chunk_size))
+        if manifest_cache is not None
+        else None
+    )
     cube_store = SentinelHubChunkStore(
         sentinel_hub,
         cube_config,
         observer=observer,
         trace_store_calls=trace_store_calls,
+        coalesce_bands=coalesce_bands,
+        time_chunk_size=time_chunk_size,
+        chunk_cache=(
+            DiskChunkCache(disk_cache_dir, max_size=max_disk_cache_size)
+            if disk_cache_dir
+            else None
+        ),
+        manifest=manifest,
     )
+    if manifest_cache is not None and manifest is None:
+        manifest_cache.put(cube_store.get_manifest())
     if max_cache_size:
-        cube_store = zarr.LRUStoreCache(cube_store, max_cache_size)
+        cube_store = ConcurrentLRUStoreCache(cube_store, max_cache_size)
 
     cube = xr.open_zarr(cube_store)
     if hasattr(cube, "zarr_store"):
         cube.zarr_store.set(cube_store)
 
     return cube
+
+
+def append_cube(
+    path: str,
+    time_end: str = None,
+    observer: Callable = None,
+    sentinel_hub: SentinelHub = None,
+    **sh_kwargs,
+) -> int:
+    """
+    Append the time slices newer than the last one of an existing
+    data cube, e.g., to keep a cube up to date.
+
+    The cube must be a local Zarr directory whose chunks have been
+    written as fetched from SentinelHub, e.g., using
+    :meth:`xcube_sh.zarrwriter.ZarrWriter.copy_store` or
+    ``xcube sh gen --pass-through``. Its cube configuration is
+    taken from the cube's "history" attribute.
+
+    Only time slices after the last one of the cube are looked up
+    in the catalog and fetched. Their chunks are appended along the
+    "time" dimension, and the "time" and "time_bnds" coordinates are
+    extended in place. If the last time chunk of the cube is
+    incomplete, its time slices are fetched again.
+
+    :param path: Path of the data cube.
+    :param time_end: End of the time range to be appended.
+        Defaults to today.
+    :param observer: A observer function or callable that is
+        called on every request made to SentinelHub.
+    :param sentinel_hub: Optional instance of SentinelHub,
+        the object representing the Sentinel Hub API.
+    :param sh_kwargs: Optional keyword arguments passed to the
+        SentinelHub constructor. Only valid if
+         *sentinel_hub* is not given.
+    :return: The number of time slices appended.
+    """
+    if sentinel_hub is None:
+        sentinel_hub = SentinelHub(**sh_kwargs)
+    elif sh_kwargs:
+        raise ValueError(
+            f"unexpected keyword-arguments:" f' {", ".join(sh_kwargs.keys())}'
+        )
+
+    group = zarr.open_group(path, mode="r+")
+    try:
+        cube_config = CubeConfig.from_dict(group.attrs["history"][0]["cube_config"])
+    except (KeyError, IndexError, TypeError) as e:
+        raise ValueError(f"cannot find cube configuration of {path}") from e
+    array_names = (
+        [BAND_DATA_ARRAY_NAME] if cube_config.four_d else list(cube_config.band_names)
+    )
+    time_chunk_size = group[array_names[0]].chunks[0]
+
+    # Time slices of an incomplete last time chunk are fetched again
+    num_times = group["time"].shape[0]
+    num_kept_times = num_times - num_times % time_chunk_size
+    if num_kept_times > 0:
+        last_time_end = pd.Timestamp(
+            int(group["time_bnds"][num_kept_times - 1, 1]), unit="s", tz="UTC"
+        )
+        time_start = last_time_end
+    else:
+        last_time_end = None
+        time_start = cube_config.time_range[0]
+    cube_config_dict = cube_config.to_dict()
+    cube_config_dict.update(time_range=(time_start.isoformat(), time_end))
+    cube_config = CubeConfig.from_dict(cube_config_dict)
+    if time_start >= cube_config.time_range[1]:
+        return 0
+
+    try:
+        store = _AppendChunkStore(
+            sentinel_hub,
+            cube_config,
+            observer=observer,
+            time_chunk_size=time_chunk_size,
+            last_time_end=last_time_end,
+        )
+    except _NoNewTimeSlices:
+        return 0
+    num_new_times = len(store.time_ranges)
+    if num_kept_times + num_new_times <= num_times:
+        return 0
+
+    for array_name in array_names:
+        old_array_meta = json.loads(group.store[f"{array_name}/.zarray"])
+        new_array_meta = json.loads(store[f"{array_name}/.zarray"])
+        if old_array_meta["shape"][1:] != new_array_meta["shape"][1:] or any(
+            old_array_meta.get(k) != new_array_meta.get(k)
+            for k in _APPEND_ARRAY_PROPERTIES
+        ):
+            raise ValueError(
+                f"cannot append to array {array_name!r} of {path},"
+                f" its chunks have not been written as fetched"
+                f" from SentinelHub"
+            )
+
+    # Chunks are written first, so the cube remains valid
+    # until its metadata is updated
+    time_chunk_offset = num_kept_times // time_chunk_size
+
+    def shift_chunk_key(key: str) -> str:
+        array_name, _, filename = key.rpartition("/")
+        time_index, _, other_indexes = filename.partition(".")
+        return f"{array_name}/{int(time_index) + time_chunk_offset}.{other_indexes}"
+
+    ZarrWriter(path).copy_store(
+        store,
+        batch_size=4 * store.max_concurrent_fetches,
+        keys=[
+            f"{array_name}/{filename}"
+            for array_name in array_names
+            for filename in store.listdir(array_name)
+            if not filename.startswith(".")
+        ],
+        key_mapping=shift_chunk_key,
+    )
+
+    new_group = zarr.open_group(store, mode="r")
+    for array_name in array_names:
+        array = group[array_name]
+        array.resize((num_kept_times + num_new_times,) + array.shape[1:])
+    for array_name in ("time", "time_bnds"):
+        array = group[array_name]
+        array.resize((num_kept_times,) + array.shape[1:])
+        array.append(new_group[array_name][:])
+
+    time_coverage_start = pd.Timestamp(group.attrs["time_coverage_start"])
+    time_coverage_end = store.time_ranges[-1][1]
+    group.attrs.update(
+        date_modified=pd.Timestamp.now().isoformat(),
+        time_coverage_end=time_coverage_end.isoformat(),
+        time_coverage_duration=(time_coverage_end - time_coverage_start).isoformat(),
+    )
+    zarr.consolidate_metadata(path)
+
+    return num_kept_times + num_new_times - num_times
+
+
+class _NoNewTimeSlices(Exception):
+    pass
+
+
+class _AppendChunkStore(SentinelHubChunkStore):
+    """
+    A chunk store for the time slices after *last_time_end*,
+    the end of the last time slice of an existing cube.
+    """
+
+    def __init__(self, *args, last_time_end: pd.Timestamp = None, **kwargs):
+        self._last_time_end = last_time_end
+        super().__init__(*args, **kwargs)
+
+    def get_time_ranges(self) -> List[Tuple[pd.Timestamp, pd.Timestamp]]:
+        time_ranges = super().get_time_ranges()
+        if self._last_time_end is not None and self.cube_config.time_period is None:
+            # The catalog also finds the cube's last time stamp,
+            # and all time stamps, if there are no newer ones.
+            # Time bounds of cubes have a resolution of seconds.
+            last_time_end = self._last_time_end.floor("s")
+            time_ranges = [
+                (start_time, end_time)
+                for start_time, end_time in time_ranges
+                if start_time.floor("s") > last_time_end
+            ]
+        if not time_ranges:
+            raise _NoNewTimeSlices()
+        return time_ranges
@@ -0,0 +1,414 @@
+# Copyright © 2022-2024 by the xcube development team and contributors
+# Permissions are hereby granted under the terms of the MIT License:
+# https://opensource.org/licenses/MIT.
+
+import argparse
+import collections
+import json
+import random
+import re
+import threading
+import time
+import uuid
+import zlib
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import shapely.geometry
+
+from .metadata import SentinelHubMetadata
+
+_SAMPLE_TYPE_TO_DTYPE = {
+    "UINT8": np.uint8,
+    "UINT16": np.uint16,
+    "UINT32": np.uint32,
+    "INT8": np.uint8,
+    "INT16": np.uint16,
+    "INT32": np.uint32,
+    "FLOAT32": np.float32,
+    "FLOAT64": np.float64,
+}
+
+_OUTPUT_PATTERN = re.compile(
+    r"output: \[\s*{bands: (\d+), sampleType: ['\"](\w+)['\"]}"
+)
+
+_BANDS_PATH_PATTERN = re.compile(r"^/api/v1/process/dataset/([^/]+)/bands$")
+
+
+class SentinelHubEmulator:
+    """
+    A local emulator of the SentinelHub OAuth2, Catalog,
+    Process, and Configuration APIs as used by
+    :class:`xcube_sh.sentinelhub.SentinelHub`.
+
+    It is meant for load and failure testing without consuming
+    processing units. Process API responses are synthetic,
+    deterministic rasters of the requested size, band count, and
+    sample type, encoded like SentinelHub's "application/octet-stream"
+    responses, that is, zlib-compressed. The value of band *k* at
+    pixel (*y*, *x*) is ``100 * k + (x + y) % 100``, truncated to the
+    range of the sample type. The Catalog API yields a feature every
+    two days at 10:00 UTC.
+
+    The emulator uses plain HTTP, hence clients require the
+    environment variable OAUTHLIB_INSECURE_TRANSPORT to be set.
+
+    Usage::
+
+        with SentinelHubEmulator(latency=0.05, throttle_rate=0.1) as emulator:
+            sentinel_hub = emulator.new_sentinel_hub()
+            cube = open_cube(cube_config, sentinel_hub=sentinel_hub)
+
+    or run it as a standalone server::
+
+        $ python -m xcube_sh.emulator --port 8080 --latency 0.05
+
+    and pass ``instance_url="http://localhost:8080"`` and
+    ``oauth2_url="http://localhost:8080/oauth"`` to
+    :class:`xcube_sh.sentinelhub.SentinelHub`.
+
+    :param host: Host name or address to bind to.
+    :param port: Port to bind to. If 0, a free port is used.
+    :param latency: Time in seconds every response is delayed.
+    :param error_rate: Fraction of Process API requests
+        that fail with HTTP status 500.
+    :param throttle_rate: Fraction of Process API requests
+        that fail with HTTP status 429.
+    :param retry_after: Value of the "Retry-After" header of
+        throttled responses in milliseconds.
+    :param token_lifetime: Lifetime of access tokens in seconds.
+        Should exceed the refresh margin of clients.
+    :param seed: Seed of the random failures.
+    """
+
+    METADATA = SentinelHubMetadata()
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        retry_after: int = 10,
+        token_lifetime: int = 3600,
+        seed: Optional[int] = None,
+    ):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.token_lifetime = token_lifetime
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._stats = collections.Counter()
+        self._tokens: Dict[str, float] = {}
+        self._contents: Dict[Tuple[int, int, int, str], bytes] = {}
+        self._server = ThreadingHTTPServer((host, port), _new_handler(self))
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """The base URL of the emulator."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """
+        Number of responses by kind: "token", "process",
+        "search", "config", "throttled", "error", "unauthorized".
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    def start(self) -> "SentinelHubEmulator":
+        """Serve requests in a background thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._server.serve_forever, daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving requests and release the port."""
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def serve_forever(self):
+        """Serve requests in the current thread."""
+        self._server.serve_forever()
+
+    def __enter__(self) -> "SentinelHubEmulator":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def expire_tokens(self):
+        """Let all issued access tokens expire."""
+        with self._lock:
+            self._tokens.clear()
+
+    def new_sentinel_hub(self, **kwargs):
+        """
+        Create a :class:`xcube_sh.sentinelhub.SentinelHub`
+        instance using this emulator.
+
+        :param kwargs: Keyword arguments passed to the
+            SentinelHub constructor.
+        """
+        from .sentinelhub import SentinelHub
+
+        return SentinelHub(
+            **{
+                "client_id": "xcube-sh",
+                "client_secret": "xcube-sh",
+                **kwargs,
+                "instance_url": self.url,
+                "oauth2_url": f"{self.url}/oauth",
+            }
+        )
+
+    def _count(self, kind: str):
+        with self._lock:
+            self._stats[kind] += 1
+
+    def _new_token(self) -> Dict[str, Any]:
+        access_token = uuid.uuid4().hex
+        with self._lock:
+            self._tokens[access_token] = time.time() + self.token_lifetime
+        return dict(
+            access_token=access_token,
+            token_type="Bearer",
+            expires_in=self.token_lifetime,
+        )
+
+    def _is_authorized(self, authorization: Optional[str]) -> bool:
+        if not authorization or not authorization.startswith("Bearer "):
+            return False
+        with self._lock:
+            expires_at = self._tokens.get(authorization[len("Bearer ") :])
+        return expires_at is not None and expires_at > time.time()
+
+    def _next_failure(self) -> Optional[int]:
+        with self._lock:
+            value = self._random.random()
+        if value < self.error_rate:
+            return 500
+        if value < self.error_rate + self.throttle_rate:
+            return 429
+        return None
+
+    def _get_raster(self, request: Dict[str, Any]) -> bytes:
+        width = request["output"]["width"]
+        height = request["output"]["height"]
+        num_bands, sample_type = _OUTPUT_PATTERN.search(request["evalscript"]).groups()
+        key = width, height, int(num_bands), sample_type
+        content = self._contents.get(key)
+        if content is None:
+            content = zlib.compress(
+                _new_raster(width, height, int(num_bands), sample_type).tobytes()
+            )
+            with self._lock:
+                self._contents[key] = content
+        return content
+
+    def _get_datasets(self):
+        return [
+            dict(id=dataset_name, name=self.METADATA.dataset_title(dataset_name))
+            for dataset_name in self.METADATA.dataset_names
+        ]
+
+    def _get_band_names(self, dataset_name: str):
+        return self.METADATA.dataset_band_names(dataset_name, default=None)
+
+    def _get_collections(self):
+        collection_names = dict.fromkeys(
+            self.METADATA.dataset_collection_name(dataset_name)
+            for dataset_name in self.METADATA.dataset_names
+        )
+        return [dict(id=name) for name in collection_names if name]
+
+
+def _new_raster(width: int, height: int, num_bands: int, sample_type: str):
+    dtype = np.dtype(_SAMPLE_TYPE_TO_DTYPE.get(sample_type, np.float32))
+    base = np.add.outer(np.arange(height), np.arange(width)) % 100
+    raster = base[..., np.newaxis] + 100 * np.arange(num_bands)
+    if dtype.kind != "f":
+        raster %= np.iinfo(dtype).max + 1
+    return raster.astype(dtype)
+
+
+def _search_features(request: Dict[str, Any]) -> Dict[str, Any]:
+    start_time, end_time = (
+        pd.Timestamp(t) if t != ".." else None for t in request["datetime"].split("/")
+    )
+    start_time = start_time or pd.Timestamp("2015-01-01T00:00:00Z")
+    end_time = end_time or pd.Timestamp.now(tz="UTC")
+    times = pd.date_range(start_time.normalize(), end_time, freq="2D")
+    times += pd.Timedelta("10H")
+    times = times[(times >= start_time) & (times <= end_time)]
+    offset = request.get("next", 0)
+    limit = request["limit"]
+    features = [
+        {
+            "type": "Feature",
+            "id": f"emulated-{t.strftime('%Y%m%dT%H%M%S')}",
+            "bbox": request.get("bbox"),
+            "geometry": (
+                shapely.geometry.mapping(shapely.geometry.box(*request["bbox"]))
+                if request.get("bbox")
+                else None
+            ),
+            "properties": {"datetime": t.strftime("%Y-%m-%dT%H:%M:%SZ")},
+        }
+        for t in times[offset : offset + limit]
+    ]
+    return {"type": "FeatureCollection", "features": features}
+
+
+def _new_handler(emulator: SentinelHubEmulator):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body are written separately, which otherwise
+        # delays every response on a kept-alive connection by ~40 ms
+        disable_nagle_algorithm = True
+
+        # noinspection PyPep8Naming
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if emulator.latency:
+                time.sleep(emulator.latency)
+            if self.path == "/oauth/token":
+                emulator._count("token")
+                self._send_json(emulator._new_token())
+            elif not self._check_authorization():
+                pass
+            elif self.path == "/api/v1/process":
+                self._process(json.loads(body))
+            elif self.path == "/api/v1/catalog/1.0.0/search":
+                emulator._count("search")
+                self._send_json(_search_features(json.loads(body)))
+            else:
+                self._send_json({"error": "not found"}, status=404)
+
+        # noinspection PyPep8Naming
+        def do_GET(self):
+            if emulator.latency:
+                time.sleep(emulator.latency)
+            if not self._check_authorization():
+                return
+            emulator._count("config")
+            if self.path == "/oauth/tokeninfo":
+                self._send_json(dict(sub="xcube-sh"))
+            elif self.path == "/configuration/v1/datasets":
+                self._send_json(emulator._get_datasets())
+            elif self.path == "/api/v1/catalog/1.0.0/collections":
+                self._send_json(dict(collections=emulator._get_collections()))
+            else:
+                match = _BANDS_PATH_PATTERN.match(self.path)
+                band_names = emulator._get_band_names(match.group(1)) if match else None
+                if band_names is not None:
+                    self._send_json(dict(data=band_names))
+                else:
+                    self._send_json({"error": "not found"}, status=404)
+
+        def _process(self, request: Dict[str, Any]):
+            status = emulator._next_failure()
+            if status == 429:
+                emulator._count("throttled")
+                self._send_json(
+                    {"error": {"status": 429, "reason": "Too Many Requests"}},
+                    status=429,
+                    headers={"Retry-After": str(emulator.retry_after)},
+                )
+            elif status is not None:
+                emulator._count("error")
+                self._send_json(
+                    {"error": {"status": status, "reason": "Internal Server Error"}},
+                    status=status,
+                )
+            else:
+                emulator._count("process")
+                self._send(
+                    200, emulator._get_raster(request), "application/octet-stream"
+                )
+
+        def _check_authorization(self) -> bool:
+            if emulator._is_authorized(self.headers.get("Authorization")):
+                return True
+            emulator._count("unauthorized")
+            self._send_json(
+                {"error": {"status": 401, "reason": "Unauthorized"}}, status=401
+            )
+            return False
+
+        def _send_json(self, data: Any, status: int = 200, headers=None):
+            content = json.dumps(data).encode("utf-8")
+            self._send(status, content, "application/json", headers=headers)
+
+        def _send(
+            self,
+            status: int,
+            content: bytes,
+            content_type: str,
+            headers: Optional[Dict[str, str]] = None,
+        ):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(content)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(content)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def _main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(
+        description="Local emulator of the SentinelHub APIs used by xcube-sh."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=int, default=10)
+    parser.add_argument("--token-lifetime", type=int, default=3600)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+    emulator = SentinelHubEmulator(
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        retry_after=args.retry_after,
+        token_lifetime=args.token_lifetime,
+        seed=args.seed,
+    )
+    print(f"SentinelHub emulator listening on {emulator.url}")
+    try:
+        emulator.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        emulator.stop()
+
+
+if __name__ == "__main__":
+    _main()
@@ -15,6 +15,7 @@ from xcube_sh.constants import DEFAULT_TIME_TOLERANCE
 from xcube_sh.version import version
 
 DEFAULT_GEN_OUTPUT_PATH = "out.zarr"
+GEN_CHECKPOINT_NAME = ".xcube-sh-checkpoint"
 
 
 @click.command(
@@ -103,6 +104,22 @@ DEFAULT_GEN_OUTPUT_PATH = "out.zarr"
     "By default, bands are written to separate 3D arrays, "
     'e.g. "B01", "B02".',
 )
+@click.option(
+    "--pass-through",
+    "pass_through",
+    is_flag=True,
+    help="Write the chunks received from Sentinel Hub as they are, "
+    "without decoding and encoding them again. "
+    "Output must be a local directory.",
+)
+@click.option(
+    "--resume",
+    is_flag=True,
+    help="Record the written chunks in a checkpoint, so that an "
+    "interrupted generation can be continued by running the same "
+    "command again. Chunks already written are not fetched again. "
+    "Implies --pass-through.",
+)
 @click.option(
     "--verbose",
     "-v",
@@ -123,6 +140,8 @@ def gen(
     time_tolerance: Optional[str],
     output_path: Optional[str],
     four_d: bool,
+    pass_through: bool,
+    resume: bool,
     verbose: bool,
 ):
     """
@@ -132,6 +151,9 @@ def gen(
     for each band e.g. "B01", "B02" with dimensions "time", "lat", "lon".
     Use option "--4d" to write a single 4D array "band_data"
     with dimensions "time", "lat", "lon", "band".
+    Use option "--pass-through" to write the chunks received
+    from Sentinel Hub to the output as they are.
+    Use option "--resume" to continue an interrupted generation.
 
     Please use command "xcube sh req" to generate example request files
     that can be passed as REQUEST. REQUEST may have JSON or YAML format.
@@ -149,6 +171,8 @@ def gen(
     from xcube_sh.observers import Observers
     from xcube_sh.sentinelhub import SentinelHub
     from xcube_sh.chunkstore import SentinelHubChunkStore
+    from xcube_sh.zarrwriter import ZarrCheckpoint
+    from xcube_sh.zarrwriter import ZarrWriter
 
     if request:
         request_dict = _load_request(request)
@@ -196,23 +220,88 @@ def gen(
         output_path = output_config_dict.pop("path")
     else:
         output_path = DEFAULT_GEN_OUTPUT_PATH
-    if not _is_bucket_url(output_path) and os.path.exists(output_path):
+    checkpoint = None
+    if resume:
+        pass_through = True
+        if not _is_bucket_url(output_path):
+            checkpoint = ZarrCheckpoint(os.path.join(output_path, GEN_CHECKPOINT_NAME))
+    if (
+        not _is_bucket_url(output_path)
+        and os.path.exists(output_path)
+        and not (checkpoint is not None and checkpoint.exists())
+    ):
         raise click.ClickException(
             f"Output {output_path} " f"already exists. Move it away first."
         )
+    if pass_through and (_is_bucket_url(output_path) or output_config_dict):
+        raise click.ClickException(
+            "Options --pass-through and --resume require a local output path"
+            " and no further output configuration."
+        )
 
     sentinel_hub = SentinelHub(**input_config_dict)
 
     print(f"Writing cube to {output_path}...")
 
     with measure_time() as cm:
-        store = SentinelHubChunkStore(sentinel_hub, cube_config)
+        # Resume with the time ranges of the interrupted generation
+        manifest = (
+            checkpoint.load()
+            if checkpoint is not None and checkpoint.exists()
+            else None
+        )
+        if manifest is not None:
+            print(f"Resuming, {len(checkpoint.keys)} items already written...")
+            if _has_open_time_end(cube_config_dict.get("time_range")):
+                # Resolve the open end as when the checkpoint was created
+                time_start = cube_config.time_range[0]
+                time_end = manifest.cube_config.time_range[1]
+                cube_config = CubeConfig.from_dict(
+                    dict(
+                        cube_config.to_dict(),
+                        time_range=(time_start.isoformat(), time_end.isoformat()),
+                    ),
+                    exception_type=click.ClickException,
+                )
+        try:
+            store = SentinelHubChunkStore(sentinel_hub, cube_config, manifest=manifest)
+        except ValueError as e:
+            raise click.ClickException(f"{e}") from e
         request_collector = Observers.request_collector()
         store.add_observer(request_collector)
         if verbose:
             store.add_observer(Observers.request_dumper())
-        cube = xr.open_zarr(store)
-        if _is_bucket_url(output_path):
+        failed_chunks = []
+
+        def observe_failures(**kwargs):
+            if kwargs["exception"] is not None:
+                failed_chunks.append((kwargs["band_name"], kwargs["chunk_index"]))
+
+        store.add_observer(observe_failures)
+        if pass_through:
+            writer = ZarrWriter(output_path)
+            if checkpoint is not None and manifest is None:
+                writer.ensure_root_dir()
+                checkpoint.create(store.get_manifest())
+            # Chunks are zlib-compressed arrays as received
+            try:
+                writer.copy_store(
+                    store,
+                    batch_size=4 * store.max_concurrent_fetches,
+                    checkpoint=checkpoint,
+                )
+            finally:
+                if checkpoint is not None:
+                    checkpoint.close()
+            if checkpoint is not None:
+                if failed_chunks:
+                    raise click.ClickException(
+                        f"Failed to fetch {len(failed_chunks)} chunk(s)."
+                        f" Run the command again to fetch them."
+                    )
+                checkpoint.remove()
+        elif _is_bucket_url(output_path):
+            cube = xr.open_zarr(store)
             client_kwargs = {
                 k: output_config_dict.pop(k)
                 for k in ("provider_access_key_id", "provider_secret_access_key")
@@ -226,6 +315,7 @@ def gen(
                 **output_config_dict,
             )
         else:
+            cube = xr.open_zarr(store)
             write_dataset(cube, output_path, **output_config_dict)
 
     print(f"Cube written to {output_path}, " f"took {'%.2f' % cm.duration} seconds.")
@@ -395,6 +485,15 @@ def _overwrite_config_params(config: Dict[str, Any], **config_updates):
     config.update({k: v for k, v in config_updates.items() if v is not None})
 
 
+def _has_open_time_end(time_range: Any) -> bool:
+    # CubeConfig resolves an open end to the current date
+    return time_range is None or (
+        not isinstance(time_range, str)
+        and len(time_range) == 2
+        and time_range[1] is None
+    )
+
+
 def _is_bucket_url(path: str):
     url_parts = path.split("://")
     return (
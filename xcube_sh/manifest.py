@@ -0,0 +1,122 @@
+# Copyright © 2022-2024 by the xcube development team and contributors
+# Permissions are hereby granted under the terms of the MIT License:
+# https://opensource.org/licenses/MIT.
+
+import base64
+import hashlib
+import json
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from .config import CubeConfig
+
+_MANIFEST_VERSION = 1
+
+
+class CubeManifest:
+    """
+    A snapshot of the resolved structure of a cube, that is,
+    everything a chunk store derives from a cube configuration
+    before it fetches any chunk: the time ranges found in the
+    catalog, the consolidated Zarr metadata including the band
+    encodings, and the coordinate arrays.
+
+    A chunk store opened from a manifest neither queries the
+    catalog nor builds its metadata again.
+    Manifests are created using
+    :meth:`xcube_sh.chunkstore.RemoteStore.get_manifest`
+    and can be exported using :meth:`to_dict`.
+
+    :param key: The key of the cube configuration and time chunk
+        size the manifest has been created for,
+        see :meth:`new_key`.
+    :param cube_config: The resolved cube configuration.
+    :param time_chunk_size: Number of time steps per chunk.
+    :param time_ranges: The time ranges of the cube's time slices.
+    :param chunk_grids: Number of chunks in each dimension
+        of the remote arrays.
+    :param metadata: The consolidated Zarr metadata.
+    :param static_chunks: The chunks of static arrays,
+        such as coordinates.
+    :param created: Creation time in seconds since the epoch.
+    """
+
+    def __init__(
+        self,
+        key: str,
+        cube_config: CubeConfig,
+        time_chunk_size: int,
+        time_ranges: List[Tuple[pd.Timestamp, pd.Timestamp]],
+        chunk_grids: Dict[str, Tuple[int, ...]],
+        metadata: Dict[str, Any],
+        static_chunks: Dict[str, bytes],
+        created: Optional[float] = None,
+    ):
+        self.key = key
+        self.cube_config = cube_config
+        self.time_chunk_size = time_chunk_size
+        self.time_ranges = time_ranges
+        self.chunk_grids = chunk_grids
+        self.metadata = metadata
+        self.static_chunks = static_chunks
+        self.created = created if created is not None else time.time()
+
+    @classmethod
+    def new_key(cls, cube_config: CubeConfig, time_chunk_size: int = 1) -> str:
+        """
+        Compute the key of a manifest, a hash of the
+        given cube configuration and time chunk size.
+
+        :param cube_config: The cube configuration as passed
+            to the chunk store, i.e., before the chunk store
+            resolves missing band names.
+        :param time_chunk_size: Number of time steps per chunk.
+        :return: A hexadecimal SHA-256 digest.
+        """
+        d = dict(cube_config=cube_config.to_dict(), time_chunk_size=time_chunk_size)
+        return hashlib.sha256(json.dumps(d, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert into a JSON-serializable dictionary."""
+        return dict(
+            manifest_version=_MANIFEST_VERSION,
+            key=self.key,
+            cube_config=self.cube_config.to_dict(),
+            time_chunk_size=self.time_chunk_size,
+            time_ranges=[
+                [start_time.isoformat(), end_time.isoformat()]
+                for start_time, end_time in self.time_ranges
+            ],
+            chunk_grids={name: list(nums) for name, nums in self.chunk_grids.items()},
+            metadata=self.metadata,
+            static_chunks={
+                key: base64.b64encode(value).decode("ascii")
+                for key, value in self.static_chunks.items()
+            },
+            created=self.created,
+        )
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "CubeManifest":
+        """
+        Create a manifest from a dictionary
+        as returned by :meth:`to_dict`.
+        """
+        manifest_version = d.get("manifest_version")
+        if manifest_version != _MANIFEST_VERSION:
+            raise ValueError(f"unsupported manifest version {manifest_version!r}")
+        return CubeManifest(
+            d["key"],
+            CubeConfig.from_dict(d["cube_config"]),
+            d["time_chunk_size"],
+            [
+                (pd.Timestamp(start_time), pd.Timestamp(end_time))
+                for start_time, end_time in d["time_ranges"]
+            ],
+            {name: tuple(nums) for name, nums in d["chunk_grids"].items()},
+            d["metadata"],
+            {key: base64.b64decode(value) for key, value in d["static_chunks"].items()},
+            created=d.get("created"),
+        )
@@ -0,0 +1,213 @@
+# Copyright © 2022-2024 by the xcube development team and contributors
+# Permissions are hereby granted under the terms of the MIT License:
+# https://opensource.org/licenses/MIT.
+
+import collections
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from .constants import LOG
+
+# Factor by which the concurrency limit is decreased
+# if the service signals that it is overloaded
+_DECREASE_FACTOR = 0.5
+
+# Minimum time in seconds between two decreases of the
+# concurrency limit, so that a burst of failed concurrent
+# requests counts as a single overload event
+_DECREASE_INTERVAL = 1.0
+
+
+class RequestScheduler:
+    """
+    A scheduler for the requests of a :class:`SentinelHub` instance
+    shared by all threads using that instance.
+
+    The number of concurrent requests is adapted using an
+    additive-increase/multiplicative-decrease (AIMD) policy:
+    the concurrency limit grows by one per limit's worth of successful
+    requests and is halved if the service responds with
+    HTTP status 429 (too many requests) or 5xx.
+    A "Retry-After" time given by the service pauses all
+    requests, not only the one that received it.
+    Waiting requests are served in FIFO order.
+
+    Usage::
+
+        scheduler.acquire()
+        response = ...  # perform request
+        scheduler.release(status_code=response.status_code)
+
+    :param max_concurrency: Maximum number of concurrent requests.
+    :param min_concurrency: Minimum number of concurrent requests.
+    """
+
+    def __init__(self, max_concurrency: int, min_concurrency: int = 1):
+        if min_concurrency < 1 or max_concurrency < min_concurrency:
+            raise ValueError(
+                "max_concurrency must be greater or equal"
+                " min_concurrency, which must be positive"
+            )
+        self._max_concurrency = max_concurrency
+        self._min_concurrency = min_concurrency
+        self._limit = float(max_concurrency)
+        self._num_active = 0
+        self._queue = collections.deque()
+        self._pause_until = 0.0
+        self._last_decrease = -math.inf
+        self._condition = threading.Condition()
+
+    @property
+    def max_concurrency(self) -> int:
+        return self._max_concurrency
+
+    @property
+    def min_concurrency(self) -> int:
+        return self._min_concurrency
+
+    @property
+    def concurrency_limit(self) -> int:
+        """The current maximum number of concurrent requests."""
+        return max(self._min_concurrency, int(self._limit))
+
+    @property
+    def num_active(self) -> int:
+        """The current number of active requests."""
+        return self._num_active
+
+    def acquire(self):
+        """
+        Wait until a request may be performed.
+        Every call must be followed by a call to :meth:`release`.
+        """
+        with self._condition:
+            ticket = object()
+            self._queue.append(ticket)
+            try:
+                while True:
+                    delay = self._pause_until - time.monotonic()
+                    if (
+                        delay <= 0
+                        and self._queue[0] is ticket
+                        and self._num_active < self.concurrency_limit
+                    ):
+                        break
+                    self._condition.wait(timeout=delay if delay > 0 else None)
+            except BaseException:
+                self._queue.remove(ticket)
+                self._condition.notify_all()
+                raise
+            self._queue.popleft()
+            self._num_active += 1
+            # The next request in the queue may proceed too
+            self._condition.notify_all()
+
+    def release(
+        self, status_code: Optional[int] = None, retry_after: Optional[float] = None
+    ):
+        """
+        Release a request acquired by :meth:`acquire`.
+
+        :param status_code: The HTTP status code of the response,
+            or None, if the request failed without a response.
+        :param retry_after: Time in seconds to pause all requests,
+            if the service asked for it.
+        """
+        with self._condition:
+            self._num_active -= 1
+            if status_code is not None:
+                if status_code == 429 or status_code >= 500:
+                    self._decrease_limit()
+                elif status_code < 400:
+                    self._increase_limit()
+            if retry_after:
+                self._pause_until = max(
+                    self._pause_until, time.monotonic() + retry_after
+                )
+            self._condition.notify_all()
+
+    def _increase_limit(self):
+        self._limit = min(float(self._max_concurrency), self._limit + 1.0 / self._limit)
+
+    def _decrease_limit(self):
+        now = time.monotonic()
+        if now - self._last_decrease >= _DECREASE_INTERVAL:
+            self._limit = max(
+                float(self._min_concurrency), self._limit * _DECREASE_FACTOR
+            )
+            self._last_decrease = now
+            LOG.debug(f"request concurrency limit decreased to {self._limit:.1f}")
+
+    def __getstate__(self):
+        return dict(
+            max_concurrency=self._max_concurrency,
+            min_concurrency=self._min_concurrency,
+        )
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+
+class SingleFlight:
+    """
+    Lets concurrent callers that ask for the same *key* share
+    a single call of a function and its result.
+
+    Only calls that overlap in time are shared, results are not cached.
+    If the call raises an exception, it is raised for all callers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    @property
+    def num_in_flight(self) -> int:
+        """The current number of calls in flight."""
+        return len(self._calls)
+
+    def call(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """
+        Call *func* or, if a call for *key* is already in flight,
+        wait for its result.
+
+        :param key: The key that identifies the call.
+        :param func: The function to be called.
+        :return: The result of the call.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = _Call()
+                self._calls[key] = call
+        if not is_leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def __getstate__(self):
+        return {}
+
+    def __setstate__(self, state):
+        self.__init__()
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
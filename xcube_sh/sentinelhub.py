@@ -2,25 +2,41 @@
 # Permissions are hereby granted under the terms of the MIT License:
 # https://opensource.org/licenses/MIT.
 
+import collections
+import hashlib
 import json
+import math
 import os
 import platform
 import random
+import re
+import threading
 import time
 import warnings
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import as_completed
 from typing import List, Any, Dict, Tuple, Union, Sequence, Callable, Optional
+from typing import Iterator
 
+import numpy as np
 import oauthlib.oauth2
 import pandas as pd
 import pyproj
 import requests
+import requests.adapters
 import requests_oauthlib
 
+from .auth import TokenManager
+from .cache import CatalogCache
 from .constants import CRS_ID_TO_URI
+from .constants import DEFAULT_CATALOG_TIME_SPLIT
 from .constants import DEFAULT_CLIENT_ID
 from .constants import DEFAULT_CLIENT_SECRET
 from .constants import DEFAULT_CRS
+from .constants import DEFAULT_MAX_CONCURRENT_REQUESTS
 from .constants import DEFAULT_MOSAICKING_ORDER
+from .constants import DEFAULT_NUM_CONNECTION_POOLS
 from .constants import DEFAULT_NUM_RETRIES
 from .constants import DEFAULT_RESAMPLING
 from .constants import DEFAULT_RETRY_BACKOFF_BASE
@@ -29,6 +45,8 @@ from .constants import DEFAULT_SH_INSTANCE_URL
 from .constants import LOG
 from .constants import SH_CATALOG_FEATURE_LIMIT
 from .metadata import SentinelHubMetadata
+from .scheduler import RequestScheduler
+from .scheduler import SingleFlight
 from .version import version
 
 
@@ -55,6 +73,18 @@ class SentinelHub:
         time in milliseconds, e.g. ``100`` milliseconds
     :param retry_backoff_base:  Request retry backoff base.
         Must be greater than one, e.g. ``1.5``
+    :param max_concurrent_requests: Maximum number of Process API
+        requests this instance performs concurrently, e.g. ``16``.
+        The actual number is adapted to the service's responses,
+        see :class:`RequestScheduler`.
+    :param connection_pool_size: Maximum number of connections
+        per host kept alive for reuse.
+        Defaults to *max_concurrent_requests*.
+    :param catalog_cache_ttl: If given, catalog search results are
+        cached for this number of seconds, see :class:`CatalogCache`.
+    :param catalog_cache_dir: Optional directory, in which cached
+        catalog search results are persisted.
+        Ignored if *catalog_cache_ttl* is not given.
     :param session: Optional request session object (mostly for testing).
     """
 
@@ -78,8 +108,15 @@ class SentinelHub:
         num_retries: int = DEFAULT_NUM_RETRIES,
         retry_backoff_max: int = DEFAULT_RETRY_BACKOFF_MAX,
         retry_backoff_base: float = DEFAULT_RETRY_BACKOFF_BASE,
+        max_concurrent_requests: int = DEFAULT_MAX_CONCURRENT_REQUESTS,
+        connection_pool_size: Optional[int] = None,
+        catalog_cache_ttl: Optional[float] = None,
+        catalog_cache_dir: Optional[str] = None,
         session: Union["SerializableOAuth2Session", Any] = None,
     ):
+        # Whether this is a process-wide shared instance,
+        # see _get_shared_sentinel_hub()
+        self._shared = False
         if instance_id:
             warnings.warn(
                 "instance_id has been deprecated," " it is no longer used",
@@ -128,25 +165,94 @@ class SentinelHub:
         self.num_retries = num_retries
         self.retry_backoff_max = retry_backoff_max
         self.retry_backoff_base = retry_backoff_base
+        self.max_concurrent_requests = max_concurrent_requests
+        self._scheduler = RequestScheduler(max_concurrent_requests)
+        self._single_flight = SingleFlight()
+        self._catalog_cache = (
+            CatalogCache(ttl=catalog_cache_ttl, cache_dir=catalog_cache_dir)
+            if catalog_cache_ttl
+            else None
+        )
         self.session: Optional[SerializableOAuth2Session] = session
         # Client credentials
         self.client_id = client_id or DEFAULT_CLIENT_ID
         self.client_secret = client_secret or DEFAULT_CLIENT_SECRET
+        # Configuration used to pickle this instance, see __reduce_ex__().
+        # None, if a custom session is used.
+        self._config: Optional[Dict[str, Any]] = None
+        self._token_manager = TokenManager(
+            self._fetch_token, refresh_in_background=session is None
+        )
         if session is None:
+            self._config = dict(
+                client_id=self.client_id,
+                client_secret=self.client_secret,
+                instance_url=self.instance_url,
+                oauth2_url=self.oauth2_url,
+                process_url=self.process_url,
+                catalog_url=self.catalog_url,
+                collection_url=self.collection_url,
+                configuration_url=self.configuration_url,
+                enable_warnings=enable_warnings,
+                error_policy=self.error_policy,
+                error_handler=error_handler,
+                num_retries=num_retries,
+                retry_backoff_max=retry_backoff_max,
+                retry_backoff_base=retry_backoff_base,
+                max_concurrent_requests=max_concurrent_requests,
+                connection_pool_size=connection_pool_size,
+                catalog_cache_ttl=catalog_cache_ttl,
+                catalog_cache_dir=catalog_cache_dir,
+            )
             # Create a OAuth2 session
             client = oauthlib.oauth2.BackendApplicationClient(client_id=self.client_id)
-            self.session = SerializableOAuth2Session(client=client)
-            self._fetch_token()
+            self.session = SerializableOAuth2Session(
+                client=client,
+                pool_maxsize=connection_pool_size or max_concurrent_requests,
+            )
+            self._token_manager.refresh()
 
     def __del__(self):
-        self.close()
+        # Shared instances are closed once no longer used
+        self._close()
+
+    def __reduce_ex__(self, protocol):
+        if self._config is None:
+            # Custom session, pickle as usual
+            return super().__reduce_ex__(protocol)
+        # Only pickle the configuration. When unpickled, e.g., in a
+        # dask worker, the configuration resolves to a process-wide
+        # shared instance, so that all tasks share a single session,
+        # connection pool, and token.
+        return _get_shared_sentinel_hub, (self._config,)
+
+    @property
+    def scheduler(self) -> RequestScheduler:
+        return self._scheduler
 
     def close(self):
-        self.session.close()
+        """
+        Close the session and stop refreshing the access token.
+        Does nothing for the process-wide shared instances
+        that unpickled instances resolve to, as they are
+        used by all tasks of a process. These are closed
+        once no longer used.
+        """
+        if not getattr(self, "_shared", False):
+            self._close()
+
+    def _close(self):
+        # Attributes are missing, if the constructor failed
+        token_manager = getattr(self, "_token_manager", None)
+        if token_manager is not None:
+            token_manager.close()
+        session = getattr(self, "session", None)
+        if session is not None:
+            session.close()
 
     @property
     def token_info(self) -> Dict[str, Any]:
-        response = self.session.get(self.oauth2_url + "/tokeninfo")
+        response = self._get(self.oauth2_url + "/tokeninfo")
         SentinelHubError.maybe_raise_for_response(response)
         return response.json()
 
@@ -161,20 +267,20 @@ class SentinelHub:
         """
         See https://docs.sentinel-hub.com/api/latest/reference/#tag/configuration_dataset
         """
-        response = self.session.get(f"{self.configuration_url}/datasets")
+        response = self._get(f"{self.configuration_url}/datasets")
         SentinelHubError.maybe_raise_for_response(response)
         return response.json()
 
     def band_names(self, dataset_name: str, collection_id: str = None) -> List[str]:
         if dataset_name.upper() == "CUSTOM":
             url = f"{self.collection_url}/byoc-{collection_id}"
-            response = self.session.get(url)
+            response = self._get(url)
             SentinelHubError.maybe_raise_for_response(response)
             bands = response.json().get("bands", [])
             return [band.get("name") for band in bands]
 
         url = f"{self.process_url}/dataset/{dataset_name}/bands"
-        response = self.session.get(url)
+        response = self._get(url)
         SentinelHubError.maybe_raise_for_response(response)
         return response.json().get("data", {})
 
@@ -183,12 +289,12 @@ class SentinelHub:
     ) -> List[Dict[str, Any]]:
         if dataset_name.upper() == "CUSTOM":
             url = f"{self.collection_url}/byoc-{collection_id}"
-            response = self.session.get(url)
+            response = self._get(url)
             SentinelHubError.maybe_raise_for_response(response)
             return response.json().get("bands", [])
 
         url = f"{self.process_url}/dataset/{dataset_name}/bands"
-        response = self.session.get(url)
+        response = self._get(url)
         SentinelHubError.maybe_raise_for_response(response)
         band_names = response.json().get("data", [])
         return [dict(name=band_name) for band_name in band_names]
@@ -197,7 +303,7 @@ class SentinelHub:
         """
         See https://docs.sentinel-hub.com/api/latest/reference/#operation/getCollections
         """
-        response = self.session.get(f"{self.catalog_url}/collections")
+        response = self._get(f"{self.catalog_url}/collections")
         SentinelHubError.maybe_raise_for_response(response)
         return response.json().get("collections", [])
 
@@ -208,6 +314,7 @@ class SentinelHub:
         crs: str = None,
         time_range: Tuple[str, str] = None,
         bad_request_ok: bool = False,
+        time_split: Union[str, pd.Timedelta] = DEFAULT_CATALOG_TIME_SPLIT,
     ) -> List[Dict[str, Any]]:
         """
         Get geometric intersections of dataset given by *collection_name*
@@ -221,14 +328,41 @@ class SentinelHub:
         :param time_range: time range
         :param bad_request_ok: return empty list rather than raise error
             on bad request
+        :param time_split: Length of the periods into which a
+            bounded *time_range* is split. The periods are searched
+            concurrently.
         :return: list of features that include a "datetime" field for
             all intersections.
         """
-        max_feature_count = SH_CATALOG_FEATURE_LIMIT
+        return list(
+            self.iter_features(
+                collection_name,
+                bbox=bbox,
+                crs=crs,
+                time_range=time_range,
+                bad_request_ok=bad_request_ok,
+                time_split=time_split,
+            )
+        )
 
+    def iter_features(
+        self,
+        collection_name: str,
+        bbox: Tuple[float, float, float, float] = None,
+        crs: str = None,
+        time_range: Tuple[str, str] = None,
+        bad_request_ok: bool = False,
+        time_split: Union[str, pd.Timedelta] = DEFAULT_CATALOG_TIME_SPLIT,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Same as :meth:`get_features`, but yields the features of
+        each period of the split *time_range* as soon as it
+        has been searched. Duplicate features are omitted.
+        The features are not ordered.
+        """
         request = dict(
             collections=[collection_name],
-            limit=max_feature_count,
+            limit=SH_CATALOG_FEATURE_LIMIT,
             # Exclude most of the response data,
             # as this is not required (yet)
             fields=dict(
@@ -248,30 +382,110 @@ class SentinelHub:
 
             request.update(bbox=bbox)
 
+        t1 = t2 = None
         if time_range:
-
-            def to_sh_format(dt: str) -> pd.Timestamp:
-                dt = pd.to_datetime(dt, infer_datetime_format=True, utc=True)
-                # SH wants the old-style UTC-'Z'
-                # noinspection PyTypeChecker
-                return dt.isoformat().replace("+00:00", "Z")
-
             t1, t2 = time_range
-            if t1 or t2:
-                request.update(
-                    datetime=(
-                        f'{to_sh_format(t1) if t1 else ".."}/'
-                        f'{to_sh_format(t2) if t2 else ".."}'
-                    )
+            t1 = _to_utc_timestamp(t1) if t1 else None
+            t2 = _to_utc_timestamp(t2) if t2 else None
+
+        catalog_cache = self._catalog_cache
+        if catalog_cache is not None:
+            features = catalog_cache.get(
+                self.catalog_url, collection_name, bbox, (t1, t2)
+            )
+            if features is not None:
+                yield from features
+                return
+            # Feature geometries are required to filter cached features
+            request.update(
+                fields=dict(
+                    exclude=["bbox", "assets", "links"],
+                    include=["geometry", "properties.datetime"],
                 )
+            )
+
+        requests_ = [request]
+        if t1 is not None and t2 is not None:
+            time_split = pd.to_timedelta(time_split)
+            num_splits = max(1, math.ceil((t2 - t1) / time_split))
+            bounds = [t1 + i * time_split for i in range(num_splits)] + [t2]
+            requests_ = [
+                dict(request, datetime=_to_sh_time_interval(b1, b2))
+                for b1, b2 in zip(bounds[:-1], bounds[1:])
+            ]
+        elif t1 is not None or t2 is not None:
+            request.update(datetime=_to_sh_time_interval(t1, t2))
 
+        all_features = []
+        for feature in self._iter_search_results(requests_, bad_request_ok):
+            if catalog_cache is not None:
+                all_features.append(feature)
+            yield feature
+
+        # Empty results are not cached, as they
+        # may be caused by ignored bad requests
+        if catalog_cache is not None and all_features:
+            catalog_cache.put(
+                self.catalog_url, collection_name, bbox, (t1, t2), all_features
+            )
+
+    def _iter_search_results(
+        self, requests_: List[Dict[str, Any]], bad_request_ok: bool
+    ) -> Iterator[Dict[str, Any]]:
         search_url = f"{self.catalog_url}/search"
 
+        feature_ids = set()
+
+        def is_new_feature(feature: Dict[str, Any]) -> bool:
+            # Periods are closed intervals and hence
+            # adjacent periods may yield the same features
+            feature_id = feature.get("id")
+            if feature_id is None:
+                feature_id = json.dumps(feature, sort_keys=True)
+            if feature_id in feature_ids:
+                return False
+            feature_ids.add(feature_id)
+            return True
+
+        if len(requests_) == 1:
+            for feature in self._search_features(
+                search_url, requests_[0], bad_request_ok
+            ):
+                if is_new_feature(feature):
+                    yield feature
+            return
+
+        max_workers = min(len(requests_), self.max_concurrent_requests)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(self._search_features, search_url, r, bad_request_ok)
+                for r in requests_
+            ]
+            try:
+                for future in as_completed(futures):
+                    for feature in future.result():
+                        if is_new_feature(feature):
+                            yield feature
+            finally:
+                for future in futures:
+                    future.cancel()
+
+    def _search_features(
+        self, search_url: str, request: Dict[str, Any], bad_request_ok: bool
+    ) -> List[Dict[str, Any]]:
+        request = dict(request)
+        max_feature_count = request["limit"]
         all_features = []
         features_count = max_feature_count
         feature_offset = 0
         while features_count == max_feature_count:
-            response = self.session.post(search_url, json=request)
+            response, response_error = self._post(
+                search_url,
+                final_status_codes=(400,) if bad_request_ok else (),
+                json=request,
+            )
+            if response_error is not None:
+                raise response_error
 
             if bad_request_ok and response.status_code == 400:
                 break
@@ -313,107 +527,223 @@ class SentinelHub:
         :param max_timedelta: Maximum time delta for each generated time range
         :return: List time range tuples.
         """
-        max_timedelta = (
-            pd.to_timedelta(max_timedelta)
-            if isinstance(max_timedelta, str)
-            else max_timedelta
+        start_times, end_times = cls.features_to_time_range_arrays(
+            features, max_timedelta=max_timedelta
+        )
+        return list(
+            zip(
+                pd.DatetimeIndex(start_times, tz="UTC"),
+                pd.DatetimeIndex(end_times, tz="UTC"),
+            )
         )
 
-        timestamps = []
-        for feature in features:
-            if "properties" not in feature:
-                continue
-            properties = feature["properties"]
-            if "datetime" not in properties:
-                continue
-            datetime = properties["datetime"]
-            if not datetime:
-                continue
-            try:
-                timestamps.append(pd.to_datetime(datetime, utc=True))
-            except ValueError as e:
-                warnings.warn(
-                    f"failed parsing feature.properties.datetime: {e}", source=e
-                )
-
-        timestamps = sorted(set(timestamps))
-        num_timestamps = len(timestamps)
+    @classmethod
+    def features_to_time_range_arrays(
+        cls,
+        features: List[Dict[str, Any]],
+        max_timedelta: Union[str, pd.Timedelta] = "1H",
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Same as :meth:`features_to_time_ranges`, but returns the start
+        and end times of the time ranges as two ``datetime64[ns]``
+        arrays in UTC.
 
-        time_ranges: List[Tuple[pd.Timestamp, pd.Timestamp]] = []
+        :param features: Tile dictionaries as returned by SH WFS
+        :param max_timedelta: Maximum time delta for each generated time range
+        :return: Tuple of start times array and end times array.
+        """
+        max_timedelta = pd.to_timedelta(max_timedelta).to_timedelta64()
+
+        datetimes = [
+            feature["properties"]["datetime"]
+            for feature in features
+            if feature.get("properties", {}).get("datetime")
+        ]
+        timestamps = np.unique(_parse_utc_datetimes(datetimes))
+        if timestamps.size == 0:
+            return timestamps, timestamps
+
+        # A time range starts at a timestamp and includes all
+        # following timestamps less than max_timedelta apart from it
+        start_indexes = []
         i = 0
+        num_timestamps = len(timestamps)
         while i < num_timestamps:
-            timestamp1 = timestamp2 = timestamps[i]
-            while i < num_timestamps:
-                timestamp = timestamps[i]
-                if timestamp - timestamp1 >= max_timedelta:
-                    break
-                timestamp2 = timestamp
-                i += 1
-            time_ranges.append((timestamp1, timestamp2))
-
-        return time_ranges
-
-    def get_data(self, request: Dict, mime_type=None) -> Optional[requests.Response]:
+            start_indexes.append(i)
+            i = int(
+                np.searchsorted(timestamps, timestamps[i] + max_timedelta, side="left")
+            )
+        start_indexes = np.array(start_indexes, dtype=np.int64)
+        end_indexes = np.append(start_indexes[1:], num_timestamps) - 1
+        return timestamps[start_indexes], timestamps[end_indexes]
+
+    def get_data(
+        self, request: Union[Dict, bytes], mime_type=None
+    ) -> Optional[requests.Response]:
+        """
+        Get data for given Process API *request*.
+
+        Concurrent calls with identical requests share a single
+        Process API request and hence the returned response.
+
+        :param request: The Process API request, either as dictionary
+            or as JSON-encoded bytes, e.g., as returned by
+            :meth:`DataRequestTemplate.new_request`.
+        :param mime_type: Optional MIME type of the response.
+            Derived from *request* if not given.
+            Required, if *request* is given as bytes.
+        :return: The response.
+        """
         if not mime_type:
+            if isinstance(request, bytes):
+                raise ValueError("mime_type must be given for encoded requests")
             outputs = request["output"]["responses"]
             if len(outputs) > 1:
                 mime_type = "application/tar"
             else:
                 mime_type = outputs[0]["format"].get("type", "image/tiff")
 
+        key = self.get_request_fingerprint(
+            request, process_url=self.process_url, mime_type=mime_type
+        )
+        return self._single_flight.call(key, lambda: self._get_data(request, mime_type))
+
+    def _get_data(
+        self, request: Union[Dict, bytes], mime_type: str
+    ) -> Optional[requests.Response]:
+        headers = self._get_request_headers(mime_type)
+        if isinstance(request, bytes):
+            post_kwargs = dict(data=request)
+            headers["Content-Type"] = "application/json"
+        else:
+            post_kwargs = dict(json=request)
+
+        start_time = time.time()
+        response, response_error = self._post(
+            self.process_url, headers=headers, **post_kwargs
+        )
+        if response is not None and response.ok:
+            return response
+
+        end_time = time.time()
+
+        # Here: response.ok == False
+
+        if self.error_handler:
+            self.error_handler(response)
+
+        LOG.error(
+            f"Failed to fetch data from SentinelHub"
+            f" after {end_time - start_time} seconds"
+            f" and {self.num_retries} retries",
+            exc_info=response_error,
+        )
+        if response is not None:
+            LOG.error(f"HTTP status code was {response.status_code}")
+
+        if self.error_policy == "fail":
+            if response_error:
+                raise response_error
+            elif response is not None:
+                SentinelHubError.maybe_raise_for_response(response)
+        elif self.error_policy == "warn" and self.enable_warnings:
+            if response_error:
+                warnings.warn(f"Failed to fetch data: {response_error}")
+            elif response is not None:
+                try:
+                    SentinelHubError.maybe_raise_for_response(response)
+                except SentinelHubError as e:
+                    warnings.warn(f"Failed to fetch data: {e}")
+
+        # Return failed response (response.ok == False)
+        return response
+
+    def _post(
+        self,
+        url: str,
+        headers: Dict[str, str] = None,
+        final_status_codes: Sequence[int] = (),
+        **post_kwargs,
+    ) -> Tuple[Optional[requests.Response], Optional[Exception]]:
+        """
+        POST a request to *url* using the request scheduler.
+        Failed requests, including throttled ones, are retried
+        after "Retry-After" with exponential backoff.
+
+        :param url: The URL.
+        :param headers: Optional request headers.
+        :param final_status_codes: Status codes of failed responses
+            that are returned without retrying.
+        :param post_kwargs: Passed to ``session.post()``.
+        :return: A pair comprising the last response, which
+            may be None, and the last request error, if any.
+        """
         num_retries = self.num_retries
         retry_backoff_max = self.retry_backoff_max  # ms
         retry_backoff_base = self.retry_backoff_base
 
-        process_url = self.process_url
-        headers = self._get_request_headers(mime_type)
-
         response = None
         response_error = None
         last_retry = False
-        start_time = time.time()
 
         for retry in range(num_retries):
+            token_generation = self._token_manager.ensure_valid()
+            self._scheduler.acquire()
             try:
-                response = self.session.post(process_url, json=request, headers=headers)
+                response = self.session.post(url, headers=headers, **post_kwargs)
                 response_error = None
-            except oauthlib.oauth2.TokenExpiredError as e:
+            except (
+                oauthlib.oauth2.TokenExpiredError,
+                requests.exceptions.RequestException,
+            ) as e:
+                response_error = e
+                response = None
+            except BaseException:
+                self._scheduler.release()
+                raise
+            throttled = response is not None and _is_throttled(response.status_code)
+            self._scheduler.release(
+                status_code=response.status_code if response is not None else None,
+                retry_after=_get_retry_after(response) if throttled else None,
+            )
+            if isinstance(response_error, oauthlib.oauth2.TokenExpiredError):
                 if not last_retry and retry == num_retries - 1:
                     # Force a last retry
                     last_retry = True
                     retry -= 1
-                self._fetch_token()
-                response_error = e
-                response = None
-            except requests.exceptions.RequestException as e:
-                # What may be seen here is:
-                # requests.exceptions.ChunkedEncodingError:
-                # ("Connection broken:
-                #  InvalidChunkLength(got length b'', 0 bytes read)",
-                #  InvalidChunkLength(got length b'', 0 bytes read))
-                response_error = e
-                response = None
+                # Fetch a new token, unless another thread already did
+                self._token_manager.refresh(token_generation)
+            # Other request errors that may be seen here are:
+            # requests.exceptions.ChunkedEncodingError:
+            # ("Connection broken:
+            #  InvalidChunkLength(got length b'', 0 bytes read)",
+            #  InvalidChunkLength(got length b'', 0 bytes read))
             if response is not None and response.status_code == 401:
                 if not last_retry and retry == num_retries - 1:
                     # Force a last retry
                     last_retry = True
                     retry -= 1
-                self._fetch_token()
-            if response is not None and response.ok:
+                # Fetch a new token, unless another thread already did
+                self._token_manager.refresh(token_generation)
+            if response is not None and (
+                response.ok or response.status_code in final_status_codes
+            ):
                 # TODO (forman): verify response headers:
                 #   response_num_components, response_width, ...
                 # response_components = int(headers.get('SH-Components','-1'))
                 # response_width = int(headers.get('SH-Width', '-1'))
                 # response_height = int(headers.get('SH-Height', '-1'))
                 # response_sample_type = headers.get('SH-SampleType')
-                return response
+                return response, None
             else:
-                # Retry after 'Retry-After' with exponential backoff
+                # Retry after 'Retry-After' with exponential backoff.
+                # If throttled, the scheduler already pauses all
+                # requests for 'Retry-After'.
                 if response is not None:
                     error_message = (
                         f"Error {response.status_code}:" f" {response.reason}"
                     )
-                    retry_min = int(response.headers.get("Retry-After", "100"))
+                    retry_min = _get_retry_after(response) * 1000
                 else:
                     error_message = f"Error: {response_error}"
                     retry_min = 100
@@ -427,41 +757,43 @@ class SentinelHub:
                         f' = {"%.2f" % retry_total} ms...'
                     )
                     warnings.warn(retry_message)
-                time.sleep(retry_total / 1000.0)
+                time.sleep((retry_backoff if throttled else retry_total) / 1000.0)
                 retry_backoff_max *= retry_backoff_base
 
-        end_time = time.time()
-
-        # Here: response.ok == False
-
-        if self.error_handler:
-            self.error_handler(response)
+        return response, response_error
 
-        LOG.error(
-            f"Failed to fetch data from SentinelHub"
-            f" after {end_time - start_time} seconds"
-            f" and {num_retries} retries",
-            exc_info=response_error,
-        )
-        if response is not None:
-            LOG.error(f"HTTP status code was {response.status_code}")
-
-        if self.error_policy == "fail":
-            if response_error:
-                raise response_error
-            elif response is not None:
-                SentinelHubError.maybe_raise_for_response(response)
-        elif self.error_policy == "warn" and self.enable_warnings:
-            if response_error:
-                warnings.warn(f"Failed to fetch data: {response_error}")
-            elif response is not None:
-                try:
-                    SentinelHubError.maybe_raise_for_response(response)
-                except SentinelHubError as e:
-                    warnings.warn(f"Failed to fetch data: {e}")
-
-        # Return failed response (response.ok == False)
-        return response
+    @classmethod
+    def get_request_fingerprint(cls, request: Union[Dict, bytes], **context) -> str:
+        """
+        Compute a stable fingerprint for the given Process API *request*.
+        Requests that differ only in the order of their
+        dictionary entries have the same fingerprint.
+
+        :param request: The request as returned by :meth:`new_data_request`
+            or the canonical JSON-encoded request as returned by
+            :meth:`DataRequestTemplate.new_request`. Both forms
+            of the same request have the same fingerprint.
+        :param context: Optional additional JSON-serializable values
+            that contribute to the fingerprint, e.g., the Process API URL.
+        :return: A SHA-256 hex digest.
+        """
+        if isinstance(request, bytes):
+            # Same as json.dumps() below, but without decoding the request
+            request_json = request.decode("utf-8")
+            keys = sorted(["request", *context.keys()])
+            canonical_json = (
+                "{"
+                + ",".join(
+                    json.dumps(k)
+                    + ":"
+                    + (request_json if k == "request" else _to_json(context[k]))
+                    for k in keys
+                )
+                + "}"
+            )
+        else:
+            canonical_json = _to_json(dict(request=request, **context))
+        return hashlib.sha256(canonical_json.encode("utf-8")).hexdigest()
 
     @classmethod
     def _get_request_headers(cls, mime_type: str):
@@ -474,6 +806,43 @@ class SentinelHub:
             f"{platform.system()}/{platform.version()}",
         }
 
+    @classmethod
+    def new_data_request_template(
+        cls,
+        dataset_name: str,
+        band_names: Sequence[str],
+        size: Tuple[int, int],
+        crs: str = None,
+        upsampling: str = DEFAULT_RESAMPLING,
+        downsampling: str = DEFAULT_RESAMPLING,
+        mosaicking_order: str = DEFAULT_MOSAICKING_ORDER,
+        collection_id: str = None,
+        band_units: Union[str, Sequence[str]] = None,
+        band_sample_types: Union[str, Sequence[str]] = None,
+    ) -> "DataRequestTemplate":
+        """
+        Create a template for data requests that only differ in
+        their bounding box and time range.
+        The parameters are the same as for :meth:`new_data_request`.
+
+        :return: A new data request template.
+        """
+        request = cls.new_data_request(
+            dataset_name,
+            band_names,
+            size,
+            crs=crs,
+            bbox=_BBOX_PLACEHOLDER,
+            time_range=(_TIME_FROM_PLACEHOLDER, _TIME_TO_PLACEHOLDER),
+            upsampling=upsampling,
+            downsampling=downsampling,
+            mosaicking_order=mosaicking_order,
+            collection_id=collection_id,
+            band_units=band_units,
+            band_sample_types=band_sample_types,
+        )
+        return DataRequestTemplate(_to_json(request))
+
     @classmethod
     def new_data_request(
         cls,
@@ -606,7 +975,111 @@ class SentinelHub:
             )
         )
 
-    def _fetch_token(self):
+    @classmethod
+    def new_time_series_request(
+        cls,
+        dataset_name: str,
+        band_names: Sequence[str],
+        size: Tuple[int, int],
+        time_ranges: Sequence[Tuple[pd.Timestamp, pd.Timestamp]],
+        crs: str = None,
+        bbox: Tuple[float, float, float, float] = None,
+        upsampling: str = DEFAULT_RESAMPLING,
+        downsampling: str = DEFAULT_RESAMPLING,
+        mosaicking_order: str = DEFAULT_MOSAICKING_ORDER,
+        collection_id: str = None,
+        band_units: Union[str, Sequence[str]] = None,
+    ) -> Dict:
+        """
+        Create a request for the time series of the given bands
+        within a small bounding box.
+
+        Unlike :meth:`new_data_request`, the request covers multiple
+        time slices at once: its evalscript uses the "TILE"
+        mosaicking and assigns the first valid sample of the
+        ordered tiles to each of the given *time_ranges*
+        containing the tile's acquisition time.
+        The response has ``len(time_ranges) * len(band_names)``
+        FLOAT32 bands, which are ordered by time slice first.
+        Missing samples are NaN.
+
+        The remaining parameters are the same as for
+        :meth:`new_data_request`.
+
+        :param time_ranges: The time ranges of the time slices.
+        :return: A new time series request.
+        """
+        time_from = min(start_time for start_time, _ in time_ranges)
+        time_to = max(end_time for _, end_time in time_ranges)
+        request = cls.new_data_request(
+            dataset_name,
+            band_names,
+            size,
+            crs=crs,
+            bbox=bbox,
+            time_range=(time_from, time_to),
+            upsampling=upsampling,
+            downsampling=downsampling,
+            mosaicking_order=mosaicking_order,
+            collection_id=collection_id,
+        )
+
+        input_band_names = [*band_names, "dataMask"]
+        if isinstance(band_units, str):
+            band_units = [band_units] * len(band_names)
+        num_bands = len(band_names)
+        num_output_bands = len(time_ranges) * num_bands
+        time_bounds = [
+            [_to_epoch_millis(start_time), _to_epoch_millis(end_time)]
+            for start_time, end_time in time_ranges
+        ]
+        input_element = {"bands": input_band_names}
+        if band_units:
+            input_element["units"] = [*band_units, "DN"]
+        evalscript = [
+            "//VERSION=3",
+            "function setup() {",
+            "    return {",
+            "        input: [" + json.dumps(input_element) + "],",
+            "        output: [",
+            "            {bands: " + str(num_output_bands) + ", sampleType: 'FLOAT32'}",
+            "        ],",
+            "        mosaicking: 'TILE'",
+            "    };",
+            "}",
+            "var timeBounds = " + json.dumps(time_bounds) + ";",
+            "function evaluatePixel(samples, scenes) {",
+            "    var result = new Array(" + str(num_output_bands) + ").fill(NaN);",
+            "    var found = new Array(timeBounds.length).fill(false);",
+            "    for (var i = 0; i < samples.length; i++) {",
+            "        var sample = samples[i];",
+            "        if (sample.dataMask === 0) continue;",
+            # Unlike an orbit's "dateFrom", which is the start of
+            # its day, a tile's "date" is its acquisition time
+            "        var t = new Date(scenes.tiles[i].date).getTime();",
+            "        for (var j = 0; j < timeBounds.length; j++) {",
+            "            if (!found[j]"
+            " && t >= timeBounds[j][0] && t < timeBounds[j][1]) {",
+            "                found[j] = true;",
+            *(
+                f"                result[j * {num_bands} + {band_index}]"
+                f" = sample.{band_name};"
+                for band_index, band_name in enumerate(band_names)
+            ),
+            "            }",
+            "        }",
+            "    }",
+            "    return result;",
+            "}",
+        ]
+        request["evalscript"] = "\n".join(evalscript)
+        return request
+
+    def _get(self, url: str, **kwargs) -> requests.Response:
+        self._token_manager.ensure_valid()
+        return self.session.get(url, **kwargs)
+
+    def _fetch_token(self) -> Any:
         if not self.client_id or not self.client_secret:
             raise ValueError(
                 "Both client_id and client_secret must be provided.\n"
@@ -617,13 +1090,124 @@ class SentinelHub:
                 "api/latest/#/API/authentication"
             )
 
-        self.session.fetch_token(
+        token = self.session.fetch_token(
             token_url=self.oauth2_url + "/token",
             client_id=self.client_id,
             client_secret=self.client_secret,
         )
 
         LOG.info("fetched SentinelHub access token successfully")
+        return token
+
+
+_BBOX_PLACEHOLDER = "@@xcube_sh:bbox@@"
+_TIME_FROM_PLACEHOLDER = "@@xcube_sh:time_from@@"
+_TIME_TO_PLACEHOLDER = "@@xcube_sh:time_to@@"
+_BBOX_PLACEHOLDER_JSON = json.dumps(_BBOX_PLACEHOLDER)
+_TIME_FROM_PLACEHOLDER_JSON = json.dumps(_TIME_FROM_PLACEHOLDER)
+_TIME_TO_PLACEHOLDER_JSON = json.dumps(_TIME_TO_PLACEHOLDER)
+_PLACEHOLDER_PATTERN = re.compile(
+    "("
+    + "|".join(
+        map(
+            re.escape,
+            (
+                _BBOX_PLACEHOLDER_JSON,
+                _TIME_FROM_PLACEHOLDER_JSON,
+                _TIME_TO_PLACEHOLDER_JSON,
+            ),
+        )
+    )
+    + ")"
+)
+
+
+# Shared instances by configuration hash. An instance is dropped and
+# closed once it is neither used nor among the most recently used ones.
+_SHARED_SENTINEL_HUBS: "weakref.WeakValueDictionary[str, SentinelHub]" = (
+    weakref.WeakValueDictionary()
+)
+_RECENT_SHARED_SENTINEL_HUBS: "collections.OrderedDict[str, SentinelHub]" = (
+    collections.OrderedDict()
+)
+_MAX_RECENT_SHARED_SENTINEL_HUBS = 4
+_SHARED_SENTINEL_HUBS_LOCK = threading.Lock()
+
+
+def _get_shared_sentinel_hub(config: Dict[str, Any]) -> SentinelHub:
+    """
+    Get the process-wide shared SentinelHub instance
+    for given configuration. Used to unpickle SentinelHub instances.
+    """
+    key = _get_config_hash(config)
+    with _SHARED_SENTINEL_HUBS_LOCK:
+        sentinel_hub = _SHARED_SENTINEL_HUBS.get(key)
+        if sentinel_hub is None:
+            sentinel_hub = SentinelHub(**config)
+            sentinel_hub._shared = True
+            _SHARED_SENTINEL_HUBS[key] = sentinel_hub
+        _RECENT_SHARED_SENTINEL_HUBS[key] = sentinel_hub
+        _RECENT_SHARED_SENTINEL_HUBS.move_to_end(key)
+        while len(_RECENT_SHARED_SENTINEL_HUBS) > _MAX_RECENT_SHARED_SENTINEL_HUBS:
+            _RECENT_SHARED_SENTINEL_HUBS.popitem(last=False)
+        return sentinel_hub
+
+
+def _get_config_hash(config: Dict[str, Any]) -> str:
+    """Get a hash of *config*, so that no secrets are kept as keys."""
+    config_json = json.dumps(config, sort_keys=True, default=repr)
+    return hashlib.sha256(config_json.encode("utf-8")).hexdigest()
+
+
+class DataRequestTemplate:
+    """
+    A pre-serialized Process API data request in which only the
+    bounding box and time range are substituted for each request.
+    Use :meth:`SentinelHub.new_data_request_template`
+    to create instances.
+
+    :param template_json: The canonical JSON encoding of a data request
+        containing placeholders for bounding box and time range.
+    """
+
+    def __init__(self, template_json: str):
+        self._template_json = template_json
+        self._parts = _PLACEHOLDER_PATTERN.split(template_json)
+
+    def new_request(
+        self,
+        bbox: Tuple[float, float, float, float],
+        time_range: Tuple[Union[str, pd.Timestamp], Union[str, pd.Timestamp]],
+    ) -> bytes:
+        """
+        Create a new data request.
+
+        :param bbox: The bounding box.
+        :param time_range: The time range.
+        :return: The canonical JSON encoding of the data request,
+            as accepted by :meth:`SentinelHub.get_data`.
+        """
+        time_from, time_to = time_range
+        if not isinstance(time_from, str):
+            time_from = time_from.isoformat()
+        if not isinstance(time_to, str):
+            time_to = time_to.isoformat()
+        values = {
+            _BBOX_PLACEHOLDER_JSON: _to_json(list(bbox)),
+            _TIME_FROM_PLACEHOLDER_JSON: json.dumps(time_from),
+            _TIME_TO_PLACEHOLDER_JSON: json.dumps(time_to),
+        }
+        parts = self._parts
+        # Every odd part is a placeholder
+        return "".join(
+            values[part] if i % 2 else part for i, part in enumerate(parts)
+        ).encode("utf-8")
+
+    def __getstate__(self):
+        return dict(template_json=self._template_json)
+
+    def __setstate__(self, state):
+        self.__init__(**state)
 
 
 class SentinelHubError(ValueError):
@@ -662,6 +1246,17 @@ class SerializableOAuth2Session(requests_oauthlib.OAuth2Session):
     The class requests_oauthlib.OAuth2Session does not implement the
     magic methods __getstate__ and __setstate__
     which are used during pickling.
+
+    The session's transport adapters, and hence their connection pools,
+    are not pickled, but created anew after unpickling.
+
+    :param pool_connections: Number of hosts for which
+        connection pools are kept.
+    :param pool_maxsize: Maximum number of connections
+        per host kept alive for reuse.
+    :param pool_block: Whether to wait for a free connection,
+        if *pool_maxsize* connections to a host are in use,
+        rather than opening a connection that is not kept alive.
     """
 
     _SERIALIZED_ATTRS = [
@@ -683,12 +1278,37 @@ class SerializableOAuth2Session(requests_oauthlib.OAuth2Session):
         "cert",
         "verify",
         "max_redirects",
-        "adapters",
+        "pool_connections",
+        "pool_maxsize",
+        "pool_block",
     ]
 
-    def __init__(self, *args, **kwargs):
+    def __init__(
+        self,
+        *args,
+        pool_connections: int = DEFAULT_NUM_CONNECTION_POOLS,
+        pool_maxsize: int = DEFAULT_MAX_CONCURRENT_REQUESTS,
+        pool_block: bool = False,
+        **kwargs,
+    ):
         super().__init__(*args, **kwargs)
         self.auth = None
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self._mount_adapters()
+
+    def _mount_adapters(self):
+        self.adapters = collections.OrderedDict()
+        for prefix in ("https://", "http://"):
+            self.mount(
+                prefix,
+                requests.adapters.HTTPAdapter(
+                    pool_connections=self.pool_connections,
+                    pool_maxsize=self.pool_maxsize,
+                    pool_block=self.pool_block,
+                ),
+            )
 
     def __getstate__(self):
         return {a: getattr(self, a) for a in self._SERIALIZED_ATTRS}
@@ -696,6 +1316,61 @@ class SerializableOAuth2Session(requests_oauthlib.OAuth2Session):
     def __setstate__(self, state):
         for a in self._SERIALIZED_ATTRS:
             setattr(self, a, state[a])
+        self._mount_adapters()
+
+
+def _parse_utc_datetimes(datetimes: Sequence[str]) -> np.ndarray:
+    """Parse datetime strings into a ``datetime64[ns]`` array in UTC."""
+    try:
+        index = pd.to_datetime(datetimes, utc=True, format="ISO8601")
+    except (ValueError, TypeError):
+        # Parse one by one, so we can skip invalid datetimes
+        # (and support pandas versions without "ISO8601" format)
+        timestamps = []
+        for datetime in datetimes:
+            try:
+                timestamps.append(pd.to_datetime(datetime, utc=True))
+            except ValueError as e:
+                warnings.warn(
+                    f"failed parsing feature.properties.datetime: {e}", source=e
+                )
+        index = pd.DatetimeIndex(timestamps, tz="UTC")
+    return index.tz_convert(None).values.astype("datetime64[ns]")
+
+
+def _to_utc_timestamp(dt: Union[str, pd.Timestamp]) -> pd.Timestamp:
+    return pd.to_datetime(dt, utc=True)
+
+
+def _to_epoch_millis(timestamp: Union[str, pd.Timestamp]) -> int:
+    return int(_to_utc_timestamp(timestamp).value // 1_000_000)
+
+
+def _to_sh_time_interval(t1: Optional[pd.Timestamp], t2: Optional[pd.Timestamp]) -> str:
+    def to_sh_format(dt: Optional[pd.Timestamp]) -> str:
+        if dt is None:
+            return ".."
+        # SH wants the old-style UTC-'Z'
+        return dt.isoformat().replace("+00:00", "Z")
+
+    return f"{to_sh_format(t1)}/{to_sh_format(t2)}"
+
+
+def _to_json(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"))
+
+
+def _is_throttled(status_code: int) -> bool:
+    return status_code == 429 or status_code >= 500
+
+
+def _get_retry_after(response: requests.Response) -> float:
+    """Get the "Retry-After" time in seconds, which SentinelHub
+    gives in milliseconds."""
+    try:
+        return int(response.headers.get("Retry-After", "100")) / 1000.0
+    except ValueError:
+        return 0.1
 
 
 def _get_url(url: Optional[str], default_url: Optional[str], env_var: str) -> str:
@@ -5,7 +5,6 @@
 from typing import Iterator, Tuple, Optional, Dict, Any, Union, Container
 
 import xarray as xr
-import zarr
 from xcube.core.store import DATASET_TYPE
 from xcube.core.store import DataDescriptor
 from xcube.core.store import DataOpener
@@ -24,12 +23,17 @@ from xcube.util.jsonschema import JsonNumberSchema
 from xcube.util.jsonschema import JsonObjectSchema
 from xcube.util.jsonschema import JsonStringSchema
 
+from .cache import ConcurrentLRUStoreCache
+from .cache import CubeManifestCache
+from .cache import DiskChunkCache
 from .chunkstore import SentinelHubChunkStore
 from .config import CubeConfig
 from .constants import CRS_ID_TO_URI
 from .constants import DEFAULT_CLIENT_ID
 from .constants import DEFAULT_CLIENT_SECRET
 from .constants import DEFAULT_CRS
+from .constants import DEFAULT_MAX_CONCURRENT_REQUESTS
+from .constants import DEFAULT_MAX_DISK_CACHE_SIZE
 from .constants import DEFAULT_MOSAICKING_ORDER
 from .constants import DEFAULT_NUM_RETRIES
 from .constants import DEFAULT_RESAMPLING
@@ -41,6 +45,7 @@ from .constants import DEFAULT_TIME_TOLERANCE
 from .constants import MOSAICKING_ORDERS
 from .constants import RESAMPLINGS
 from .constants import SH_DATA_OPENER_ID
+from .manifest import CubeManifest
 from .metadata import SentinelHubMetadata
 from .sentinelhub import SentinelHub
 
@@ -109,6 +114,22 @@ class SentinelHubDataOpener(DataOpener):
             - An identifier used by Sentinel HUB to identify BYOC datasets.
         * ``four_d: bool``
             - If True, variables will represented as fourth dimension.
+        * ``coalesce_bands: bool``
+            - If True, the chunks of all variables sharing a tile
+            are fetched using a single request.
+        * ``time_chunk_size: int``
+            - Number of time steps per chunk. Each chunk is
+            fetched using a single request.
+        * ``max_cache_size: int``
+            - Size of an in-memory chunk cache in bytes.
+        * ``disk_cache_dir: str``
+            - Directory of a persistent chunk cache.
+        * ``max_disk_cache_size: int``
+            - Maximum size of the persistent chunk cache in bytes.
+        * ``manifest_dir: str``
+            - Directory of cube manifests. Cubes opened before
+            with the same parameters are opened from their
+            manifest without querying the catalog.
 
         In addition, all store parameters can be used, if the data
         opener is used on its own. See
@@ -138,6 +159,10 @@ class SentinelHubDataOpener(DataOpener):
                     "num_retries",
                     "retry_backoff_max",
                     "retry_backoff_base",
+                    "max_concurrent_requests",
+                    "connection_pool_size",
+                    "catalog_cache_ttl",
+                    "catalog_cache_dir",
                 ),
             )
             sentinel_hub = SentinelHub(**sh_kwargs)
@@ -165,7 +190,8 @@ class SentinelHubDataOpener(DataOpener):
         )
 
         chunk_store_kwargs, open_params = schema.process_kwargs_subset(
-            open_params, ("observer", "trace_store_calls")
+            open_params,
+            ("observer", "trace_store_calls", "coalesce_bands", "time_chunk_size"),
         )
 
         band_names = cube_config_kwargs.pop("variable_names", None)
@@ -181,12 +207,33 @@ class SentinelHubDataOpener(DataOpener):
             band_fill_values=band_fill_values,
             **cube_config_kwargs,
         )
+        disk_cache_dir = open_params.pop("disk_cache_dir", None)
+        max_disk_cache_size = open_params.pop(
+            "max_disk_cache_size", DEFAULT_MAX_DISK_CACHE_SIZE
+        )
+        if disk_cache_dir:
+            chunk_store_kwargs["chunk_cache"] = DiskChunkCache(
+                disk_cache_dir, max_size=max_disk_cache_size
+            )
+        manifest_dir = open_params.pop("manifest_dir", None)
+        manifest_cache = CubeManifestCache(manifest_dir) if manifest_dir else None
+        manifest = (
+            manifest_cache.get(
+                CubeManifest.new_key(
+                    cube_config, chunk_store_kwargs.get("time_chunk_size", 1)
+                )
+            )
+            if manifest_cache is not None
+            else None
+        )
         chunk_store = SentinelHubChunkStore(
-            sentinel_hub, cube_config, **chunk_store_kwargs
+            sentinel_hub, cube_config, manifest=manifest, **chunk_store_kwargs
         )
+        if manifest_cache is not None and manifest is None:
+            manifest_cache.put(chunk_store.get_manifest())
         max_cache_size = open_params.pop("max_cache_size", None)
         if max_cache_size:
-            chunk_store = zarr.LRUStoreCache(chunk_store, max_size=max_cache_size)
+            chunk_store = ConcurrentLRUStoreCache(chunk_store, max_size=max_cache_size)
         cube = xr.open_zarr(chunk_store, **open_params)
 
         if hasattr(cube, "zarr_store"):
@@ -258,6 +305,15 @@ class SentinelHubDataOpener(DataOpener):
         )
         cache_params = dict(
             max_cache_size=JsonIntegerSchema(minimum=0),
+            disk_cache_dir=JsonStringSchema(),
+            max_disk_cache_size=JsonIntegerSchema(
+                minimum=0, default=DEFAULT_MAX_DISK_CACHE_SIZE
+            ),
+            manifest_dir=JsonStringSchema(),
+        )
+        chunk_store_params = dict(
+            coalesce_bands=JsonBooleanSchema(default=False),
+            time_chunk_size=JsonIntegerSchema(minimum=1, default=1),
         )
         # required cube_params
         required = [
@@ -273,7 +329,9 @@ class SentinelHubDataOpener(DataOpener):
             sh_params = sh_schema.properties
             required.extend(sh_schema.required or [])
         return JsonObjectSchema(
-            properties=dict(**sh_params, **cube_params, **cache_params),
+            properties=dict(
+                **sh_params, **cube_params, **cache_params, **chunk_store_params
+            ),
             required=required,
         )
 
@@ -441,6 +499,25 @@ class SentinelHubDataStore(DefaultSearchMixin, SentinelHubDataOpener, DataStore)
             retry_backoff_base=JsonNumberSchema(
                 default=DEFAULT_RETRY_BACKOFF_BASE, exclusive_minimum=1.0
             ),
+            max_concurrent_requests=JsonIntegerSchema(
+                default=DEFAULT_MAX_CONCURRENT_REQUESTS,
+                minimum=1,
+                title="Maximum number of concurrent data requests",
+            ),
+            connection_pool_size=JsonIntegerSchema(
+                minimum=1,
+                nullable=True,
+                title="Maximum number of connections per host kept alive",
+            ),
+            catalog_cache_ttl=JsonNumberSchema(
+                minimum=0,
+                nullable=True,
+                title="Time to live of cached catalog search results in seconds",
+            ),
+            catalog_cache_dir=JsonStringSchema(
+                nullable=True,
+                title="Directory of persistent catalog search results",
+            ),
         )
         required = None
         if not DEFAULT_CLIENT_ID or not DEFAULT_CLIENT_SECRET:
@@ -0,0 +1,255 @@
+# Copyright © 2022-2024 by the xcube development team and contributors
+# Permissions are hereby granted under the terms of the MIT License:
+# https://opensource.org/licenses/MIT.
+
+import math
+import warnings
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import pyproj
+import xarray as xr
+
+from .chunkstore import SentinelHubChunkStore
+from .config import CubeConfig
+from .constants import CRS_ID_TO_URI
+from .constants import DEFAULT_MAX_TIME_SERIES_SLICES
+from .constants import SH_MAX_IMAGE_SIZE
+from .sentinelhub import SentinelHub
+from .sentinelhub import SentinelHubError
+
+Geometry = Union[
+    Tuple[float, float],
+    Tuple[float, float, float, float],
+    Any,  # any object with a "bounds" attribute, e.g., shapely geometries
+]
+
+Bbox = Tuple[float, float, float, float]
+
+
+def open_time_series(
+    cube_config: CubeConfig,
+    geometries: Sequence[Geometry],
+    sentinel_hub: SentinelHub = None,
+    max_time_slices: int = DEFAULT_MAX_TIME_SERIES_SLICES,
+    **sh_kwargs,
+) -> xr.Dataset:
+    """
+    Extract the time series of the bands given by *cube_config*
+    at the given points or within small polygons.
+
+    In contrast to reading time series from a cube opened by
+    :func:`open_cube`, which fetches tiles of *cube_config.tile_size*
+    for every time step, only the pixels covering a geometry are
+    requested, and each request covers up to *max_time_slices*
+    time steps.
+
+    The time steps are the ones of the cube given by *cube_config*.
+    If *cube_config.time_period* is not given, they are derived from
+    the observations within *cube_config.bbox*, which should therefore
+    enclose the geometries.
+
+    The values of polygons are the means of their valid pixels
+    in the bounding box of the polygon at *cube_config.spatial_res*.
+
+    :param cube_config: The cube configuration.
+    :param geometries: Points given as (x, y) tuples, small polygons
+        given by their bounding boxes as (x1, y1, x2, y2) tuples,
+        or objects with a "bounds" attribute, such as shapely
+        geometries. Coordinates refer to *cube_config.crs*.
+    :param sentinel_hub: Optional instance of SentinelHub,
+        the object representing the Sentinel Hub API.
+    :param max_time_slices: Maximum number of time slices
+        fetched by a single request.
+    :param sh_kwargs: Optional keyword arguments passed to the
+        SentinelHub constructor. Only valid if
+         *sentinel_hub* is not given.
+    :return: The time series represented by an xarray Dataset object
+        with dimensions "time" and "geometry".
+    """
+    if max_time_slices < 1:
+        raise ValueError("max_time_slices must be a positive integer")
+    if sentinel_hub is not None:
+        if sh_kwargs:
+            raise ValueError(
+                f"unexpected keyword-arguments:" f' {", ".join(sh_kwargs.keys())}'
+            )
+        return _open_time_series(sentinel_hub, cube_config, geometries, max_time_slices)
+    sentinel_hub = SentinelHub(**sh_kwargs)
+    try:
+        return _open_time_series(sentinel_hub, cube_config, geometries, max_time_slices)
+    finally:
+        sentinel_hub.close()
+
+
+def _open_time_series(
+    sentinel_hub: SentinelHub,
+    cube_config: CubeConfig,
+    geometries: Sequence[Geometry],
+    max_time_slices: int,
+) -> xr.Dataset:
+    store = SentinelHubChunkStore(sentinel_hub, cube_config)
+    # Band names may have been resolved by the store
+    cube_config = store.cube_config
+    num_times = len(store.time_ranges)
+    time_batches = [
+        range(start, min(start + max_time_slices, num_times))
+        for start in range(0, num_times, max_time_slices)
+    ]
+
+    bboxes = [_to_bbox(geometry) for geometry in geometries]
+    requests = [
+        _new_time_series_request(
+            cube_config,
+            bbox,
+            [store.request_time_range(time_index) for time_index in time_batch],
+        )
+        for bbox in bboxes
+        for time_batch in time_batches
+    ]
+
+    band_names = cube_config.band_names
+    values = np.full(
+        (len(band_names), num_times, len(bboxes)), np.nan, dtype=np.float32
+    )
+    if requests:
+        max_workers = min(len(requests), sentinel_hub.max_concurrent_requests)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(
+                lambda request: _fetch_time_series(sentinel_hub, *request),
+                requests,
+            )
+            for request_index, result in enumerate(results):
+                geometry_index, batch_index = divmod(request_index, len(time_batches))
+                time_batch = time_batches[batch_index]
+                values[:, time_batch.start : time_batch.stop, geometry_index] = result
+
+    return _new_time_series_dataset(store, bboxes, values)
+
+
+def _to_bbox(geometry: Geometry) -> Bbox:
+    if hasattr(geometry, "bounds"):
+        geometry = geometry.bounds
+    coords = tuple(map(float, geometry))
+    if len(coords) == 2:
+        x, y = coords
+        return x, y, x, y
+    if len(coords) == 4:
+        x1, y1, x2, y2 = coords
+        if x1 > x2 or y1 > y2:
+            raise ValueError(f"invalid geometry bounds {coords!r}")
+        return coords
+    raise ValueError(
+        "geometries must be given as (x, y) or"
+        " (x1, y1, x2, y2) tuples or have bounds"
+    )
+
+
+def _new_time_series_request(
+    cube_config: CubeConfig,
+    bbox: Bbox,
+    time_ranges: List[Tuple[pd.Timestamp, pd.Timestamp]],
+) -> Tuple[dict, Tuple[int, int], int]:
+    spatial_res = cube_config.spatial_res
+    x1, y1, x2, y2 = bbox
+    # Rounding avoids an extra pixel due to floating point errors
+    width = max(1, math.ceil(round((x2 - x1) / spatial_res, 6)))
+    height = max(1, math.ceil(round((y2 - y1) / spatial_res, 6)))
+    if width > SH_MAX_IMAGE_SIZE or height > SH_MAX_IMAGE_SIZE:
+        raise ValueError(
+            f"geometry bounds {bbox!r} are too large for"
+            f" extracting time series, use open_cube() instead"
+        )
+    # Snap the request to whole pixels around the geometry's center
+    x, y = (x1 + x2) / 2, (y1 + y2) / 2
+    request_bbox = (
+        x - width * spatial_res / 2,
+        y - height * spatial_res / 2,
+        x + width * spatial_res / 2,
+        y + height * spatial_res / 2,
+    )
+    request = SentinelHub.new_time_series_request(
+        cube_config.dataset_name,
+        cube_config.band_names,
+        (width, height),
+        time_ranges,
+        crs=CRS_ID_TO_URI[cube_config.crs],
+        bbox=request_bbox,
+        upsampling=cube_config.upsampling,
+        downsampling=cube_config.downsampling,
+        mosaicking_order=cube_config.mosaicking_order,
+        collection_id=cube_config.collection_id,
+        band_units=cube_config.band_units,
+    )
+    return request, (width, height), len(time_ranges)
+
+
+def _fetch_time_series(
+    sentinel_hub: SentinelHub,
+    request: dict,
+    size: Tuple[int, int],
+    num_times: int,
+) -> np.ndarray:
+    """
+    Fetch the time series for *request* and return its
+    values as array of shape (num_bands, num_times).
+    """
+    response = sentinel_hub.get_data(request, mime_type="application/octet-stream")
+    if response is None or not response.ok:
+        bbox = request["input"]["bounds"]["bbox"]
+        message = f"cannot fetch time series for bbox {bbox!r}"
+        if response is not None:
+            message += f": {SentinelHubError(response)}"
+        raise SentinelHubError(message, response=response)
+
+    width, height = size
+    data = np.frombuffer(zlib.decompress(response.content), dtype=np.float32)
+    data = data.reshape((height * width, num_times, -1))
+    with warnings.catch_warnings():
+        # Time slices without any valid pixel yield NaN
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        return np.nanmean(data, axis=0).T
+
+
+def _new_time_series_dataset(
+    store: SentinelHubChunkStore, bboxes: List[Bbox], values: np.ndarray
+) -> xr.Dataset:
+    cube_config = store.cube_config
+    time_ranges = store.time_ranges
+    start_times = pd.DatetimeIndex([start for start, _ in time_ranges])
+    end_times = pd.DatetimeIndex([end for _, end in time_ranges])
+    if start_times.tz is not None:
+        start_times = start_times.tz_localize(None)
+        end_times = end_times.tz_localize(None)
+
+    if pyproj.CRS.from_string(cube_config.crs).is_geographic:
+        x_name, y_name = "lon", "lat"
+    else:
+        x_name, y_name = "x", "y"
+
+    return xr.Dataset(
+        {
+            band_name: xr.DataArray(
+                values[band_index],
+                dims=("time", "geometry"),
+                attrs=store.get_band_attrs(band_name),
+            )
+            for band_index, band_name in enumerate(cube_config.band_names)
+        },
+        coords={
+            "time": ("time", (start_times + (end_times - start_times) / 2).values),
+            "time_bnds": (
+                ("time", "bnds"),
+                np.stack([start_times.values, end_times.values], axis=1),
+            ),
+            x_name: ("geometry", [(x1 + x2) / 2 for x1, _, x2, _ in bboxes]),
+            y_name: ("geometry", [(y1 + y2) / 2 for _, y1, _, y2 in bboxes]),
+        },
+        attrs=dict(
+            Conventions="CF-1.7",
+            title=f"{cube_config.dataset_name} Time Series",
+        ),
+    )
@@ -2,12 +2,18 @@
 # Permissions are hereby granted under the terms of the MIT License:
 # https://opensource.org/licenses/MIT.
 
+import itertools
 import json
 import os.path
-from typing import Any, Dict, Sequence, Union
+import tempfile
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional, Sequence, Set, Union
 
 import numpy as np
 import zarr
+from zarr.storage import BaseStore
+
+from .manifest import CubeManifest
 
 
 class ZarrWriter:
@@ -87,6 +93,87 @@ class ZarrWriter:
         )
         self.write_json(self.sub_path(array_name, ".zattrs"), attrs or dict())
 
+    def write_item(self, key: str, item_bytes: Any):
+        """
+        Write the item of a Zarr store given by *key*,
+        e.g., "B01/.zarray" or "B01/0.1.2".
+        The item is written atomically, so it is either
+        complete or missing, if writing is interrupted.
+        """
+        dir_key, _, _ = key.rpartition("/")
+        if dir_key:
+            self.ensure_sub_dir(dir_key)
+        else:
+            self.ensure_root_dir()
+        file_path = self.sub_path(*key.split("/"))
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(file_path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fp:
+                fp.write(item_bytes)
+            os.replace(temp_path, file_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def has_item(self, key: str) -> bool:
+        """Test whether the item given by *key* has been written."""
+        return os.path.isfile(self.sub_path(*key.split("/")))
+
+    def copy_store(
+        self,
+        store: BaseStore,
+        batch_size: int = 64,
+        checkpoint: Optional["ZarrCheckpoint"] = None,
+        keys: Optional[Iterable[str]] = None,
+        key_mapping: Optional[Callable[[str], str]] = None,
+    ):
+        """
+        Copy all items of *store* as they are, so chunks are neither
+        decoded nor encoded again.
+
+        Items are read in batches of *batch_size* keys using
+        ``store.getitems()``, so that stores may fetch them
+        concurrently. Items missing in the result are not
+        written, hence their chunks read as fill values.
+        Empty items, such as directory entries, are skipped.
+
+        :param store: A Zarr store, e.g., a
+            :class:`xcube_sh.chunkstore.SentinelHubChunkStore`.
+        :param batch_size: Number of items read at once.
+        :param checkpoint: Optional checkpoint. Written items are
+            recorded in the checkpoint, and items already recorded
+            and present in the output are skipped.
+        :param keys: Optional keys of the items to be copied.
+            Defaults to all keys of *store*.
+        :param key_mapping: Optional function that maps the key of an
+            item of *store* to the key it is written to,
+            e.g., to shift chunks along an array dimension.
+        :return: The number of items written.
+        """
+        num_items = 0
+        key_mapping = key_mapping or (lambda key: key)
+        keys = iter(store if keys is None else keys)
+        if checkpoint is not None:
+            keys = (
+                key
+                for key in keys
+                if key_mapping(key) not in checkpoint.keys
+                or not self.has_item(key_mapping(key))
+            )
+        while True:
+            batch = list(itertools.islice(keys, batch_size))
+            if not batch:
+                return num_items
+            items = store.getitems(batch, contexts={})
+            for key in batch:
+                item_bytes = items.get(key)
+                if item_bytes:
+                    self.write_item(key_mapping(key), item_bytes)
+                    if checkpoint is not None:
+                        checkpoint.add(key_mapping(key))
+                    num_items += 1
+
     @classmethod
     def write_json(cls, file_path: str, obj: Dict[str, Any]):
         with open(file_path, "w") as fp:
@@ -96,3 +183,78 @@ class ZarrWriter:
     def write_byte_data(cls, file_path: str, byte_data: Any):
         with open(file_path, "wb") as fp:
             fp.write(byte_data)
+
+
+class ZarrCheckpoint:
+    """
+    A checkpoint of :meth:`ZarrWriter.copy_store`, which allows
+    resuming an interrupted copy of a cube.
+
+    The first line of the checkpoint file is the manifest of the
+    cube being copied, each further line is the key of a written item.
+    Keys are appended and flushed once their item has been written,
+    so the file remains valid if the process dies.
+
+    :param path: Path of the checkpoint file.
+    """
+
+    def __init__(self, path: str):
+        self._path = path
+        self._lock = threading.Lock()
+        self._keys: Set[str] = set()
+        self._fp = None
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def keys(self) -> Set[str]:
+        """The keys of the items written so far."""
+        return self._keys
+
+    def exists(self) -> bool:
+        return os.path.isfile(self._path)
+
+    def create(self, manifest: CubeManifest):
+        """
+        Create a new checkpoint file for the cube given by *manifest*.
+        """
+        self.close()
+        with open(self._path, "w") as fp:
+            fp.write(json.dumps(manifest.to_dict()) + "\n")
+        self._keys = set()
+
+    def load(self) -> CubeManifest:
+        """
+        Load the checkpoint file.
+
+        :return: The manifest of the cube being copied.
+        """
+        self.close()
+        with open(self._path) as fp:
+            manifest = CubeManifest.from_dict(json.loads(fp.readline()))
+            # An incomplete last line is ignored
+            self._keys = {line[:-1] for line in fp.readlines() if line.endswith("\n")}
+        return manifest
+
+    def add(self, key: str):
+        """Record the item given by *key* as written."""
+        with self._lock:
+            if self._fp is None:
+                self._fp = open(self._path, "a")
+            self._fp.write(key + "\n")
+            self._fp.flush()
+            self._keys.add(key)
+
+    def close(self):
+        with self._lock:
+            if self._fp is not None:
+                self._fp.close()
+                self._fp = None
+
+    def remove(self):
+        """Remove the checkpoint file, e.g., once a copy completed."""
+        self.close()
+        if os.path.exists(self._path):
+            os.remove(self._path)